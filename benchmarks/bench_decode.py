@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the decoding of process outputs, from 1 KB to 100 MB.
+
+Compares the previous implementation, which gave the whole output to the
+encoding detector, with `chaoslib.decode_bytes`, which validates ASCII and
+UTF-8 first, samples the data when detection is needed and remembers the
+detected encoding of an activity.
+
+The previous implementation is only measured up to `LEGACY_MAX_SIZE` as
+detecting the encoding of larger outputs takes too long.
+
+    $ python benchmarks/bench_decode.py
+"""
+
+import timeit
+
+from chaoslib import HAS_CHARDET, clear_encoding_cache, decode_bytes
+from chaoslib.exceptions import ActivityFailed
+
+if HAS_CHARDET:
+    from chaoslib import chardet
+
+KB = 1024
+MB = 1024 * KB
+SIZES = (KB, 64 * KB, MB, 10 * MB, 100 * MB)
+LEGACY_MAX_SIZE = 10 * MB
+# bytes decoded per measure, at least one call
+BUDGET = 10 * MB
+
+
+###############################################################################
+# Previous implementation, kept here for comparison
+###############################################################################
+def legacy_decode_bytes(data: bytes, default_encoding: str = "utf-8") -> str:
+    encoding = default_encoding
+    if HAS_CHARDET:
+        detected = chardet.detect(data) or {}
+        confidence = detected.get("confidence") or 0
+        if confidence >= 0.5:
+            encoding = detected["encoding"]
+
+    try:
+        return data.decode(encoding)
+    except UnicodeDecodeError:
+        raise ActivityFailed(f"Failed to decode bytes using encoding '{encoding}'")
+
+
+###############################################################################
+# Payloads
+###############################################################################
+def make_output(text: str, encoding: str, size: int) -> bytes:
+    """
+    Lines of the given text, encoded, up to `size` bytes.
+    """
+    line = (text + "\n").encode(encoding)
+    return (line * (size // len(line) + 1))[:size]
+
+
+PAYLOADS = (
+    ("ascii", "INFO pod/app-42 restarted in namespace default", "ascii"),
+    ("utf-8", "INFO pod/app-42 redémarré, état: prêt ✓", "utf-8"),
+    ("cp1251", "INFO под app-42 перезапущен, состояние: готов", "cp1251"),
+)
+
+
+def measure(fn, size: int) -> float:
+    number = max(1, BUDGET // size)
+    return timeit.timeit(fn, number=number) / number
+
+
+def main() -> None:
+    print(f"{'payload':>18} {'legacy':>11} {'decode':>11} {'remembered':>11}")
+    for label, text, encoding in PAYLOADS:
+        for size in SIZES:
+            data = make_output(text, encoding, size)
+            # the previous encodings are the fallback when detection is unsure
+            default = encoding if encoding != "ascii" else "utf-8"
+            cache_key = ("bench", label, size)
+
+            legacy = "-"
+            if size <= LEGACY_MAX_SIZE:
+                expected = legacy_decode_bytes(data, default)
+                assert decode_bytes(data, default) == expected
+                t = measure(lambda: legacy_decode_bytes(data, default), size)
+                legacy = f"{t * 1e3:.3f}ms"
+
+            clear_encoding_cache()
+            current = measure(lambda: decode_bytes(data, default), size)
+            remembered = measure(
+                lambda: decode_bytes(data, default, cache_key=cache_key), size
+            )
+
+            name = f"{label} {size // KB}KB"
+            print(
+                f"{name:>18} {legacy:>11} {current * 1e3:>9.3f}ms "
+                f"{remembered * 1e3:>9.3f}ms"
+            )
+    clear_encoding_cache()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Micro-benchmark of the parsing of generated experiments of increasing size.
+
+Compares the standard `json` module and PyYAML's pure-Python `SafeLoader`
+with the backends `chaoslib.parsers` picks by default and, when installed,
+with `orjson`.
+
+    $ python benchmarks/bench_parse.py
+"""
+
+import json
+import timeit
+from typing import Any, Dict
+
+import yaml
+
+from chaoslib.parsers import (
+    HAS_ORJSON,
+    get_parser_backends,
+    parse_json,
+    parse_yaml,
+    use_parser_backends,
+)
+
+NUMBER = 5
+
+
+def make_experiment(size: int) -> Dict[str, Any]:
+    """
+    An experiment with `size` activities, alternating between HTTP probes
+    and process actions.
+    """
+    method = []
+    for i in range(size):
+        if i % 2:
+            method.append(
+                {
+                    "type": "probe",
+                    "name": "probe-{}".format(i),
+                    "tolerance": 200,
+                    "provider": {
+                        "type": "http",
+                        "url": "https://service-{}.local/health".format(i),
+                        "method": "GET",
+                        "headers": {"Accept": "application/json"},
+                        "timeout": [3, 5],
+                    },
+                }
+            )
+        else:
+            method.append(
+                {
+                    "type": "action",
+                    "name": "action-{}".format(i),
+                    "provider": {
+                        "type": "process",
+                        "path": "kubectl",
+                        "arguments": ["delete", "pod", "-l", "app=app-{}".format(i)],
+                    },
+                    "pauses": {"after": 0.5},
+                }
+            )
+    return {
+        "version": "1.0.0",
+        "title": "Generated experiment",
+        "description": "An experiment with {} activities".format(size),
+        "tags": ["generated", "benchmark"],
+        "configuration": {"namespace": "default"},
+        "method": method,
+        "rollbacks": [],
+    }
+
+
+def parse_with_orjson(content: str) -> Any:
+    use_parser_backends(json_backend="orjson")
+    try:
+        return parse_json(content)
+    finally:
+        use_parser_backends(json_backend=json.__name__)
+
+
+def main() -> None:
+    backends = get_parser_backends()
+    print(f"default backends: json={backends['json']}, yaml={backends['yaml']}")
+    print(
+        f"{'activities':>10} {'json':>10} {'parse_json':>10} {'orjson':>10} "
+        f"{'yaml':>10} {'parse_yaml':>10}"
+    )
+    for size in (100, 1000, 5000):
+        experiment = make_experiment(size)
+        as_json = json.dumps(experiment)
+        as_yaml = yaml.safe_dump(experiment)
+        assert parse_json(as_json) == json.loads(as_json)
+        assert parse_yaml(as_yaml) == yaml.safe_load(as_yaml)
+
+        timings = [
+            timeit.timeit(lambda: json.loads(as_json), number=NUMBER),
+            timeit.timeit(lambda: parse_json(as_json), number=NUMBER),
+            None,
+            timeit.timeit(lambda: yaml.safe_load(as_yaml), number=NUMBER),
+            timeit.timeit(lambda: parse_yaml(as_yaml), number=NUMBER),
+        ]
+        if HAS_ORJSON:
+            timings[2] = timeit.timeit(
+                lambda: parse_with_orjson(as_json), number=NUMBER
+            )
+        print(
+            f"{size:>10} "
+            + " ".join(
+                f"{t / NUMBER * 1e3:>8.1f}ms" if t is not None else f"{'-':>10}"
+                for t in timings
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
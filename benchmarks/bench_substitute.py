@@ -0,0 +1,141 @@
+"""
+Micro-benchmark of the substitution of large activity arguments.
+
+Compares the previous implementation, which rebuilt a template for every
+string of the payload, with `chaoslib.substitute` and with a payload
+compiled once and rendered many times.
+
+    $ python benchmarks/bench_substitute.py
+"""
+
+import timeit
+from collections import ChainMap
+from string import Template
+from typing import Any, Dict, List, Mapping
+
+from chaoslib import compile_substitution, substitute
+
+NUMBER = 200
+
+
+###############################################################################
+# Previous implementation, kept here for comparison
+###############################################################################
+class TypedTemplate(Template):
+    def safe_substitute(self, mapping: Dict[str, Any]) -> Any:
+        match = self.pattern.fullmatch(self.template)
+        if match is not None:
+            try:
+                _, _, key, _ = match.groups()
+                return mapping[key]
+            except ValueError:
+                pass
+        return Template.safe_substitute(self, mapping)
+
+
+def legacy_substitute(data: Any, configuration: Dict, secrets: Dict) -> Any:
+    secrets = secrets.values() if secrets else []
+    mapping = ChainMap(configuration or {}, *secrets)
+    if isinstance(data, dict):
+        return legacy_substitute_dict(data, mapping)
+    return data
+
+
+def legacy_substitute_dict(data: Dict[str, Any], mapping: Mapping) -> Dict[str, Any]:
+    args = {}
+    for key, value in data.items():
+        if isinstance(value, str):
+            args[key] = TypedTemplate(value).safe_substitute(mapping)
+        elif isinstance(value, (list, tuple)):
+            args[key] = legacy_substitute_in_sequence(value, mapping)
+        elif isinstance(value, dict):
+            args[key] = legacy_substitute_dict(value, mapping)
+        else:
+            args[key] = value
+    return args
+
+
+def legacy_substitute_in_sequence(data: List[Any], mapping: Mapping) -> List[Any]:
+    new_value = []
+    for v in data:
+        if isinstance(v, str):
+            new_value.append(TypedTemplate(v).safe_substitute(mapping))
+        elif isinstance(v, (list, tuple)):
+            new_value.extend(legacy_substitute_in_sequence(v, mapping))
+        elif isinstance(v, dict):
+            new_value.append(legacy_substitute_dict(v, mapping))
+        else:
+            new_value.append(v)
+    return new_value
+
+
+###############################################################################
+# Payloads
+###############################################################################
+def make_arguments(size: int, dynamic_every: int) -> Dict[str, Any]:
+    """
+    A payload looking like the manifest passed to a Kubernetes action, with
+    one placeholder every `dynamic_every` leaves.
+    """
+    containers = []
+    for i in range(size):
+        image = "registry.local/app-{}:1.0".format(i)
+        if i % dynamic_every == 0:
+            image = "${registry}/app-" + str(i) + ":${version}"
+        containers.append(
+            {
+                "name": "app-{}".format(i),
+                "image": image,
+                "ports": [{"containerPort": 8080 + i, "protocol": "TCP"}],
+                "env": (
+                    [
+                        {"name": "LOG_LEVEL", "value": "info"},
+                        {"name": "REPLICAS", "value": "${replicas}"},
+                    ]
+                    if i % dynamic_every == 0
+                    else [{"name": "LOG_LEVEL", "value": "info"}]
+                ),
+                "args": ["--listen", "0.0.0.0", "--verbose"],
+            }
+        )
+    return {
+        "ns": "${namespace}",
+        "spec": {
+            "metadata": {"labels": {"app": "demo", "tier": "backend"}},
+            "containers": containers,
+        },
+    }
+
+
+def main() -> None:
+    configuration = {"namespace": "default", "registry": "quay.io", "version": "2"}
+    secrets = {"k8s": {"replicas": 3}}
+
+    print(f"{'payload':>28} {'legacy':>10} {'substitute':>11} {'render':>10}")
+    for size, dynamic_every in ((10, 1), (200, 1), (200, 20), (1000, 100)):
+        arguments = make_arguments(size, dynamic_every)
+        compiled = compile_substitution(arguments)
+        assert legacy_substitute(arguments, configuration, secrets) == compiled.render(
+            configuration, secrets
+        )
+
+        legacy = timeit.timeit(
+            lambda: legacy_substitute(arguments, configuration, secrets),
+            number=NUMBER,
+        )
+        current = timeit.timeit(
+            lambda: substitute(arguments, configuration, secrets), number=NUMBER
+        )
+        render = timeit.timeit(
+            lambda: compiled.render(configuration, secrets), number=NUMBER
+        )
+
+        label = f"{size} items, 1/{dynamic_every} dynamic"
+        print(
+            f"{label:>28} {legacy / NUMBER * 1e3:>8.3f}ms "
+            f"{current / NUMBER * 1e3:>9.3f}ms {render / NUMBER * 1e3:>8.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,33 @@
+import asyncio
+import contextvars
 import decimal
 import hashlib
 import os.path
+import threading
 import uuid
-from collections import ChainMap
+from collections import ChainMap, OrderedDict
+from concurrent.futures import Executor, Future
 from datetime import date, datetime
+from functools import lru_cache, partial
 from json.encoder import JSONEncoder
 from string import Template
-from typing import Any, Dict, List, Mapping, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import yaml
 from logzero import logger
 
 from chaoslib.exceptions import ActivityFailed
+from chaoslib.parsers import parse_json, parse_yaml
 from chaoslib.types import Configuration, ConfigVars, Experiment, Secrets, SecretVars
 
 HAS_CHARDET = True
@@ -34,12 +50,19 @@ except ImportError:
 __all__ = [
     "__version__",
     "canonical_json",
+    "clear_encoding_cache",
+    "compile_substitution",
     "decode_bytes",
+    "detect_encoding",
     "experiment_hash",
+    "get_compiled_substitution",
     "substitute",
+    "CompiledSubstitution",
     "merge_vars",
     "convert_vars",
     "PayloadEncoder",
+    "run_in_executor_in_context",
+    "submit_in_context",
 ]
 __version__ = "1.35.1"
 
@@ -58,16 +81,15 @@ def substitute(
 
     The goal is to inject values into the experiment by reading them from
     dynamic values.
+
+    When the same payload is substituted many times, compile it once with
+    :func:`compile_substitution`, or lookup its plan with
+    :func:`get_compiled_substitution`, and render the result instead.
     """
     if not data:
         return data
 
-    # secrets is a mapping of mapping, only the second level is useful here
-    secrets = secrets.values() if secrets else []
-
-    # let's pretend we have a single mapping of everything with the config
-    # by the leader
-    mapping = ChainMap(configuration or {}, *secrets)
+    mapping = make_substitution_mapping(configuration, secrets)
 
     if isinstance(data, dict):
         return substitute_dict(data, mapping)
@@ -81,6 +103,85 @@ def substitute(
     return data
 
 
+def compile_substitution(
+    data: Union[None, str, Dict[str, Any], List],
+) -> "CompiledSubstitution":
+    """
+    Compile the given payload into a plan that can be rendered many times
+    against different configuration and secrets.
+
+    Only the strings holding `${}` placeholders are rendered, the mappings
+    and sequences of the payload are copied so the rendered payload can be
+    altered freely. A part of the payload altered since it was compiled is
+    compiled again when rendered.
+    """
+    return CompiledSubstitution(data)
+
+
+def get_compiled_substitution(
+    data: Union[None, str, Dict[str, Any], List],
+) -> "CompiledSubstitution":
+    """
+    Lookup the plan of the given payload, such as the arguments of an
+    activity, or compile it if none was compiled for that very payload yet.
+    """
+    key = id(data)
+    with _compiled_substitutions_lock:
+        compiled = _compiled_substitutions.get(key)
+        if compiled is not None and compiled.data is data:
+            _compiled_substitutions.move_to_end(key)
+            return compiled
+
+    compiled = CompiledSubstitution(data)
+    with _compiled_substitutions_lock:
+        # the plan holds on to the payload so its id cannot be reused
+        _compiled_substitutions[key] = compiled
+        _compiled_substitutions.move_to_end(key)
+        while len(_compiled_substitutions) > MAX_COMPILED_SUBSTITUTIONS:
+            _compiled_substitutions.popitem(last=False)
+    return compiled
+
+
+class CompiledSubstitution:
+    """
+    A payload compiled by :func:`compile_substitution`.
+    """
+
+    __slots__ = ("data", "plan", "dynamic")
+
+    def __init__(self, data: Union[None, str, Dict[str, Any], List]) -> None:
+        self.data = data
+        self.plan = None
+        # whether the payload holds any placeholder at all
+        self.dynamic = holds_placeholders(data)
+
+        if isinstance(data, dict):
+            self.plan = compile_dict(data)
+        elif isinstance(data, str):
+            self.plan = compile_string(data)
+        elif isinstance(data, list):
+            self.plan = compile_sequence(data)
+
+    def render(self, configuration: Configuration, secrets: Secrets) -> Any:
+        """
+        Render the payload with the values found in either the
+        `configuration` or `secrets` mappings.
+        """
+        if self.plan is None:
+            return self.data
+
+        return self.plan(make_substitution_mapping(configuration, secrets))
+
+    def render_with(self, mapping: Mapping[str, Any]) -> Any:
+        """
+        Render the payload with the values found in `mapping`.
+        """
+        if self.plan is None:
+            return self.data
+
+        return self.plan(mapping)
+
+
 class TypedTemplate(Template):
     def safe_substitute(self, mapping: Dict[str, Any]) -> Any:
         """
@@ -101,14 +202,25 @@ class TypedTemplate(Template):
         return Template.safe_substitute(self, mapping)
 
 
-def substitute_string(data: str, mapping: Mapping[str, Any]) -> Any:
-    return TypedTemplate(data).safe_substitute(mapping)
+def make_substitution_mapping(
+    configuration: Configuration, secrets: Secrets
+) -> Mapping[str, Any]:
+    # secrets is a mapping of mapping, only the second level is useful here
+    secrets = secrets.values() if secrets else []
+
+    # let's pretend we have a single mapping of everything with the config
+    # by the leader
+    return ChainMap(configuration or {}, *secrets)
 
 
-def substitute_dict(data: Dict[str, Any], mapping: Mapping[str, Any]) -> Dict[str, Any]:
-    if not data:
+def substitute_string(data: str, mapping: Mapping[str, Any]) -> Any:
+    plan = compile_string(data)
+    if plan is None:
         return data
+    return plan(mapping)
+
 
+def substitute_dict(data: Dict[str, Any], mapping: Mapping[str, Any]) -> Dict[str, Any]:
     args = {}
     for key, value in data.items():
         if isinstance(value, str):
@@ -123,9 +235,6 @@ def substitute_dict(data: Dict[str, Any], mapping: Mapping[str, Any]) -> Dict[st
 
 
 def substitute_in_sequence(data: List[Any], mapping: Mapping[str, Any]) -> List[Any]:
-    if not data:
-        return data
-
     new_value = []
     for v in data:
         if isinstance(v, str):
@@ -139,31 +248,79 @@ def substitute_in_sequence(data: List[Any], mapping: Mapping[str, Any]) -> List[
     return new_value
 
 
-def decode_bytes(data: bytes, default_encoding: str = "utf-8") -> str:
+def decode_bytes(
+    data: bytes, default_encoding: str = "utf-8", cache_key: Hashable = None
+) -> str:
     """
     Decode the given bytes and return the decoded unicode string or raises
     `ActivityFailed`.
 
-    When the chardet, or cchardet, packages are installed, we try to detect
-    the encoding and use that instead of the default one (when the confidence
-    is greater or equal than 50%).
-    """
-    encoding = default_encoding
-    if HAS_CHARDET:
-        detected = chardet.detect(data) or {}
-        confidence = detected.get("confidence") or 0
-        if confidence >= 0.5:
-            encoding = detected["encoding"]
-            logger.debug(
-                "Data encoding detected as '{}' "
-                "with a confidence of {}".format(encoding, confidence)
-            )
+    ASCII and valid UTF-8 data are decoded straight away. Otherwise, when
+    the chardet, or cchardet, packages are installed, we try to detect the
+    encoding and use that instead of the default one (when the confidence
+    is greater or equal than 50%). Only a sample of the data, around the
+    first byte which is not valid UTF-8, is given to the detector so the
+    cost does not grow with the size of the data.
+
+    When `cache_key` is set, such as the activity and the executable the
+    data comes from, the encoding detected with a confidence of at least
+    90% is remembered and tried first the next time data is decoded with
+    the same key. Single-byte encodings decode anything, so the remembered
+    one is still checked against a new detection every
+    `REDETECTION_INTERVAL` decodings.
+    """
+    if data.isascii():
+        return data.decode("ascii")
 
     try:
-        return data.decode(encoding)
-    except UnicodeDecodeError:
+        return data.decode("utf-8")
+    except UnicodeDecodeError as x:
+        invalid_at = x.start
+
+    if cache_key is not None:
+        encoding = get_detected_encoding(cache_key)
+        if encoding is not None:
+            try:
+                return data.decode(encoding)
+            except (UnicodeDecodeError, LookupError):
+                forget_detected_encoding(cache_key)
+
+    encoding, confidence = sample_encoding(data, invalid_at)
+    if encoding is None:
+        encoding = default_encoding
+    try:
+        decoded = data.decode(encoding)
+    except (UnicodeDecodeError, LookupError):
         raise ActivityFailed(f"Failed to decode bytes using encoding '{encoding}'")
 
+    if cache_key is not None:
+        if confidence >= REMEMBERED_ENCODING_CONFIDENCE:
+            remember_detected_encoding(cache_key, encoding)
+        else:
+            forget_detected_encoding(cache_key)
+    return decoded
+
+
+def detect_encoding(
+    data: bytes, invalid_at: int = 0, default_encoding: str = "utf-8"
+) -> str:
+    """
+    Detect the encoding of the given data, which is not valid UTF-8 from
+    `invalid_at` onwards, from a sample around that position. Returns the
+    default encoding when the chardet, or cchardet, packages are not
+    installed or their confidence is lower than 50%.
+    """
+    encoding, _ = sample_encoding(data, invalid_at)
+    return encoding or default_encoding
+
+
+def clear_encoding_cache() -> None:
+    """
+    Forget the encodings detected by :func:`decode_bytes`.
+    """
+    with _detected_encodings_lock:
+        _detected_encodings.clear()
+
 
 def merge_vars(
     var: Dict[str, Union[str, float, int, bytes]] = None,  # noqa: C901
@@ -211,7 +368,7 @@ def merge_vars(
             _, ext = os.path.splitext(var_file)
             if ext in (".yaml", ".yml"):
                 try:
-                    data = yaml.safe_load(content)
+                    data = parse_yaml(content)
                 except yaml.YAMLError as y:
                     logger.error(
                         "Failed to parse variable file '{}': {}".format(
@@ -221,7 +378,7 @@ def merge_vars(
                     continue
             elif ext in (".json",):
                 try:
-                    data = json.loads(content)
+                    data = parse_json(content)
                 except JSONDecodeError as x:
                     logger.error(
                         "Failed to parse variable file '{}': {}".format(
@@ -344,6 +501,32 @@ def canonical_json(experiment: Experiment) -> bytes:
     )
 
 
+def submit_in_context(pool: Executor, fn: Callable, *args, **kwargs) -> Future:
+    """
+    Submit the call to the pool so it runs with a copy of the current
+    context variables, as threads do not inherit them otherwise.
+
+    The state scoped to a run, such as its activity cache, then follows
+    the activities it plays in the background.
+    """
+    ctx = contextvars.copy_context()
+    return pool.submit(ctx.run, fn, *args, **kwargs)
+
+
+async def run_in_executor_in_context(
+    executor: Optional[Executor], fn: Callable, *args, **kwargs
+) -> Any:
+    """
+    Counterpart of :func:`submit_in_context` to be awaited from an event
+    loop: the call runs in the executor, or the loop's default one when
+    `None`, with a copy of the current context variables since
+    `run_in_executor` does not carry them over.
+    """
+    ctx = contextvars.copy_context()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(ctx.run, fn, *args, **kwargs))
+
+
 def experiment_hash(experiment: Experiment, hash_algo: str = None) -> str:
     """
     Create a hash (using the blake2b algorithm by default) of the
@@ -360,3 +543,218 @@ def experiment_hash(experiment: Experiment, hash_algo: str = None) -> str:
         return hashlib.new(hash_algo, canonical_json(experiment)).hexdigest()
 
     return hashlib.blake2b(canonical_json(experiment), digest_size=12).hexdigest()
+
+
+###############################################################################
+# Internals
+###############################################################################
+SubstitutionPlan = Callable[[Mapping[str, Any]], Any]
+
+
+def compile_string(data: str) -> Optional[SubstitutionPlan]:
+    if TypedTemplate.delimiter not in data:
+        return None
+    return compile_template(data)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(data: str) -> SubstitutionPlan:
+    """
+    Parse the template once and return a function rendering it.
+
+    The rendering follows :class:`TypedTemplate`: a string made of a single
+    placeholder takes the type of the value it refers to.
+    """
+    pattern = TypedTemplate.pattern
+    match = pattern.fullmatch(data)
+    if match is not None:
+        try:
+            _, _, key, _ = match.groups()
+
+            def render_value(mapping: Mapping[str, Any]) -> Any:
+                return mapping[key]
+
+            return render_value
+        except ValueError:
+            pass
+
+    segments = []
+    position = 0
+    for match in pattern.finditer(data):
+        if match.start() > position:
+            segments.append((data[position : match.start()], None))
+        position = match.end()
+
+        named = match.group("named") or match.group("braced")
+        if named is not None:
+            segments.append((match.group(), named))
+        elif match.group("escaped") is not None:
+            segments.append((TypedTemplate.delimiter, None))
+        else:
+            segments.append((match.group(), None))
+    if position < len(data):
+        segments.append((data[position:], None))
+
+    def render_template(mapping: Mapping[str, Any]) -> str:
+        rendered = []
+        for text, key in segments:
+            if key is None:
+                rendered.append(text)
+                continue
+            try:
+                rendered.append(str(mapping[key]))
+            except KeyError:
+                rendered.append(text)
+        return "".join(rendered)
+
+    return render_template
+
+
+def compile_value(value: Any) -> Optional[SubstitutionPlan]:
+    """
+    Compile a value nested in a mapping. Tuples are rendered as lists.
+    Returns `None` for the values used as they are, which are immutable.
+    """
+    if isinstance(value, str):
+        return compile_string(value)
+    if isinstance(value, (list, tuple)):
+        return compile_sequence(value)
+    if isinstance(value, dict):
+        return compile_dict(value)
+    return None
+
+
+def compile_dict(data: Dict[str, Any]) -> SubstitutionPlan:
+    entries = [(key, value, compile_value(value)) for key, value in data.items()]
+
+    def render_dict(mapping: Mapping[str, Any]) -> Dict[str, Any]:
+        if len(data) != len(entries):
+            return compile_dict(data)(mapping)
+
+        args = {}
+        for key, value, plan in entries:
+            if data.get(key, _missing) is not value:
+                # altered since it was compiled
+                return compile_dict(data)(mapping)
+            args[key] = value if plan is None else plan(mapping)
+        return args
+
+    return render_dict
+
+
+def compile_sequence(data: List[Any]) -> SubstitutionPlan:
+    """
+    Compile a sequence. Nested sequences are flattened into their parent
+    when rendered.
+    """
+    items = []
+    for value in data:
+        flatten = isinstance(value, (list, tuple))
+        items.append((value, compile_value(value), flatten))
+
+    def render_sequence(mapping: Mapping[str, Any]) -> List[Any]:
+        if len(data) != len(items):
+            return compile_sequence(data)(mapping)
+
+        new_value = []
+        for current, (value, plan, flatten) in zip(data, items):
+            if current is not value:
+                # altered since it was compiled
+                return compile_sequence(data)(mapping)
+            if plan is not None:
+                value = plan(mapping)
+            if flatten:
+                new_value.extend(value)
+            else:
+                new_value.append(value)
+        return new_value
+
+    return render_sequence
+
+
+def holds_placeholders(data: Any) -> bool:
+    if isinstance(data, str):
+        return compile_string(data) is not None
+    if isinstance(data, dict):
+        return any(holds_placeholders(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(holds_placeholders(value) for value in data)
+    return False
+
+
+_missing = object()
+MAX_COMPILED_SUBSTITUTIONS = 1024
+_compiled_substitutions: "OrderedDict[int, CompiledSubstitution]" = OrderedDict()
+_compiled_substitutions_lock = threading.Lock()
+
+
+# detection is given at most this many bytes, enough for it to be confident
+DETECTION_SAMPLE_SIZE = 64 * 1024
+MAX_DETECTED_ENCODINGS = 1024
+# only encodings detected with that confidence are remembered, and checked
+# again after being used that many times
+REMEMBERED_ENCODING_CONFIDENCE = 0.9
+REDETECTION_INTERVAL = 100
+
+
+def sample_encoding(data: bytes, invalid_at: int) -> Tuple[Optional[str], float]:
+    """
+    Encoding detected from a sample of the data around `invalid_at`, and the
+    confidence of the detection. The encoding is `None` when chardet is not
+    installed or its confidence is lower than 50%.
+    """
+    if not HAS_CHARDET:
+        return None, 0
+
+    start = max(invalid_at - DETECTION_SAMPLE_SIZE // 2, 0)
+    sample = bytes(data[start : start + DETECTION_SAMPLE_SIZE])
+    detected = chardet.detect(sample) or {}
+    confidence = detected.get("confidence") or 0
+    if confidence < 0.5:
+        return None, confidence
+
+    encoding = detected["encoding"]
+    logger.debug(
+        "Data encoding detected as '{}' "
+        "with a confidence of {}".format(encoding, confidence)
+    )
+    return encoding, confidence
+
+
+def get_detected_encoding(key: Hashable) -> Optional[str]:
+    """
+    Encoding remembered for the key, or `None` when there is none or it is
+    time to check it against a new detection.
+    """
+    with _detected_encodings_lock:
+        remembered = _detected_encodings.get(key)
+        if remembered is None:
+            return None
+        _detected_encodings.move_to_end(key)
+        remembered[1] += 1
+        if remembered[1] % REDETECTION_INTERVAL == 0:
+            return None
+        return remembered[0]
+
+
+def remember_detected_encoding(key: Hashable, encoding: str) -> None:
+    with _detected_encodings_lock:
+        remembered = _detected_encodings.get(key)
+        if remembered is not None and remembered[0] == encoding:
+            # keep counting the uses of the encoding confirmed by detection
+            _detected_encodings.move_to_end(key)
+            return
+        _detected_encodings[key] = [encoding, 0]
+        _detected_encodings.move_to_end(key)
+        while len(_detected_encodings) > MAX_DETECTED_ENCODINGS:
+            _detected_encodings.popitem(last=False)
+
+
+def forget_detected_encoding(key: Hashable) -> None:
+    with _detected_encodings_lock:
+        _detected_encodings.pop(key, None)
+
+
+# encodings and how many times they were used since they were detected
+_detected_encodings: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+_detected_encodings_lock = threading.Lock()
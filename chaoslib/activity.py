@@ -1,28 +1,62 @@
+import asyncio
+import hashlib
+import heapq
 import numbers
+import os
+import sys
+import threading
 import time
 import traceback
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import TYPE_CHECKING, Any, Iterator, List
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from logzero import logger
 
-from chaoslib import substitute
+from chaoslib import canonical_json, submit_in_context, substitute
 from chaoslib.caching import lookup_activity
+from chaoslib.context import RunContext
 from chaoslib.control import controls
-from chaoslib.exceptions import ActivityFailed, InvalidActivity
-from chaoslib.provider.http import run_http_activity, validate_http_activity
-from chaoslib.provider.process import run_process_activity, validate_process_activity
-from chaoslib.provider.python import run_python_activity, validate_python_activity
+from chaoslib.exceptions import ActivityFailed, InvalidActivity, InvalidExperiment
+from chaoslib.provider.http import (
+    run_http_activity,
+    run_http_activity_async,
+    validate_http_activity,
+)
+from chaoslib.provider.process import (
+    run_process_activity,
+    run_process_activity_async,
+    validate_process_activity,
+)
+from chaoslib.provider.python import (
+    run_python_activity,
+    run_python_activity_async,
+    validate_python_activity,
+)
 from chaoslib.types import Activity, Configuration, Dry, Experiment, Run, Secrets
 
 if TYPE_CHECKING:
     from chaoslib.run import EventHandlerRegistry
 
 __all__ = [
+    "build_activity_graph",
+    "clear_validation_cache",
     "ensure_activity_is_valid",
     "get_all_activities_in_experiment",
     "run_activities",
+    "run_activities_graph",
+    "run_activities_graph_async",
 ]
 
 
@@ -38,6 +72,11 @@ def ensure_activity_is_valid(activity: Activity):  # noqa: C901
     Depending on the type, an activity requires a variety of other keys.
 
     In all failing cases, raises :exc:`InvalidActivity`.
+
+    Successful validations are remembered, by the content of the activity,
+    as well as the module or executable it relies on, so an activity that
+    did not change is not validated again. Call
+    :func:`clear_validation_cache` to forget them.
     """
     if not activity:
         raise InvalidActivity("empty activity is no activity")
@@ -56,6 +95,11 @@ def ensure_activity_is_valid(activity: Activity):  # noqa: C901
     if activity_type not in ("probe", "action"):
         raise InvalidActivity(f"'{activity_type}' is not a supported activity type")
 
+    key = validation_key(activity)
+    if key is not None and is_known_valid(key):
+        logger.debug(f"Activity '{activity.get('name')}' already validated")
+        return
+
     if not activity.get("name"):
         raise InvalidActivity("an activity must have a name")
 
@@ -105,6 +149,15 @@ def ensure_activity_is_valid(activity: Activity):  # noqa: C901
         if not isinstance(activity["background"], bool):
             raise InvalidActivity("activity background must be a boolean")
 
+    if "depends_on" in activity:
+        depends_on = activity["depends_on"]
+        if not isinstance(depends_on, list) or not all(
+            isinstance(d, str) and d for d in depends_on
+        ):
+            raise InvalidActivity(
+                "activity depends_on must be a list of non-empty activity names"
+            )
+
     if provider_type == "python":
         validate_python_activity(activity)
     elif provider_type == "process":
@@ -112,6 +165,18 @@ def ensure_activity_is_valid(activity: Activity):  # noqa: C901
     elif provider_type == "http":
         validate_http_activity(activity)
 
+    # the Python module is only certainly imported now
+    remember_valid(key if key is not None else validation_key(activity))
+
+
+def clear_validation_cache():
+    """
+    Forget the activities validated so far, they will be fully validated
+    again next time.
+    """
+    with _validated_lock:
+        _validated.clear()
+
 
 def run_activities(
     experiment: Experiment,
@@ -135,7 +200,8 @@ def run_activities(
     for activity in method:
         if activity.get("background"):
             logger.debug("activity will run in the background")
-            yield pool.submit(
+            yield submit_in_context(
+                pool,
                 execute_activity,
                 experiment=experiment,
                 activity=activity,
@@ -157,9 +223,306 @@ def run_activities(
             )
 
 
+def run_activities_graph(
+    experiment: Experiment,
+    configuration: Configuration,
+    secrets: Secrets,
+    pool: ThreadPoolExecutor,
+    dry: Dry = None,
+    event_registry: "EventHandlerRegistry" = None,
+    runs: List[Run] = None,
+    should_stop: Callable[[], bool] = None,
+    futures: List[Future] = None,
+) -> None:
+    """
+    Run the activities of the method following the dependencies they declare
+    through their `depends_on` property. An activity is submitted to the
+    `pool` as soon as all the activities it depends on have completed, so
+    independent branches run concurrently.
+
+    A dependency only constrains the order of execution, a failed activity
+    does not prevent its dependents from running, as is the case when the
+    method is played sequentially.
+
+    Runs are recorded into `runs` in the order the activities were declared
+    in the method, not in the order they started or completed.
+
+    When `should_stop` is provided, it is called before scheduling new
+    activities and, when it returns `True`, no further activities get
+    scheduled. Activities already submitted are waited for so their runs
+    are complete, whichever way this function returns, except on an exit
+    signal: the submitted activities are then appended to `futures` so the
+    caller can wait for or cancel them.
+    """
+    method = experiment.get("method", [])
+
+    if not method:
+        logger.info("No declared activities, let's move on.")
+        return
+
+    graph = build_activity_graph(method)
+    dependents, _ = reverse_activity_graph(graph)
+
+    # each activity records its run as soon as it starts, at the position
+    # of its declaration
+    slots = DeclarationOrderedRuns(runs, len(method))
+    ready = sorted(index for index, deps in graph.items() if not deps)
+    pending = {}
+
+    try:
+        while ready or pending:
+            if should_stop and should_stop():
+                logger.debug("Not scheduling any further activities")
+                break
+
+            for index in ready:
+                activity = method[index]
+                logger.debug(
+                    "Scheduling activity '{}'".format(
+                        activity.get("name", activity.get("ref"))
+                    )
+                )
+                f = submit_in_context(
+                    pool,
+                    execute_activity,
+                    experiment=experiment,
+                    activity=activity,
+                    configuration=configuration,
+                    secrets=secrets,
+                    dry=dry,
+                    event_registry=event_registry,
+                    runs=slots.slot(index),
+                )
+                pending[f] = index
+                if futures is not None:
+                    futures.append(f)
+            ready = []
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for f in done:
+                index = pending.pop(f)
+                # let exceptions such as InterruptExecution bubble up
+                f.result()
+                for dependent in dependents[index]:
+                    graph[dependent].discard(index)
+                    if not graph[dependent]:
+                        ready.append(dependent)
+            ready.sort()
+    except SystemExit:
+        # the caller decides whether to wait for the submitted activities
+        pending.clear()
+        raise
+    finally:
+        wait(pending)
+
+
+async def run_activities_graph_async(
+    experiment: Experiment,
+    configuration: Configuration,
+    secrets: Secrets,
+    max_workers: int = None,
+    dry: Dry = None,
+    event_registry: "EventHandlerRegistry" = None,
+    runs: List[Run] = None,
+    should_stop: Callable[[], bool] = None,
+) -> None:
+    """
+    Counterpart of :func:`run_activities_graph` to be awaited from an event
+    loop. Each activity is a task waiting for the tasks of the activities it
+    depends on. At most `max_workers` activities run at once when set.
+    """
+    method = experiment.get("method", [])
+
+    if not method:
+        logger.info("No declared activities, let's move on.")
+        return
+
+    graph = build_activity_graph(method)
+    slots = DeclarationOrderedRuns(runs, len(method))
+    tasks = {}
+    semaphore = asyncio.Semaphore(max_workers) if max_workers else None
+
+    async def play(index: int) -> None:
+        dependencies = [tasks[d] for d in sorted(graph[index])]
+        if dependencies:
+            await asyncio.wait(dependencies)
+
+        if should_stop and should_stop():
+            return
+
+        if semaphore:
+            await semaphore.acquire()
+        try:
+            await execute_activity_async(
+                experiment=experiment,
+                activity=method[index],
+                configuration=configuration,
+                secrets=secrets,
+                dry=dry,
+                event_registry=event_registry,
+                runs=slots.slot(index),
+            )
+        finally:
+            if semaphore:
+                semaphore.release()
+
+    # tasks are created in topological order so a task can always lookup
+    # the tasks of its dependencies
+    for index in topological_order(graph):
+        tasks[index] = asyncio.ensure_future(play(index))
+
+    try:
+        # let exceptions such as InterruptExecution bubble up
+        await asyncio.gather(*tasks.values())
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+
+def topological_order(graph: Dict[int, Set[int]]) -> List[int]:
+    """
+    Order the nodes of a graph built by :func:`build_activity_graph` so that
+    every node comes after its dependencies. Ties are broken by declaration
+    order.
+    """
+    order = []
+    dependents, in_degree = reverse_activity_graph(graph)
+    free = [index for index, degree in in_degree.items() if not degree]
+    heapq.heapify(free)
+    while free:
+        index = heapq.heappop(free)
+        order.append(index)
+        for dependent in dependents[index]:
+            in_degree[dependent] -= 1
+            if not in_degree[dependent]:
+                heapq.heappush(free, dependent)
+    return order
+
+
+def reverse_activity_graph(
+    graph: Dict[int, Set[int]],
+) -> Tuple[Dict[int, List[int]], Dict[int, int]]:
+    """
+    Map each node of a graph built by :func:`build_activity_graph` to the
+    nodes depending on it, along with the number of dependencies of each
+    node.
+    """
+    dependents = {index: [] for index in graph}
+    in_degree = {}
+    for index, dependencies in graph.items():
+        in_degree[index] = len(dependencies)
+        for dependency in dependencies:
+            dependents[dependency].append(index)
+    return dependents, in_degree
+
+
+def build_activity_graph(activities: List[Activity]) -> Dict[int, Set[int]]:
+    """
+    Build the dependency graph of the given activities from their
+    `depends_on` property, which lists the names of the activities that must
+    complete before that activity can start.
+
+    The graph maps the index of each activity to the indices of the
+    activities it depends on. When a name is shared by several activities,
+    the dependent waits for all of them.
+
+    Raises :exc:`InvalidExperiment` when an activity depends on an unknown
+    activity, on itself or when the dependencies form a cycle.
+    """
+    if not any(activity.get("depends_on") for activity in activities):
+        return {index: set() for index in range(len(activities))}
+
+    indices = {}
+    for index, activity in enumerate(activities):
+        name = activity.get("name", activity.get("ref"))
+        if name:
+            indices.setdefault(name, []).append(index)
+
+    graph = {}
+    for index, activity in enumerate(activities):
+        graph[index] = set()
+        name = activity.get("name", activity.get("ref"))
+        for dependency in activity.get("depends_on") or []:
+            if dependency not in indices:
+                raise InvalidExperiment(
+                    "activity '{}' depends on unknown activity '{}'".format(
+                        name, dependency
+                    )
+                )
+            if index in indices[dependency]:
+                raise InvalidExperiment(f"activity '{name}' cannot depend on itself")
+            graph[index].update(indices[dependency])
+
+    # Kahn's algorithm, any node left over is part of a cycle
+    dependents, in_degree = reverse_activity_graph(graph)
+    free = [index for index, degree in in_degree.items() if not degree]
+    while free:
+        index = free.pop()
+        in_degree.pop(index)
+        for dependent in dependents[index]:
+            in_degree[dependent] -= 1
+            if not in_degree[dependent]:
+                free.append(dependent)
+
+    remaining = in_degree
+    if remaining:
+        names = sorted(
+            {
+                activities[index].get("name", activities[index].get("ref"))
+                for index in remaining
+            }
+        )
+        raise InvalidExperiment(
+            "activities dependencies form a cycle between: {}".format(", ".join(names))
+        )
+
+    return graph
+
+
 ###############################################################################
 # Internal functions
 ###############################################################################
+class DeclarationOrderedRuns:
+    """
+    Record the runs of the activities of a method, played out of order, into
+    `runs` at the position their activity was declared at.
+
+    Each activity records its run through its own :meth:`slot`, from
+    whichever thread it runs in.
+    """
+
+    def __init__(self, runs: Optional[List[Run]], size: int) -> None:
+        self.runs = runs
+        self.offset = len(runs) if runs is not None else 0
+        self.counts = [0] * size
+        self.lock = threading.Lock()
+
+    def slot(self, index: int) -> Optional["RunSlot"]:
+        if self.runs is None:
+            return None
+        return RunSlot(self, index)
+
+    def record(self, index: int, run: Run) -> None:
+        with self.lock:
+            position = self.offset + sum(self.counts[: index + 1])
+            self.runs.insert(position, run)
+            self.counts[index] += 1
+
+
+class RunSlot:
+    """
+    Where the runs of a single activity are recorded, see
+    :class:`DeclarationOrderedRuns`.
+    """
+
+    def __init__(self, runs: DeclarationOrderedRuns, index: int) -> None:
+        self.runs = runs
+        self.index = index
+
+    def append(self, run: Run) -> None:
+        self.runs.record(self.index, run)
+
+
 def execute_activity(
     experiment: Experiment,
     activity: Activity,
@@ -168,17 +531,17 @@ def execute_activity(
     dry: Dry,
     event_registry: "EventHandlerRegistry" = None,
     runs: List[Run] = None,
+    run_context: RunContext = None,
 ) -> Run:
     """
     Low-level wrapper around the actual activity provider call to collect
     some meta data (like duration, start/end time, exceptions...) during
     the run.
+
+    References are looked up, and controls applied, from the current run
+    context unless one is given.
     """
-    ref = activity.get("ref")
-    if ref:
-        activity = lookup_activity(ref)
-        if not activity:
-            raise ActivityFailed(f"could not find referenced activity '{ref}'")
+    activity = resolve_activity(activity, run_context)
 
     with controls(
         level="activity",
@@ -186,76 +549,30 @@ def execute_activity(
         context=activity,
         configuration=configuration,
         secrets=secrets,
+        run_context=run_context,
     ) as control:
-        dry = activity.get("dry", dry)
-        pauses = activity.get("pauses", {})
-        pauses = substitute(pauses, configuration, secrets)
-        pause_before = pauses.get("before")
-        is_dry = False
-        activity_type = activity["type"]
-        if dry == Dry.ACTIONS:
-            is_dry = activity_type == "action"
-        elif dry == Dry.PROBES:
-            is_dry = activity_type == "probe"
-        elif dry == Dry.ACTIVITIES:
-            is_dry = True
+        dry, pauses, is_dry = prepare_activity(activity, configuration, secrets, dry)
+        pause_before = pause_duration(pauses, "before", dry, is_dry)
         if pause_before:
-            logger.info(f"Pausing before next activity for {pause_before}s...")
-            # pause when one of the dry flags are set
-            if dry != Dry.PAUSE and not is_dry:
-                time.sleep(pause_before)
-
-        if activity.get("background"):
-            logger.info(
-                "{t}: {n} [in background]".format(
-                    t=activity["type"].title(), n=activity.get("name")
-                )
-            )
-        else:
-            logger.info(
-                "{t}: {n}".format(t=activity["type"].title(), n=activity.get("name"))
-            )
-
-        start = datetime.utcnow()
-        run = {"activity": activity.copy(), "output": None, "start": start.isoformat()}
-        if runs is not None:
-            runs.append(run)
+            time.sleep(pause_before)
 
+        run = start_activity_run(activity, runs)
         result = None
-        interrupted = False
         try:
             if event_registry:
                 event_registry.start_activity(activity)
             # pause when one of the dry flags are set
             if not is_dry:
                 result = run_activity(activity, configuration, secrets)
-            run["output"] = result
-            run["status"] = "succeeded"
-            if result is not None:
-                logger.debug(f"  => succeeded with '{result}'")
-            else:
-                logger.debug("  => succeeded without any result value")
+            activity_succeeded(run, result)
         except ActivityFailed as x:
-            error_msg = str(x)
-            run["status"] = "failed"
-            run["output"] = result
-            run["exception"] = traceback.format_exception(type(x), x, None)
-            logger.error(f"  => failed: {error_msg}")
+            activity_failed(run, result, x)
         finally:
-            # capture the end time before we pause
-            end = datetime.utcnow()
-            run["end"] = end.isoformat()
-            run["duration"] = (end - start).total_seconds()
-
-            if event_registry:
-                event_registry.activity_completed(activity, run)
+            end_activity_run(activity, run, event_registry)
 
-            pause_after = pauses.get("after")
-            if pause_after and not interrupted:
-                logger.info(f"Pausing after activity for {pause_after}s...")
-                # pause when one of the dry flags are set
-                if dry != Dry.PAUSE and not is_dry:
-                    time.sleep(pause_after)
+            pause_after = pause_duration(pauses, "after", dry, is_dry)
+            if pause_after:
+                time.sleep(pause_after)
 
         control.with_state(run)
 
@@ -295,6 +612,201 @@ def run_activity(
     return result
 
 
+async def execute_activity_async(
+    experiment: Experiment,
+    activity: Activity,
+    configuration: Configuration,
+    secrets: Secrets,
+    dry: Dry,
+    event_registry: "EventHandlerRegistry" = None,
+    runs: List[Run] = None,
+    run_context: RunContext = None,
+) -> Run:
+    """
+    Counterpart of :func:`execute_activity` to be awaited from an event loop.
+    Pauses do not block the loop and the activity is run via
+    :func:`run_activity_async`.
+    """
+    activity = resolve_activity(activity, run_context)
+
+    with controls(
+        level="activity",
+        experiment=experiment,
+        context=activity,
+        configuration=configuration,
+        secrets=secrets,
+        run_context=run_context,
+    ) as control:
+        dry, pauses, is_dry = prepare_activity(activity, configuration, secrets, dry)
+        pause_before = pause_duration(pauses, "before", dry, is_dry)
+        if pause_before:
+            await asyncio.sleep(pause_before)
+
+        run = start_activity_run(activity, runs)
+        result = None
+        try:
+            if event_registry:
+                event_registry.start_activity(activity)
+            if not is_dry:
+                result = await run_activity_async(activity, configuration, secrets)
+            activity_succeeded(run, result)
+        except ActivityFailed as x:
+            activity_failed(run, result, x)
+        finally:
+            end_activity_run(activity, run, event_registry)
+
+        # not awaited in the finally block so a cancelled task stops here
+        pause_after = pause_duration(pauses, "after", dry, is_dry)
+        if pause_after:
+            await asyncio.sleep(pause_after)
+
+        control.with_state(run)
+
+    return run
+
+
+async def run_activity_async(
+    activity: Activity, configuration: Configuration, secrets: Secrets
+) -> Any:
+    """
+    Counterpart of :func:`run_activity` to be awaited from an event loop.
+
+    This is an internal function and should probably avoid being called
+    outside this package.
+    """
+    result = None
+    try:
+        provider = activity["provider"]
+        activity_type = provider["type"]
+        if activity_type == "python":
+            result = await run_python_activity_async(activity, configuration, secrets)
+        elif activity_type == "process":
+            result = await run_process_activity_async(activity, configuration, secrets)
+        elif activity_type == "http":
+            result = await run_http_activity_async(activity, configuration, secrets)
+    except Exception:
+        # just make sure we have a full traceback
+        logger.debug("Activity failed", exc_info=True)
+        raise
+
+    return result
+
+
+def resolve_activity(activity: Activity, run_context: RunContext = None) -> Activity:
+    """
+    Lookup the activity a reference points to, or return the activity itself
+    when it is not a reference.
+    """
+    ref = activity.get("ref")
+    if ref:
+        activity = lookup_activity(ref, run_context)
+        if not activity:
+            raise ActivityFailed(f"could not find referenced activity '{ref}'")
+    return activity
+
+
+def prepare_activity(
+    activity: Activity, configuration: Configuration, secrets: Secrets, dry: Dry
+) -> Tuple[Dry, Dict[str, Any], bool]:
+    """
+    The dry mode of the activity, its substituted pauses and whether it
+    should not be executed.
+    """
+    dry = activity.get("dry", dry)
+    pauses = substitute(activity.get("pauses", {}), configuration, secrets)
+    return dry, pauses, is_activity_dry(activity, dry)
+
+
+def pause_duration(
+    pauses: Dict[str, Any], when: str, dry: Dry, is_dry: bool
+) -> Optional[float]:
+    """
+    How long to pause `"before"` or `"after"` the activity, `None` when
+    there is no pause or when one of the dry flags is set.
+    """
+    pause = pauses.get(when)
+    if not pause:
+        return None
+
+    if when == "before":
+        logger.info(f"Pausing before next activity for {pause}s...")
+    else:
+        logger.info(f"Pausing after activity for {pause}s...")
+
+    # pause when one of the dry flags are set
+    if dry == Dry.PAUSE or is_dry:
+        return None
+    return pause
+
+
+def start_activity_run(activity: Activity, runs: List[Run] = None) -> Run:
+    """
+    Log the activity and create its run, recorded in `runs` straight away.
+    """
+    if activity.get("background"):
+        logger.info(
+            "{t}: {n} [in background]".format(
+                t=activity["type"].title(), n=activity.get("name")
+            )
+        )
+    else:
+        logger.info(
+            "{t}: {n}".format(t=activity["type"].title(), n=activity.get("name"))
+        )
+
+    start = datetime.utcnow()
+    run = {"activity": activity.copy(), "output": None, "start": start.isoformat()}
+    if runs is not None:
+        runs.append(run)
+    return run
+
+
+def activity_succeeded(run: Run, result: Any) -> None:
+    run["output"] = result
+    run["status"] = "succeeded"
+    if result is not None:
+        logger.debug(f"  => succeeded with '{result}'")
+    else:
+        logger.debug("  => succeeded without any result value")
+
+
+def activity_failed(run: Run, result: Any, x: ActivityFailed) -> None:
+    error_msg = str(x)
+    run["status"] = "failed"
+    run["output"] = result
+    run["exception"] = traceback.format_exception(type(x), x, None)
+    logger.error(f"  => failed: {error_msg}")
+
+
+def end_activity_run(
+    activity: Activity, run: Run, event_registry: "EventHandlerRegistry" = None
+) -> None:
+    """
+    Capture the end time of the run, before any pause, and tell the event
+    handlers the activity completed.
+    """
+    end = datetime.utcnow()
+    run["end"] = end.isoformat()
+    run["duration"] = (end - datetime.fromisoformat(run["start"])).total_seconds()
+
+    if event_registry:
+        event_registry.activity_completed(activity, run)
+
+
+def is_activity_dry(activity: Activity, dry: Dry) -> bool:
+    """
+    Tell if the activity should not be executed given the dry mode.
+    """
+    activity_type = activity["type"]
+    if dry == Dry.ACTIONS:
+        return activity_type == "action"
+    elif dry == Dry.PROBES:
+        return activity_type == "probe"
+    elif dry == Dry.ACTIVITIES:
+        return True
+    return False
+
+
 def get_all_activities_in_experiment(experiment: Experiment) -> List[Activity]:
     """
     Handy function to return all activities from a given experiment. Useful
@@ -312,3 +824,96 @@ def get_all_activities_in_experiment(experiment: Experiment) -> List[Activity]:
     activities.extend(rollbacks)
 
     return activities
+
+
+###############################################################################
+# Internals
+###############################################################################
+# successful validations only, failures are always reported again
+_validated: "OrderedDict[str, None]" = OrderedDict()
+_validated_lock = threading.Lock()
+MAX_VALIDATED_ACTIVITIES = 4096
+
+
+def validation_key(activity: Activity) -> Optional[str]:
+    """
+    Hash of the activity along with what its validity depends on beyond its
+    declaration: the file and version of the module of a Python activity,
+    the executable, and the `PATH` it is searched in, of a process one.
+
+    Returns `None` when the activity cannot be hashed, or when the module of
+    a Python activity is not imported yet.
+    """
+    provider = activity.get("provider")
+    if not isinstance(provider, dict):
+        return None
+
+    provider_type = provider.get("type")
+    if provider_type == "python":
+        dependency = python_module_fingerprint(provider.get("module"))
+        if dependency is None:
+            return None
+    elif provider_type == "process":
+        dependency = process_path_fingerprint(provider.get("path"))
+    else:
+        dependency = None
+
+    try:
+        content = canonical_json(activity)
+        dependency = canonical_json(dependency)
+    except (TypeError, ValueError):
+        return None
+
+    h = hashlib.sha256(content)
+    h.update(b"\0")
+    h.update(dependency)
+    return h.hexdigest()
+
+
+def python_module_fingerprint(mod_name: str) -> Optional[List[Any]]:
+    mod = sys.modules.get(mod_name) if isinstance(mod_name, str) else None
+    if mod is None:
+        return None
+
+    package = sys.modules.get(mod_name.partition(".")[0])
+    fingerprint = [
+        getattr(mod, "__version__", None) or getattr(package, "__version__", None)
+    ]
+    path = getattr(mod, "__file__", None)
+    if path:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        fingerprint.extend([path, st.st_mtime_ns, st.st_size])
+    return fingerprint
+
+
+def process_path_fingerprint(path: str) -> List[Any]:
+    fingerprint = [os.environ.get("PATH")]
+    if isinstance(path, str) and os.path.dirname(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return fingerprint
+        fingerprint.extend([st.st_mtime_ns, st.st_mode])
+    return fingerprint
+
+
+def is_known_valid(key: str) -> bool:
+    with _validated_lock:
+        if key in _validated:
+            _validated.move_to_end(key)
+            return True
+    return False
+
+
+def remember_valid(key: Optional[str]):
+    if key is None:
+        return
+
+    with _validated_lock:
+        _validated[key] = None
+        _validated.move_to_end(key)
+        while len(_validated) > MAX_VALIDATED_ACTIVITIES:
+            _validated.popitem(last=False)
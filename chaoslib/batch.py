@@ -0,0 +1,216 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from logzero import logger
+
+from chaoslib import __version__
+from chaoslib.context import RunContext
+from chaoslib.control import get_global_controls
+from chaoslib.notification import flush_notifications
+from chaoslib.run import RunEventHandler, Runner, release_shared_resources
+from chaoslib.settings import get_loaded_settings
+from chaoslib.types import Experiment, Journal, Schedule, Settings, Strategy
+
+__all__ = ["BatchRunner"]
+
+EventHandlersFactory = Callable[[Experiment], List[RunEventHandler]]
+
+
+class BatchRunner:
+    """
+    Run many experiments from the same process, at most `max_workers` of
+    them at once.
+
+    Each run has its own :class:`chaoslib.context.RunContext`, holding its
+    activity index and a copy of the global controls loaded beforehand,
+    with :func:`chaoslib.control.load_global_controls`, so runs do not see
+    each other's state and can initialize and clean up their controls
+    independently. Imported modules, resolved Python functions and HTTP
+    connection pools are shared by all the runs.
+
+    When `max_workers` is not set, it is read from the
+    `runtime.batch.max_workers` setting and defaults to `4`.
+
+    Exit signals are not handled by the runs of the batch as they are not
+    played from the main thread.
+
+    ```python
+    with BatchRunner(max_workers=8) as runner:
+        report = runner.run(experiments, settings)
+    ```
+    """
+
+    def __init__(
+        self,
+        strategy: Strategy = Strategy.DEFAULT,
+        schedule: Schedule = None,
+        max_workers: int = None,
+    ):
+        self.strategy = strategy
+        self.schedule = schedule
+        self.max_workers = max_workers
+
+    def __enter__(self) -> "BatchRunner":
+        return self
+
+    def __exit__(self, exc_type: Any, exc_value: Any, tb: Any) -> None:
+        self.cleanup()
+
+    def cleanup(self):
+        # resources shared by the runs are only released once they are done
+        flush_notifications(timeout=10)
+        release_shared_resources()
+
+    def run(
+        self,
+        experiments: List[Experiment],
+        settings: Settings = None,
+        experiment_vars: Dict[str, Any] = None,
+        event_handlers: EventHandlersFactory = None,
+    ) -> Dict[str, Any]:
+        """
+        Run the experiments and return a report of their runs, in the order
+        the experiments were given.
+
+        `event_handlers`, when set, is called with each experiment and
+        returns the handlers to register for its run only.
+
+        A run which raised, rather than producing a journal, is reported
+        with the `"errored"` status. On a keyboard interrupt, the runs not
+        started yet are reported as `"skipped"` while the others complete.
+        """
+        settings = settings if settings is not None else get_loaded_settings()
+        max_workers = self.max_workers or get_batch_max_workers(settings)
+        controls = get_global_controls()
+
+        logger.info(
+            "Running {} experiments, {} at a time".format(len(experiments), max_workers)
+        )
+        started_at = time.time()
+        report = {
+            "chaoslib-version": __version__,
+            "start": datetime.utcnow().isoformat(),
+            "max_workers": max_workers,
+        }
+
+        runs = [None] * len(experiments)
+        pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="chaoslib-batch"
+        )
+        try:
+            futures = {}
+            for index, experiment in enumerate(experiments):
+                f = pool.submit(
+                    self.run_experiment,
+                    experiment,
+                    settings,
+                    experiment_vars,
+                    controls,
+                    event_handlers,
+                )
+                futures[f] = index
+
+            try:
+                wait(futures)
+            except KeyboardInterrupt:
+                logger.warning("Interrupted, pending experiments are skipped")
+                for f in futures:
+                    f.cancel()
+                wait(futures)
+
+            for f, index in futures.items():
+                runs[index] = make_run_report(index, experiments[index], f)
+        finally:
+            pool.shutdown(wait=True)
+
+        report["end"] = datetime.utcnow().isoformat()
+        report["duration"] = time.time() - started_at
+        report["summary"] = summarize_runs(runs)
+        report["runs"] = runs
+        return report
+
+    def run_experiment(
+        self,
+        experiment: Experiment,
+        settings: Settings,
+        experiment_vars: Dict[str, Any],
+        controls: List[Dict[str, Any]],
+        event_handlers: Optional[EventHandlersFactory],
+    ) -> Journal:
+        """
+        Run a single experiment of the batch in a context of its own.
+        """
+        run_context = RunContext(
+            settings=settings, global_controls=[dict(c) for c in controls]
+        )
+        runner = Runner(self.strategy, self.schedule, run_context=run_context)
+        for h in event_handlers(experiment) if event_handlers else []:
+            runner.register_event_handler(h)
+
+        logger.debug(
+            "Running experiment '{}' from thread {}".format(
+                experiment.get("title"), threading.current_thread().name
+            )
+        )
+        return runner.run(experiment, settings, experiment_vars=experiment_vars)
+
+
+###############################################################################
+# Internals
+###############################################################################
+RUN_STATUSES = (
+    "completed",
+    "failed",
+    "aborted",
+    "interrupted",
+    "errored",
+    "skipped",
+)
+
+
+def get_batch_max_workers(settings: Settings = None) -> int:
+    return (settings or {}).get("runtime", {}).get("batch", {}).get("max_workers", 4)
+
+
+def make_run_report(index: int, experiment: Experiment, f) -> Dict[str, Any]:
+    run = {
+        "index": index,
+        "title": experiment.get("title"),
+        "status": "skipped",
+        "deviated": False,
+        "duration": None,
+        "error": None,
+        "journal": None,
+    }
+
+    if f.cancelled():
+        return run
+
+    error = f.exception()
+    if error is not None:
+        logger.error(
+            "Experiment '{}' could not be run: {}".format(run["title"], str(error))
+        )
+        run["status"] = "errored"
+        run["error"] = f"{error.__class__.__name__}: {str(error)}"
+        return run
+
+    journal = f.result()
+    run["status"] = journal.get("status")
+    run["deviated"] = bool(journal.get("deviated"))
+    run["duration"] = journal.get("duration")
+    run["journal"] = journal
+    return run
+
+
+def summarize_runs(runs: List[Dict[str, Any]]) -> Dict[str, int]:
+    summary = {"total": len(runs), "deviated": 0}
+    summary.update({status: 0 for status in RUN_STATUSES})
+    for run in runs:
+        summary[run["status"]] = summary.get(run["status"], 0) + 1
+        if run["deviated"]:
+            summary["deviated"] += 1
+    return summary
@@ -7,40 +7,28 @@ from typing import Any, Dict, List, Union
 from logzero import logger
 
 import chaoslib
+from chaoslib.context import RunContext, get_run_context
 from chaoslib.types import Activity, Experiment, Schedule, Settings, Strategy
 
 __all__ = ["cache_activities", "clear_cache", "lookup_activity", "with_cache"]
 
 
-# global objects are frown upon but as we write to it once
-# (from a single place) and we only read afterwards, that's likely okay.
-_cache = {}
-
-
-def cache_activities(experiment: Experiment) -> List[Activity]:
+def cache_activities(experiment: Experiment, run_context: RunContext = None):
     """
     Cache all activities into a map so we can quickly lookup ref.
+
+    They are indexed in the current run context unless one is given.
     """
     logger.debug("Building activity cache...")
-
-    lot = experiment.get("method", []) + experiment.get(
-        "steady-state-hypothesis", {}
-    ).get("probes", [])
-
-    for activity in lot:
-        name = activity.get("name")
-        if name:
-            _cache[name] = activity
-
-    logger.debug(f"Cached {len(_cache)} activities")
+    (run_context or get_run_context()).index_activities(experiment)
 
 
-def clear_cache():
+def clear_cache(run_context: RunContext = None):
     """
     Clear the cache
     """
     logger.debug("Clearing activities cache")
-    _cache.clear()
+    (run_context or get_run_context()).clear_activities()
 
 
 def with_cache(f):
@@ -82,11 +70,12 @@ def with_cache(f):
     return wrapped
 
 
-def lookup_activity(ref: str) -> Union[Activity, None]:
+def lookup_activity(ref: str, run_context: RunContext = None) -> Union[Activity, None]:
     """
-    Lookup an activity by name and return it or `None`.
+    Lookup an activity by name, in the current run context unless one is
+    given, and return it or `None`.
     """
-    activity = _cache.get(ref)
+    activity = (run_context or get_run_context()).lookup_activity(ref)
     if not activity:
         logger.debug(f"cache miss for '{ref}'")
     return activity
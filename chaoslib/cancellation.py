@@ -0,0 +1,158 @@
+# Cooperative cancellation of the activities of a run, so they can be asked
+# to stop rather than have an exception forced into their thread
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional
+
+from logzero import logger
+
+from chaoslib.exceptions import ActivityCancelled
+
+__all__ = ["CancellationToken", "get_cancellation_token"]
+
+
+class CancellationToken:
+    """
+    Tells the activities of a run they should stop as soon as they can.
+
+    The runner makes a token current for each run, with :meth:`activate`,
+    and cancels it when the experiment must terminate right away, on a
+    SIGUSR2 signal. Activities then stop cooperatively:
+
+    * Python activities whose function has a `cancel` parameter are given
+      the token. They may check :attr:`cancelled`, sleep with :meth:`wait`
+      or call :meth:`raise_if_cancelled` between steps
+    * process activities kill their process
+    * HTTP activities give up on their request
+    * isolated Python activities kill their worker
+
+    Callbacks registered with :meth:`register` are called once, from the
+    thread cancelling the token, or straight away when the token is already
+    cancelled.
+
+    A token which is not :attr:`cancellable` is held by nobody who would
+    cancel it, activities need not arrange to be interrupted then.
+    """
+
+    def __init__(self, cancellable: bool = True) -> None:
+        self.cancellable = cancellable
+        self.reason = None
+        self.cancelled_at = None
+        self.event = threading.Event()
+        self.callbacks: List[Callable[[], None]] = []
+        self.lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self, reason: str = None) -> None:
+        """
+        Cancel the token and call its callbacks, only the first call has an
+        effect.
+        """
+        with self.lock:
+            if self.event.is_set():
+                return
+            self.reason = reason
+            self.cancelled_at = time.monotonic()
+            self.event.set()
+            callbacks = self.callbacks
+            self.callbacks = []
+
+        logger.debug(f"Cancelling the activities of the run: {reason}")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.debug("Cancellation callback failed", exc_info=True)
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Sleep until the token is cancelled or `timeout` seconds have passed.
+        Returns `True` when the token was cancelled.
+        """
+        return self.event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raise :exc:`chaoslib.exceptions.ActivityCancelled` when the token
+        was cancelled.
+        """
+        if self.cancelled:
+            raise ActivityCancelled(
+                "activity was cancelled: {}".format(self.reason or "no reason given")
+            )
+
+    def elapsed(self) -> Optional[float]:
+        """
+        Seconds since the token was cancelled, `None` when it was not.
+        """
+        if self.cancelled_at is None:
+            return None
+        return time.monotonic() - self.cancelled_at
+
+    def register(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        Call `callback` when the token gets cancelled. Returns a function
+        unregistering it, to be called once the activity is done.
+        """
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(callback)
+                return lambda: self.unregister(callback)
+        callback()
+        return lambda: None
+
+    def unregister(self, callback: Callable[[], None]) -> None:
+        with self.lock:
+            try:
+                self.callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    @contextmanager
+    def child(self) -> Iterator["CancellationToken"]:
+        """
+        A token cancelled along with this one, while the block lasts, but
+        which may also be cancelled on its own to stop only some of the
+        activities.
+        """
+        token = CancellationToken()
+        unregister = self.register(lambda: token.cancel(self.reason))
+        try:
+            yield token
+        finally:
+            unregister()
+
+    @contextmanager
+    def activate(self) -> Iterator["CancellationToken"]:
+        """
+        Make this token the current one for the duration of the block.
+        """
+        token = _current_token.set(self)
+        try:
+            yield self
+        finally:
+            _current_token.reset(token)
+
+
+def get_cancellation_token() -> CancellationToken:
+    """
+    The token of the current run. Outside of a run, a token nobody will
+    ever cancel.
+    """
+    token = _current_token.get()
+    if token is None:
+        return CancellationToken(cancellable=False)
+    return token
+
+
+###############################################################################
+# Internals
+###############################################################################
+_current_token: ContextVar[Optional[CancellationToken]] = ContextVar(
+    "cancellation_token", default=None
+)
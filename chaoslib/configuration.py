@@ -1,12 +1,14 @@
 import os
-from copy import deepcopy
-from typing import Any, Dict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Set, Tuple
 
 from logzero import logger
 
-from chaoslib import convert_to_type
+from chaoslib import TypedTemplate, convert_to_type, submit_in_context
 from chaoslib.exceptions import InvalidExperiment
-from chaoslib.types import Configuration, Secrets
+from chaoslib.settings import get_loaded_settings
+from chaoslib.types import Configuration, Secrets, Settings
 
 __all__ = ["load_configuration", "load_dynamic_configuration"]
 
@@ -99,7 +101,7 @@ def load_configuration(
 
 
 def load_dynamic_configuration(
-    config: Configuration, secrets: Secrets = None
+    config: Configuration, secrets: Secrets = None, settings: Settings = None
 ) -> Configuration:
     """
     This is for loading a dynamic configuration if exists.
@@ -139,7 +141,8 @@ def load_dynamic_configuration(
     The configurations contain as well all the env vars after they are set in
     `load_configuration`.
 
-    The `secrets` argument contains all the secrets of the experiment.
+    The `secrets` argument contains all the secrets of the experiment. They
+    are shared, read-only, by all the probes.
 
     For `process` probes, the stdout value (stripped of endlines)
     is stored into the configuration.
@@ -148,45 +151,49 @@ def load_dynamic_configuration(
 
     We do not stop on errors but log a debug message and do not include the
     key into the result dictionary.
+
+    Probes are run one after the other, in their declaration order, unless
+    the settings tell to run them concurrently:
+
+    ```yaml
+    runtime:
+      configuration:
+        strategy: concurrent
+        max_workers: 8
+    ```
+
+    In that case, a probe only waits for the dynamic entries, declared
+    before it, it refers to with a `${key}` placeholder or lists in its
+    `depends_on` sequence. It sees the static entries declared before it
+    and the values of the probes it waits for.
     """
     # we delay this so that the configuration module can be imported leanly
     # from elsewhere
     from chaoslib.activity import run_activity
 
-    conf = {}
-    secrets = secrets or {}
+    settings = settings if settings is not None else get_loaded_settings()
+    runtime = (settings or {}).get("runtime", {}).get("configuration", {})
+
+    secrets = readonly_secrets(secrets or {})
 
-    had_errors = False
     logger.debug("Loading dynamic configuration...")
-    for key, value in config.items():
-        if not (isinstance(value, dict) and value.get("type") == "probe"):
-            conf[key] = config.get(key, value)
-            continue
-
-        # we have a dynamic config
-        name = value.get("name")
-        provider_type = value["provider"]["type"]
-        value["provider"]["secrets"] = deepcopy(secrets)
-        try:
-            output = run_activity(value, conf, secrets)
-        except Exception:
-            had_errors = True
-            logger.debug(f"Failed to load configuration '{name}'", exc_info=True)
-            continue
-
-        if provider_type == "python":
-            conf[key] = output
-        elif provider_type == "process":
-            if output["status"] != 0:
-                had_errors = True
-                logger.debug(
-                    f"Failed to load configuration dynamically "
-                    f"from probe '{name}': {output['stderr']}"
-                )
+    if runtime.get("strategy") == "concurrent":
+        conf, had_errors = load_dynamic_configuration_concurrently(
+            config, secrets, run_activity, runtime.get("max_workers", 8)
+        )
+    else:
+        conf = {}
+        had_errors = False
+        for key, value in config.items():
+            if not is_dynamic_entry(value):
+                conf[key] = config.get(key, value)
+                continue
+
+            loaded, output = run_configuration_probe(value, conf, secrets, run_activity)
+            if loaded:
+                conf[key] = output
             else:
-                conf[key] = output.get("stdout", "").strip()
-        elif provider_type == "http":
-            conf[key] = output.get("body")
+                had_errors = True
 
     if had_errors:
         logger.warning(
@@ -195,3 +202,181 @@ def load_dynamic_configuration(
         )
 
     return conf
+
+
+###############################################################################
+# Internals
+###############################################################################
+def is_dynamic_entry(value: Any) -> bool:
+    return isinstance(value, dict) and value.get("type") == "probe"
+
+
+def readonly_secrets(secrets: Secrets) -> Mapping[str, Mapping[str, Any]]:
+    """
+    A read-only view of the secrets, shared by all the probes rather than
+    copied into each of them.
+    """
+    return MappingProxyType(
+        {
+            scope: MappingProxyType(values) if isinstance(values, dict) else values
+            for scope, values in secrets.items()
+        }
+    )
+
+
+def run_configuration_probe(
+    probe: Dict[str, Any],
+    conf: Configuration,
+    secrets: Mapping[str, Mapping[str, Any]],
+    run_activity: Callable,
+) -> Tuple[bool, Any]:
+    """
+    Run the probe of a dynamic configuration entry and return whether it
+    succeeded and the value it loaded.
+    """
+    name = probe.get("name")
+    provider_type = probe["provider"]["type"]
+
+    # the probe is given access to all the secrets scopes, without touching
+    # its declaration
+    probe = dict(probe)
+    probe["provider"] = dict(probe["provider"], secrets=list(secrets))
+    try:
+        output = run_activity(probe, conf, secrets)
+    except Exception:
+        logger.debug(f"Failed to load configuration '{name}'", exc_info=True)
+        return False, None
+
+    if provider_type == "python":
+        return True, output
+    elif provider_type == "process":
+        if output["status"] != 0:
+            logger.debug(
+                f"Failed to load configuration dynamically "
+                f"from probe '{name}': {output['stderr']}"
+            )
+            return False, None
+        return True, output.get("stdout", "").strip()
+    elif provider_type == "http":
+        return True, output.get("body")
+
+    return False, None
+
+
+def load_dynamic_configuration_concurrently(
+    config: Configuration,
+    secrets: Mapping[str, Mapping[str, Any]],
+    run_activity: Callable,
+    max_workers: int,
+) -> Tuple[Configuration, bool]:
+    """
+    Run the probes of the dynamic configuration entries concurrently, each
+    one as soon as the entries it depends on are loaded.
+    """
+    keys = list(config.keys())
+    dynamic = [k for k in keys if is_dynamic_entry(config[k])]
+    if not dynamic:
+        return dict(config), False
+
+    dependencies = {}
+    for index, key in enumerate(keys):
+        if key in dynamic:
+            earlier = {k for k in keys[:index] if k in dynamic}
+            dependencies[key] = referenced_keys(config[key]) & earlier
+
+    results = {}
+    finished = set()
+    had_errors = False
+    pending = list(dynamic)
+    running = {}
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(dynamic))),
+        thread_name_prefix="chaoslib-configuration",
+    ) as pool:
+        while pending or running:
+            for key in [k for k in pending if dependencies[k] <= finished]:
+                pending.remove(key)
+                conf = configuration_seen_by(key, keys, config, dependencies, results)
+                f = submit_in_context(
+                    pool,
+                    run_configuration_probe,
+                    config[key],
+                    conf,
+                    secrets,
+                    run_activity,
+                )
+                running[f] = key
+
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for f in done:
+                key = running.pop(f)
+                finished.add(key)
+                loaded, output = f.result()
+                if loaded:
+                    results[key] = output
+                else:
+                    had_errors = True
+
+    conf = {}
+    for key in keys:
+        if key in dynamic:
+            if key in results:
+                conf[key] = results[key]
+        else:
+            conf[key] = config[key]
+    return conf, had_errors
+
+
+def configuration_seen_by(
+    key: str,
+    keys: List[str],
+    config: Configuration,
+    dependencies: Dict[str, Set[str]],
+    results: Dict[str, Any],
+) -> Configuration:
+    """
+    The configuration a probe runs with: the static entries declared before
+    it and the values loaded by the probes it depends on, transitively.
+    """
+    required = set()
+    stack = list(dependencies[key])
+    while stack:
+        k = stack.pop()
+        if k not in required:
+            required.add(k)
+            stack.extend(dependencies[k])
+
+    conf = {}
+    for k in keys[: keys.index(key)]:
+        if k in dependencies:
+            if k in required and k in results:
+                conf[k] = results[k]
+        else:
+            conf[k] = config[k]
+    return conf
+
+
+def referenced_keys(data: Any) -> Set[str]:
+    """
+    Names of the `${key}` placeholders used anywhere in the probe, and those
+    listed in its `depends_on` sequence.
+    """
+    names = set()
+    if isinstance(data, dict):
+        names.update(data.get("depends_on") or [])
+        values = data.values()
+    elif isinstance(data, (list, tuple)):
+        values = data
+    elif isinstance(data, str):
+        if TypedTemplate.delimiter in data:
+            for match in TypedTemplate.pattern.finditer(data):
+                name = match.group("named") or match.group("braced")
+                if name:
+                    names.add(name)
+        return names
+    else:
+        return names
+
+    for value in values:
+        names.update(referenced_keys(value))
+    return names
@@ -0,0 +1,164 @@
+# State scoped to a single run of an experiment, so several runs can share
+# the same interpreter without stepping on each other
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from logzero import logger
+
+from chaoslib.types import Activity, Control, Experiment, Settings
+
+__all__ = ["RunContext", "active_run", "count_active_runs", "get_run_context"]
+
+
+class RunContext:
+    """
+    Holds what a run needs to keep around while it plays the experiment:
+
+    * the index of the activities by name, so they can be referenced
+    * the global controls, loaded from the settings then initialized
+    * the settings of the run
+    * the thread pools reused across the run, such as the one of the
+      hypothesis probes, shut down with :meth:`shutdown_pools`
+
+    All accesses are thread-safe since activities, probes and controls may
+    run from several threads at once.
+
+    A context is made current with :meth:`activate`, the functions looking
+    up activities, applying controls or reading the loaded settings then
+    rely on it unless they are given a context explicitly. Pools used by a
+    run propagate it to the functions they call, see
+    :func:`chaoslib.submit_in_context`.
+
+    When no context is active, the one of the process is used. It is shared
+    by every run not given its own context, as it always was.
+    """
+
+    def __init__(
+        self,
+        settings: Settings = None,
+        global_controls: List[Control] = None,
+        activities: Dict[str, Activity] = None,
+    ) -> None:
+        self.settings = settings
+        self.activities = activities if activities is not None else {}
+        self.global_controls = global_controls if global_controls is not None else []
+        self.pools: Dict[Tuple[str, int], ThreadPoolExecutor] = {}
+        self.lock = threading.RLock()
+
+    def index_activities(self, experiment: Experiment) -> None:
+        """
+        Index the method activities and the hypothesis probes by their name.
+        """
+        lot = experiment.get("method", []) + experiment.get(
+            "steady-state-hypothesis", {}
+        ).get("probes", [])
+
+        with self.lock:
+            for activity in lot:
+                name = activity.get("name")
+                if name:
+                    self.activities[name] = activity
+            logger.debug(f"Cached {len(self.activities)} activities")
+
+    def clear_activities(self) -> None:
+        with self.lock:
+            self.activities.clear()
+
+    def lookup_activity(self, ref: str) -> Optional[Activity]:
+        with self.lock:
+            return self.activities.get(ref)
+
+    def get_global_controls(self) -> List[Control]:
+        with self.lock:
+            return self.global_controls[:]
+
+    def set_global_controls(self, controls: List[Control]) -> None:
+        with self.lock:
+            self.global_controls[:] = controls
+
+    def reset_global_controls(self) -> None:
+        with self.lock:
+            self.global_controls.clear()
+
+    def get_pool(self, name: str, max_workers: int) -> ThreadPoolExecutor:
+        """
+        Lookup the pool of the given name and size or create it with
+        `max_workers` threads. The pool is kept for the rest of the run.
+        """
+        with self.lock:
+            pool = self.pools.get((name, max_workers))
+            if pool is None:
+                pool = self.pools[(name, max_workers)] = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix=f"chaoslib-{name}"
+                )
+            return pool
+
+    def shutdown_pools(self) -> None:
+        """
+        Shut the pools of the run down, without waiting for the calls still
+        running in them.
+        """
+        with self.lock:
+            pools = list(self.pools.values())
+            self.pools.clear()
+        for pool in pools:
+            pool.shutdown(wait=False)
+
+    @contextmanager
+    def activate(self) -> Iterator["RunContext"]:
+        """
+        Make this context the current one for the duration of the block.
+        """
+        token = _current_context.set(self)
+        try:
+            yield self
+        finally:
+            _current_context.reset(token)
+
+
+def get_run_context() -> RunContext:
+    """
+    The context currently active or the one of the process otherwise.
+    """
+    context = _current_context.get()
+    return _process_context if context is None else context
+
+
+@contextmanager
+def active_run() -> Iterator[None]:
+    """
+    Count a run as active for the duration of the block, whatever its
+    context, see :func:`count_active_runs`.
+    """
+    global _active_runs
+    with _active_runs_lock:
+        _active_runs += 1
+    try:
+        yield
+    finally:
+        with _active_runs_lock:
+            _active_runs -= 1
+
+
+def count_active_runs() -> int:
+    """
+    How many runs are playing in the process. Resources shared by all the
+    runs, such as the HTTP connection pools or the workers of isolated
+    Python activities, must only be released when there is none.
+    """
+    with _active_runs_lock:
+        return _active_runs
+
+
+###############################################################################
+# Internals
+###############################################################################
+_process_context = RunContext()
+_active_runs = 0
+_active_runs_lock = threading.Lock()
+_current_context: ContextVar[Optional[RunContext]] = ContextVar(
+    "run_context", default=None
+)
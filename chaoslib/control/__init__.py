@@ -1,26 +1,22 @@
 import os.path
 from contextlib import contextmanager
-from copy import copy, deepcopy
+from copy import copy
 from typing import TYPE_CHECKING, List, Optional, Union
 
 import yaml
 from logzero import logger
 
-try:
-    import simplejson as json
-    from simplejson.errors import JSONDecodeError
-except ImportError:
-    import json
-    from json.decoder import JSONDecodeError
-
+from chaoslib.context import RunContext, get_run_context
 from chaoslib.control.python import (
     apply_python_control,
     cleanup_control,
+    compile_control,
     import_control,
     initialize_control,
     validate_python_control,
 )
 from chaoslib.exceptions import InterruptExecution, InvalidControl
+from chaoslib.parsers import JSONDecodeError, parse_json, parse_yaml
 from chaoslib.settings import get_loaded_settings
 from chaoslib.types import Activity, Configuration
 from chaoslib.types import Control as ControlType
@@ -40,11 +36,6 @@ __all__ = [
     "load_global_controls",
 ]
 
-# Should this be protected in some fashion? chaoslib isn't meant to be used
-# concurrently so there is little promise we can support several instances
-# at once. When the day comes...
-global_controls = []
-
 
 def initialize_controls(
     experiment: Experiment,
@@ -56,7 +47,8 @@ def initialize_controls(
     Initialize all declared controls in the experiment.
 
     On Python controls, this means calling the `configure_control` function
-    of the exposed module.
+    of the exposed module and resolving, once, the functions the module
+    implements for each level.
 
     Controls are initialized once only when they are declared many
     times in the experiment with the same name.
@@ -88,6 +80,7 @@ def initialize_controls(
                     "It will not be registered.".format(control["name"]),
                     exc_info=True,
                 )
+            compile_control(control)
 
 
 def cleanup_controls(experiment: Experiment):
@@ -158,15 +151,20 @@ def initialize_global_controls(
     secrets: Secrets,
     settings: Settings,
     event_registry: "EventHandlerRegistry" = None,  # noqa: F821
+    run_context: RunContext = None,
 ):
     """
-    Load and initialize controls declared in the settings.
+    Load and initialize controls declared in the settings. Like for the
+    experiment's controls, the functions they implement are resolved once.
 
     Notice, if a control fails during its initialization, it is deregistered
     and will not be applied throughout the experiment.
+
+    The global controls are those of the current run context unless one is
+    given.
     """
-    controls = get_global_controls()[:]
-    for control in get_global_controls():
+    controls = get_global_controls(run_context)
+    for control in get_global_controls(run_context):
         name = control["name"]
         logger.debug(f"Initializing global control '{name}'")
 
@@ -181,6 +179,7 @@ def initialize_global_controls(
                     settings=settings,
                     event_registry=event_registry,
                 )
+                compile_control(control)
             except Exception:
                 logger.debug(
                     "Control initialization '{}' failed. "
@@ -188,10 +187,14 @@ def initialize_global_controls(
                     exc_info=True,
                 )
                 controls.remove(control)
-    set_global_controls(controls)
+    set_global_controls(controls, run_context)
 
 
-def load_global_controls(settings: Settings, control_files: Optional[List[str]] = None):
+def load_global_controls(
+    settings: Settings,
+    control_files: Optional[List[str]] = None,
+    run_context: RunContext = None,
+):
     """
     Import all controls declared in the settings and global to all experiments.
 
@@ -199,6 +202,8 @@ def load_global_controls(settings: Settings, control_files: Optional[List[str]]
     so the loaders controls have a chance to be applied. It does not perform
     any specific initialization yet, it only tries to load the controls
     declared in the settings.
+
+    They are loaded into the current run context unless one is given.
     """
     controls = []
     for name, control in settings.get("controls", {}).items():
@@ -224,7 +229,7 @@ def load_global_controls(settings: Settings, control_files: Optional[List[str]]
         _, ext = os.path.splitext(control_file)
         if ext in (".yaml", ".yml"):
             try:
-                ctrls = yaml.safe_load(content)
+                ctrls = parse_yaml(content)
             except yaml.YAMLError as y:
                 logger.error(
                     "Failed to parse control file '{}': {}".format(control_file, str(y))
@@ -232,7 +237,7 @@ def load_global_controls(settings: Settings, control_files: Optional[List[str]]
                 continue
         elif ext in (".json"):
             try:
-                ctrls = json.loads(content)
+                ctrls = parse_json(content)
             except JSONDecodeError as x:
                 logger.error(
                     "Failed to parse control file '{}': {}".format(control_file, str(x))
@@ -250,15 +255,16 @@ def load_global_controls(settings: Settings, control_files: Optional[List[str]]
 
         controls.append(control)
 
-    set_global_controls(controls)
+    set_global_controls(controls, run_context)
 
 
-def cleanup_global_controls():
+def cleanup_global_controls(run_context: RunContext = None):
     """
-    Unload and cleanup global controls
+    Unload and cleanup global controls, of the current run context unless
+    one is given.
     """
-    controls = get_global_controls()
-    reset_global_controls()
+    controls = get_global_controls(run_context)
+    reset_global_controls(run_context)
 
     for control in controls:
         name = control["name"]
@@ -274,14 +280,18 @@ def cleanup_global_controls():
                 )
 
 
-def get_global_controls() -> List[ControlType]:
+def get_global_controls(run_context: RunContext = None) -> List[ControlType]:
     """
-    All the controls loaded from the settings.
+    All the controls loaded from the settings, in the current run context
+    unless one is given.
     """
-    return global_controls[:]
+    return (run_context or get_run_context()).get_global_controls()
 
 
 class Control:
+    def __init__(self, run_context: RunContext = None):
+        self.run_context = run_context
+
     def begin(
         self,
         level: str,
@@ -298,6 +308,7 @@ class Control:
             scope="before",
             configuration=configuration,
             secrets=secrets,
+            run_context=self.run_context,
         )
 
     def with_state(self, state):
@@ -320,6 +331,7 @@ class Control:
             state=state,
             configuration=configuration,
             secrets=secrets,
+            run_context=self.run_context,
         )
         self.state = None
 
@@ -331,12 +343,13 @@ def controls(
     context: Union[Activity, Hypothesis, Experiment, str] = None,
     configuration: Configuration = None,
     secrets: Secrets = None,
+    run_context: RunContext = None,
 ):
     """
     Context manager for a block that needs to be wrapped by controls.
     """
     try:
-        c = Control()
+        c = Control(run_context)
         c.begin(level, experiment, context, configuration, secrets)
         yield c
     finally:
@@ -364,25 +377,25 @@ def get_controls(experiment: Experiment) -> List[Control]:
     return controls
 
 
-def set_global_controls(controls: List[ControlType]):
+def set_global_controls(controls: List[ControlType], run_context: RunContext = None):
     """
     Set the controls loaded from the settings.
     """
-    global_controls.clear()
-    global_controls.extend(controls)
+    (run_context or get_run_context()).set_global_controls(controls)
 
 
-def reset_global_controls():
+def reset_global_controls(run_context: RunContext = None):
     """
     Invalidate all loaded global controls.
     """
-    global_controls.clear()
+    (run_context or get_run_context()).reset_global_controls()
 
 
 def get_context_controls(
     level: str,
     experiment: Experiment = None,  # noqa: C901
     context: Union[Activity, Experiment] = None,
+    run_context: RunContext = None,
 ) -> List[Control]:
     """
     Get the controls at the given level by merging those declared at the
@@ -390,8 +403,10 @@ def get_context_controls(
 
     If a control is declared at the current level, do override it with an
     top-level ine.
+
+    The declarations are not copied and must be treated as read-only.
     """
-    glbl_controls = get_global_controls()
+    glbl_controls = get_global_controls(run_context)
     if not experiment:
         return glbl_controls
 
@@ -405,23 +420,23 @@ def get_context_controls(
         return controls
 
     if not controls:
-        return [deepcopy(c) for c in top_level_controls if c.get("automatic", True)]
+        return [c for c in top_level_controls if c.get("automatic", True)]
 
     if level in ["method", "rollback"]:
-        return [deepcopy(c) for c in top_level_controls if c.get("automatic", True)]
+        return [c for c in top_level_controls if c.get("automatic", True)]
 
     for c in controls[:]:
         if "ref" in c:
             for top_level_control in top_level_controls:
                 if c["ref"] == top_level_control["name"]:
-                    controls.append(deepcopy(top_level_control))
+                    controls.append(top_level_control)
                     break
         else:
             for tc in reversed(top_level_controls):
                 if c.get("name") == tc.get("name"):
                     continue
                 if (level != "experiment") and tc.get("automatic", True):
-                    controls.insert(0, deepcopy(tc))
+                    controls.insert(0, tc)
 
     return controls
 
@@ -434,6 +449,7 @@ def apply_controls(
     state: Union[Journal, Run, List[Run]] = None,
     configuration: Configuration = None,
     secrets: Secrets = None,
+    run_context: RunContext = None,
 ):
     """
     Apply the controls at given level
@@ -443,9 +459,15 @@ def apply_controls(
     experiment except at the `"activity"` when it must be an activity. The
     `scope` is one of `"before", "after"` and the `state` is only set on
     `"after"` scope.
+
+    The global controls and the settings are those of the current run
+    context unless one is given.
     """
-    settings = get_loaded_settings() or None
-    controls = get_context_controls(level, experiment, context)
+    settings = None
+    if run_context is not None:
+        settings = run_context.settings
+    settings = (settings if settings is not None else get_loaded_settings()) or None
+    controls = get_context_controls(level, experiment, context, run_context)
     if not controls:
         logger.debug(f"No controls to apply on '{level}'")
         return
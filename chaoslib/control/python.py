@@ -1,7 +1,10 @@
 import importlib
 import inspect
+import sys
+import threading
 from copy import deepcopy
-from typing import Any, Callable, List, Optional, Union
+from types import ModuleType
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Union
 
 from logzero import logger
 
@@ -21,6 +24,7 @@ from chaoslib.types import (
 __all__ = [
     "apply_python_control",
     "cleanup_control",
+    "compile_control",
     "initialize_control",
     "validate_python_control",
     "import_control",
@@ -97,6 +101,9 @@ def cleanup_control(control: Control):
     """
     Cleanup a control by calling its `cleanup_control` function.
     """
+    with _dispatch_table_lock:
+        _dispatch_table.pop(control["provider"]["module"], None)
+
     func = load_func(control, "cleanup_control")
     if not func:
         return
@@ -146,37 +153,58 @@ def apply_python_control(
     Apply a control by calling a function matching the given level.
     """
     provider = control["provider"]
-    func_name = _level_mapping.get(level)
-    func = load_func(control, func_name)
-    if not func:
+    handler = get_control_handler(control, level)
+    if not handler:
         return
 
-    arguments = deepcopy(provider.get("arguments", {}))
+    arguments = copy_arguments(provider.get("arguments", {}))
 
     if configuration or secrets:
         arguments = substitute(arguments, configuration, secrets)
 
-    sig = inspect.signature(func)
+    parameters = handler.parameters
 
-    if "secrets" in sig.parameters:
+    if "secrets" in parameters:
         arguments["secrets"] = secrets
 
-    if "configuration" in sig.parameters:
+    if "configuration" in parameters:
         arguments["configuration"] = configuration
 
-    if "state" in sig.parameters:
+    if "state" in parameters:
         arguments["state"] = state
 
-    if "experiment" in sig.parameters:
+    if "experiment" in parameters:
         arguments["experiment"] = experiment
 
-    if "extensions" in sig.parameters:
+    if "extensions" in parameters:
         arguments["extensions"] = experiment.get("extensions")
 
-    if "settings" in sig.parameters:
+    if "settings" in parameters:
         arguments["settings"] = settings
 
-    func(context=context, **arguments)
+    handler.func(context=context, **arguments)
+
+
+def compile_control(control: Control):
+    """
+    Resolve, once, the functions the control's module implements for every
+    level along with the parameters they expect, so applying the control
+    does not import nor inspect anything anymore.
+
+    This is called when controls are initialized.
+    """
+    mod = import_control(control)
+    if not mod:
+        return
+
+    handlers = {}
+    for level, func_name in _level_mapping.items():
+        handlers[level] = make_control_handler(getattr(mod, func_name, None))
+
+    with _dispatch_table_lock:
+        _dispatch_table[control["provider"]["module"]] = CompiledControl(
+            module=mod, handlers=handlers
+        )
 
 
 ###############################################################################
@@ -198,3 +226,60 @@ def load_func(control: Control, func_name: str) -> Callable:
         pass
 
     return func
+
+
+class ControlHandler(NamedTuple):
+    func: Callable
+    parameters: FrozenSet[str]
+
+
+class CompiledControl(NamedTuple):
+    module: ModuleType
+    handlers: Dict[str, Optional[ControlHandler]]
+
+
+# control module path -> handler of each level, or `None` when the module
+# does not implement that level
+_dispatch_table: Dict[str, CompiledControl] = {}
+_dispatch_table_lock = threading.Lock()
+
+
+def make_control_handler(func: Optional[Callable]) -> Optional[ControlHandler]:
+    if not func:
+        return None
+    return ControlHandler(
+        func=func, parameters=frozenset(inspect.signature(func).parameters)
+    )
+
+
+def get_control_handler(control: Control, level: str) -> Optional[ControlHandler]:
+    """
+    Lookup the handler of the control at the given level from the dispatch
+    table. Controls which were not compiled, such as those applied when
+    loading the experiment, are resolved on the fly.
+
+    The handler is resolved again when the function exposed by the module
+    is not the one it holds anymore, for instance after it was patched.
+    """
+    func_name = _level_mapping.get(level)
+    mod_path = control["provider"]["module"]
+    compiled = _dispatch_table.get(mod_path)
+    if compiled is None or sys.modules.get(mod_path) is not compiled.module:
+        return make_control_handler(load_func(control, func_name))
+
+    handler = compiled.handlers.get(level)
+    func = getattr(compiled.module, func_name, None) if func_name else None
+    if func is (handler.func if handler else None):
+        return handler
+    return make_control_handler(func)
+
+
+def copy_arguments(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy the control's arguments so they can be changed safely. Only nested
+    values need a deep copy.
+    """
+    for value in arguments.values():
+        if isinstance(value, (dict, list)):
+            return deepcopy(arguments)
+    return dict(arguments)
@@ -1,8 +1,10 @@
 __all__ = [
     "ChaosException",
     "InvalidExperiment",
+    "ExperimentValidationErrors",
     "InvalidActivity",
     "ActivityFailed",
+    "ActivityCancelled",
     "DiscoveryFailed",
     "InvalidSource",
     "InterruptExecution",
@@ -23,10 +25,36 @@ class InvalidExperiment(ChaosException):
     pass
 
 
+class ExperimentValidationErrors(InvalidExperiment):
+    """
+    Raised when validating the experiment found several errors at once.
+
+    `errors` holds pairs of the location of the faulty element, such as
+    `"method[2]"`, and the exception it raised, in the order they are
+    declared in the experiment.
+    """
+
+    def __init__(self, errors: list) -> None:
+        self.errors = errors
+        lines = [f"{len(errors)} errors found in the experiment:"]
+        for location, error in errors:
+            lines.append(f"  - {location}: {error}")
+        InvalidExperiment.__init__(self, "\n".join(lines))
+
+
 class ActivityFailed(ChaosException):
     pass
 
 
+class ActivityCancelled(ActivityFailed):
+    """
+    Raised when the activity stopped because its run was cancelled, see
+    :class:`chaoslib.cancellation.CancellationToken`.
+    """
+
+    pass
+
+
 # please use ActivityFailed rather than the old name for this exception
 FailedActivity = ActivityFailed
 
@@ -53,13 +81,9 @@ class InvalidControl(ChaosException):
 
 class ExperimentExitedException(ChaosException):
     """
-    Only raised when the process received a SIGUSR2 signal.
-
-    Raised into the blocking background activities of the method only.
-
-    If you catch it, this mean you can clean your activity but you should
-    really raise another exception again to let the Chaos Toolkit
-    quickly terminate.
+    Not raised into the background activities of the method anymore when the
+    process receives a SIGUSR2 signal, they are cancelled instead, see
+    :class:`chaoslib.cancellation.CancellationToken`.
     """
 
     pass
@@ -40,18 +40,26 @@ This will start your probe in the background.
 
 WARNING: Only available on Unix/Linux systems.
 """
+import asyncio
 import inspect
 import os
 import platform
 import signal
+import threading
 from contextlib import contextmanager
 from types import FrameType
+from typing import Any, Awaitable, Callable
 
 from logzero import logger
 
 from chaoslib.exceptions import InterruptExecution
 
-__all__ = ["exit_gracefully", "exit_ungracefully", "exit_signals"]
+__all__ = [
+    "exit_gracefully",
+    "exit_ungracefully",
+    "exit_signals",
+    "wait_with_exit_signals",
+]
 
 
 @contextmanager
@@ -70,7 +78,15 @@ def exit_signals():
     the Python VM has no other mechanism to interrupt blocking calls.
 
     WARNING: SIGUSR1 and SIGUSR2 are only available on Unix/Linux systems.
+
+    Signals can only be handled from the main thread, elsewhere, such as
+    when experiments are run in a batch, this does nothing.
     """
+    if threading.current_thread() is not threading.main_thread():
+        logger.debug("Exit signals are only handled from the main thread")
+        yield
+        return
+
     sigterm_handler = signal.signal(signal.SIGTERM, _terminate_now)
 
     if hasattr(signal, "SIGUSR1") and hasattr(signal, "SIGUSR2"):
@@ -93,6 +109,58 @@ def exit_signals():
             signal.signal(signal.SIGTERM, sigterm_handler)
 
 
+async def wait_with_exit_signals(
+    aw: Awaitable, on_signal: Callable[[int], None] = None
+) -> Any:
+    """
+    Await `aw` while handling the SIGTERM, SIGUSR1 and SIGUSR2 signals on
+    the running event loop. This is the event loop counterpart of
+    :func:`exit_signals`.
+
+    Python signal handlers cannot safely raise from within an event loop.
+    Instead, when one of these signals is received, `on_signal` is called
+    with the signal number, the awaited task is cancelled and the exception
+    :func:`exit_signals` would have raised is raised from here.
+
+    The handlers are only installed when the loop runs in the main thread of
+    a Unix/Linux system.
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.ensure_future(aw)
+    received = []
+
+    def _on_signal(signum: int) -> None:
+        if not received:
+            received.append(signum)
+            if on_signal:
+                on_signal(signum)
+            task.cancel()
+
+    installed = []
+    for name in ("SIGTERM", "SIGUSR1", "SIGUSR2"):
+        signum = getattr(signal, name, None)
+        if signum is None:
+            continue
+        try:
+            loop.add_signal_handler(signum, _on_signal, signum)
+            installed.append(signum)
+        except (NotImplementedError, RuntimeError, ValueError):
+            logger.debug(f"Cannot handle {name} from the event loop")
+
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if not received:
+            raise
+        signum = received[0]
+        if signum == signal.SIGTERM:
+            _terminate_now(signum)
+        _leave_now(signum)
+    finally:
+        for signum in installed:
+            loop.remove_signal_handler(signum)
+
+
 def exit_gracefully():
     """
     Sends a user signal to the chaostoolkit process which should terminate
@@ -121,6 +189,9 @@ def exit_ungracefully():
     This means the rollbacks will not be executed, although controls
     will be correctly terminated.
 
+    The background activities still running are cancelled, see
+    :class:`chaoslib.cancellation.CancellationToken`.
+
     WARNING: Only available on Unix/Linux systems.
     """
     if not hasattr(signal, "SIGUSR2"):
@@ -1,9 +1,10 @@
 from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from logzero import logger
 
-from chaoslib.activity import ensure_activity_is_valid
+from chaoslib import submit_in_context
+from chaoslib.activity import build_activity_graph, ensure_activity_is_valid
 from chaoslib.caching import lookup_activity, with_cache
 from chaoslib.configuration import load_configuration
 from chaoslib.control import validate_controls
@@ -11,16 +12,26 @@ from chaoslib.deprecation import (
     warn_about_deprecated_features,
     warn_about_moved_function,
 )
-from chaoslib.exceptions import InvalidActivity, InvalidExperiment
+from chaoslib.exceptions import (
+    ChaosException,
+    ExperimentValidationErrors,
+    InvalidActivity,
+    InvalidExperiment,
+)
 from chaoslib.extension import validate_extensions
-from chaoslib.hypothesis import ensure_hypothesis_is_valid
+from chaoslib.hypothesis import (
+    ensure_hypothesis_is_valid,
+    ensure_hypothesis_probe_is_valid,
+)
 from chaoslib.loader import load_experiment
 from chaoslib.run import RunEventHandler, Runner
 from chaoslib.run import apply_activities as apply_act
 from chaoslib.run import apply_rollbacks as apply_roll
 from chaoslib.run import initialize_run_journal as init_journal
 from chaoslib.secret import load_secrets
+from chaoslib.settings import get_loaded_settings
 from chaoslib.types import (
+    Activity,
     Configuration,
     Dry,
     Experiment,
@@ -36,7 +47,7 @@ __all__ = ["ensure_experiment_is_valid", "load_experiment"]
 
 
 @with_cache
-def ensure_experiment_is_valid(experiment: Experiment):
+def ensure_experiment_is_valid(experiment: Experiment, settings: Settings = None):
     """
     A chaos experiment consists of a method made of activities to carry
     sequentially.
@@ -54,6 +65,21 @@ def ensure_experiment_is_valid(experiment: Experiment):
 
     This function raises :exc:`InvalidExperiment`, :exc:`InvalidProbe` or
     :exc:`InvalidAction` depending on where it fails.
+
+    Activities are validated one after the other, up to the first invalid
+    one, unless the settings tell to validate them concurrently:
+
+    ```yaml
+    runtime:
+      validation:
+        strategy: concurrent
+        max_workers: 8
+    ```
+
+    In that case, all the hypothesis probes, method activities and
+    rollbacks are validated on a pool and their errors are collected. A
+    single error is raised as-is, several are reported together, in their
+    declaration order, by :exc:`ExperimentValidationErrors`.
     """
     logger.info("Validating the experiment's syntax")
 
@@ -76,31 +102,27 @@ def ensure_experiment_is_valid(experiment: Experiment):
     config = load_configuration(experiment.get("configuration", {}))
     load_secrets(experiment.get("secrets", {}), config)
 
-    ensure_hypothesis_is_valid(experiment)
-
-    method = experiment.get("method")
-    if method is None:
-        # we force the method key to be indicated, to make it clear
-        # that the SSH will still be executed before & after the method block
-        raise InvalidExperiment(
-            "an experiment requires a method, "
-            "which can be empty for only checking steady state hypothesis "
+    settings = settings if settings is not None else get_loaded_settings()
+    runtime = (settings or {}).get("runtime", {}).get("validation", {})
+    if runtime.get("strategy") == "concurrent":
+        ensure_activities_are_valid_concurrently(
+            experiment, runtime.get("max_workers", 8)
         )
+    else:
+        ensure_hypothesis_is_valid(experiment)
 
-    for activity in method:
-        ensure_activity_is_valid(activity)
+        method = experiment.get("method")
+        ensure_method_is_declared(method)
 
-        # let's see if a ref is indeed found in the experiment
-        ref = activity.get("ref")
-        if ref and not lookup_activity(ref):
-            raise InvalidActivity(
-                "referenced activity '{r}' could not be "
-                "found in the experiment".format(r=ref)
-            )
+        for activity in method:
+            ensure_method_activity_is_valid(activity)
+
+        # make sure declared dependencies between activities can be honoured
+        build_activity_graph(method)
 
-    rollbacks = experiment.get("rollbacks", [])
-    for activity in rollbacks:
-        ensure_activity_is_valid(activity)
+        rollbacks = experiment.get("rollbacks", [])
+        for activity in rollbacks:
+            ensure_activity_is_valid(activity)
 
     warn_about_deprecated_features(experiment)
 
@@ -178,3 +200,128 @@ def apply_rollbacks(
         "The 'apply_rollbacks' function has now moved to the " "'chaoslib.run' package"
     )
     return apply_roll(experiment, configuration, secrets, pool, dry)
+
+
+###############################################################################
+# Internals
+###############################################################################
+ValidationCheck = Tuple[str, Callable[[Activity], None], Activity]
+
+
+def ensure_method_is_declared(method: Optional[List[Activity]]):
+    if method is None:
+        # we force the method key to be indicated, to make it clear
+        # that the SSH will still be executed before & after the method block
+        raise InvalidExperiment(
+            "an experiment requires a method, "
+            "which can be empty for only checking steady state hypothesis "
+        )
+
+
+def ensure_method_activity_is_valid(activity: Activity):
+    ensure_activity_is_valid(activity)
+
+    # let's see if a ref is indeed found in the experiment
+    ref = activity.get("ref")
+    if ref and not lookup_activity(ref):
+        raise InvalidActivity(
+            "referenced activity '{r}' could not be "
+            "found in the experiment".format(r=ref)
+        )
+
+
+def ensure_activities_are_valid_concurrently(
+    experiment: Experiment, max_workers: int = None
+):
+    """
+    Validate all the activities of the experiment on a pool and raise their
+    errors together, in their declaration order.
+    """
+    hypo = experiment.get("steady-state-hypothesis")
+    if hypo is not None and not hypo.get("title"):
+        raise InvalidExperiment("hypothesis requires a title")
+
+    method = experiment.get("method")
+    ensure_method_is_declared(method)
+
+    checks = list_validation_checks(experiment)
+    logger.debug(
+        "Validating {} activities on a pool of {} workers".format(
+            len(checks), max_workers or "default"
+        )
+    )
+
+    errors = []
+    if checks:
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="chaoslib-validation"
+        ) as pool:
+            # refs are looked up in the activity cache of the current run
+            futures = [
+                submit_in_context(pool, run_validation_check, check) for check in checks
+            ]
+            outcomes = [f.result() for f in futures]
+        for (location, _, _), error in zip(checks, outcomes):
+            if error is not None:
+                errors.append((location, error))
+
+    # the graph relies on the method being otherwise valid
+    if not any(location.startswith("method[") for location, _ in errors):
+        try:
+            build_activity_graph(method)
+        except ChaosException as x:
+            errors.append(("method", x))
+
+    if len(errors) == 1:
+        raise errors[0][1]
+    elif errors:
+        raise ExperimentValidationErrors(errors)
+
+
+def list_validation_checks(experiment: Experiment) -> List[ValidationCheck]:
+    checks = []
+    hypo = experiment.get("steady-state-hypothesis") or {}
+    for index, probe in enumerate(hypo.get("probes") or []):
+        checks.append(
+            (
+                validation_location("steady-state-hypothesis.probes", index, probe),
+                ensure_hypothesis_probe_is_valid,
+                probe,
+            )
+        )
+
+    for index, activity in enumerate(experiment.get("method") or []):
+        checks.append(
+            (
+                validation_location("method", index, activity),
+                ensure_method_activity_is_valid,
+                activity,
+            )
+        )
+
+    for index, activity in enumerate(experiment.get("rollbacks") or []):
+        checks.append(
+            (
+                validation_location("rollbacks", index, activity),
+                ensure_activity_is_valid,
+                activity,
+            )
+        )
+    return checks
+
+
+def validation_location(section: str, index: int, activity: Activity) -> str:
+    location = f"{section}[{index}]"
+    name = activity.get("name") if isinstance(activity, dict) else None
+    if name:
+        location = f"{location} '{name}'"
+    return location
+
+
+def run_validation_check(check: ValidationCheck) -> Optional[ChaosException]:
+    _, validate, activity = check
+    try:
+        validate(activity)
+    except ChaosException as x:
+        return x
+    return None
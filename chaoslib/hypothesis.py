@@ -1,9 +1,15 @@
+import asyncio
 import json
+import math
 import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from decimal import Decimal, InvalidOperation
 from functools import singledispatch
 from numbers import Number
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 
 try:
     from jsonpath2.path import Path as JSONPath
@@ -14,16 +20,42 @@ except ImportError:
 
 from logzero import logger
 
-from chaoslib import substitute
-from chaoslib.activity import ensure_activity_is_valid, execute_activity, run_activity
+from chaoslib import run_in_executor_in_context, submit_in_context, substitute
+from chaoslib.activity import (
+    ensure_activity_is_valid,
+    execute_activity,
+    execute_activity_async,
+    run_activity,
+)
+from chaoslib.cancellation import get_cancellation_token
+from chaoslib.context import get_run_context
 from chaoslib.control import controls
 from chaoslib.exceptions import ActivityFailed, InvalidActivity, InvalidExperiment
-from chaoslib.types import Configuration, Dry, Experiment, Secrets, Tolerance
+from chaoslib.provider.process import read_spilled_output, search_spilled_output
+from chaoslib.settings import get_loaded_settings
+from chaoslib.types import (
+    Activity,
+    Configuration,
+    Dry,
+    Experiment,
+    Overrun,
+    Run,
+    Secrets,
+    Settings,
+    Tolerance,
+)
 
 if TYPE_CHECKING:
     from chaoslib.run import EventHandlerRegistry
 
-__all__ = ["ensure_hypothesis_is_valid", "run_steady_state_hypothesis"]
+__all__ = [
+    "ContinuousHypothesisRetention",
+    "FixedRateClock",
+    "ensure_hypothesis_is_valid",
+    "ensure_hypothesis_probe_is_valid",
+    "run_steady_state_hypothesis",
+    "run_steady_state_hypothesis_async",
+]
 
 
 def ensure_hypothesis_is_valid(experiment: Experiment):
@@ -41,12 +73,20 @@ def ensure_hypothesis_is_valid(experiment: Experiment):
     probes = hypo.get("probes")
     if probes:
         for probe in probes:
-            ensure_activity_is_valid(probe)
+            ensure_hypothesis_probe_is_valid(probe)
 
-            if "tolerance" not in probe:
-                raise InvalidActivity("hypothesis probe must have a tolerance entry")
 
-            ensure_hypothesis_tolerance_is_valid(probe["tolerance"])
+def ensure_hypothesis_probe_is_valid(probe: Activity):
+    """
+    Validates a probe of the steady state hypothesis, and its tolerance, or
+    raises :exc:`InvalidActivity`.
+    """
+    ensure_activity_is_valid(probe)
+
+    if "tolerance" not in probe:
+        raise InvalidActivity("hypothesis probe must have a tolerance entry")
+
+    ensure_hypothesis_tolerance_is_valid(probe["tolerance"])
 
 
 def ensure_hypothesis_tolerance_is_valid(tolerance: Tolerance):
@@ -172,11 +212,20 @@ def run_steady_state_hypothesis(
     secrets: Secrets,
     dry: Dry,
     event_registry: "EventHandlerRegistry",
+    settings: Settings = None,
 ) -> Dict[str, Any]:
     """
     Run all probes in the hypothesis and fail the experiment as soon as any of
     the probe fails or is outside the tolerance zone.
+
+    Probes run one after the other unless the `runtime.hypothesis.strategy`
+    setting is `"concurrent"`. In that case, they are run on a pool bounded
+    by `runtime.hypothesis.max_workers` and their tolerance is validated as
+    soon as they complete. Once a probe is outside its tolerance, the probes
+    not yet started are cancelled. Probes are always recorded in the state
+    in their declaration order.
     """
+    settings = settings if settings is not None else get_loaded_settings()
     state = {"steady_state_met": None, "probes": []}
     hypo = experiment.get("steady-state-hypothesis")
     if not hypo:
@@ -195,42 +244,111 @@ def run_steady_state_hypothesis(
         probes = hypo.get("probes", [])
         control.with_state(state)
 
-        for activity in probes:
-            run = execute_activity(
-                experiment=experiment,
-                activity=activity,
-                configuration=configuration,
-                secrets=secrets,
-                dry=dry,
-                event_registry=event_registry,
+        if get_hypothesis_strategy(settings) == "concurrent":
+            met, runs = run_probes_concurrently(
+                experiment,
+                probes,
+                configuration,
+                secrets,
+                dry,
+                event_registry,
+                max_workers=get_hypothesis_max_workers(settings),
             )
-
-            state["probes"].append(run)
-
-            if run["status"] == "failed":
-                run["tolerance_met"] = False
+            state["probes"].extend(runs)
+            if not met:
                 state["steady_state_met"] = False
-                logger.warning(
-                    "Probe terminated unexpectedly, "
-                    "so its tolerance could not be validated"
-                )
                 return state
+        else:
+            for activity in probes:
+                run = execute_activity(
+                    experiment=experiment,
+                    activity=activity,
+                    configuration=configuration,
+                    secrets=secrets,
+                    dry=dry,
+                    event_registry=event_registry,
+                )
 
-            run["tolerance_met"] = True
+                state["probes"].append(run)
 
-            if dry in (Dry.PROBES, Dry.ACTIVITIES):
-                # do not check for tolerance when dry mode is on
-                continue
+                if not probe_run_met_tolerance(
+                    activity, run, configuration, secrets, dry
+                ):
+                    state["steady_state_met"] = False
+                    return state
+
+        state["steady_state_met"] = True
+        logger.info("Steady state hypothesis is met!")
+
+    return state
+
+
+async def run_steady_state_hypothesis_async(
+    experiment: Experiment,
+    configuration: Configuration,
+    secrets: Secrets,
+    dry: Dry,
+    event_registry: "EventHandlerRegistry",
+    settings: Settings = None,
+) -> Dict[str, Any]:
+    """
+    Counterpart of :func:`run_steady_state_hypothesis` to be awaited from an
+    event loop.
+
+    In the `"concurrent"` strategy, probes are tasks and those still running
+    are cancelled once a probe is outside its tolerance.
+    """
+    settings = settings if settings is not None else get_loaded_settings()
+    state = {"steady_state_met": None, "probes": []}
+    hypo = experiment.get("steady-state-hypothesis")
+    if not hypo:
+        logger.debug("No hypothesis declared.")
+        return
+
+    logger.info("Steady state hypothesis: {h}".format(h=hypo.get("title")))
+
+    with controls(
+        level="hypothesis",
+        experiment=experiment,
+        context=hypo,
+        configuration=configuration,
+        secrets=secrets,
+    ) as control:
+        probes = hypo.get("probes", [])
+        control.with_state(state)
 
-            tolerance = activity.get("tolerance")
-            logger.debug(f"allowed tolerance is {str(tolerance)}")
-            checked = within_tolerance(
-                tolerance, run["output"], configuration=configuration, secrets=secrets
+        if get_hypothesis_strategy(settings) == "concurrent":
+            met, runs = await run_probes_concurrently_async(
+                experiment,
+                probes,
+                configuration,
+                secrets,
+                dry,
+                event_registry,
+                max_workers=get_hypothesis_max_workers(settings),
             )
-            if not checked:
-                run["tolerance_met"] = False
+            state["probes"].extend(runs)
+            if not met:
                 state["steady_state_met"] = False
                 return state
+        else:
+            for activity in probes:
+                run = await execute_activity_async(
+                    experiment=experiment,
+                    activity=activity,
+                    configuration=configuration,
+                    secrets=secrets,
+                    dry=dry,
+                    event_registry=event_registry,
+                )
+
+                state["probes"].append(run)
+
+                if not await probe_run_met_tolerance_async(
+                    activity, run, configuration, secrets, dry
+                ):
+                    state["steady_state_met"] = False
+                    return state
 
         state["steady_state_met"] = True
         logger.info("Steady state hypothesis is met!")
@@ -238,6 +356,503 @@ def run_steady_state_hypothesis(
     return state
 
 
+def get_hypothesis_strategy(settings: Settings = None) -> str:
+    """
+    How the hypothesis probes should be run, as set in the settings under
+    `runtime.hypothesis.strategy`. Either `"sequential"`, the default, or
+    `"concurrent"`.
+    """
+    return (
+        (settings or {})
+        .get("runtime", {})
+        .get("hypothesis", {})
+        .get("strategy", "sequential")
+    )
+
+
+def get_hypothesis_max_workers(settings: Settings = None) -> Optional[int]:
+    """
+    How many hypothesis probes may run at the same time in the `"concurrent"`
+    strategy, as set in the settings under `runtime.hypothesis.max_workers`.
+    When not set, all probes may run at once.
+    """
+    return (settings or {}).get("runtime", {}).get("hypothesis", {}).get("max_workers")
+
+
+def run_probes_concurrently(
+    experiment: Experiment,
+    probes: List[Activity],
+    configuration: Configuration,
+    secrets: Secrets,
+    dry: Dry,
+    event_registry: "EventHandlerRegistry",
+    max_workers: int = None,
+) -> Tuple[bool, List[Run]]:
+    """
+    Run the probes on a pool and validate their tolerance as they complete.
+
+    Returns whether all probes were within their tolerance and the runs that
+    were validated, in their declaration order. As soon as a probe is not
+    within its tolerance, the probes not yet started are cancelled and those
+    already running are given a cancelled token, see
+    :class:`chaoslib.cancellation.CancellationToken`. Their run is discarded
+    and no events are sent for it once this function returned.
+
+    The pool is the one of the run, reused by every evaluation of the
+    hypothesis.
+    """
+    if not probes:
+        return True, []
+
+    runs = [None] * len(probes)
+    met = True
+    futures = {}
+    event_registry = AbandonableEventRegistry(event_registry)
+    pool = get_run_context().get_pool("hypothesis", max_workers or len(probes))
+    with get_cancellation_token().child() as cancel, cancel.activate():
+        try:
+            futures = submit_probes(
+                pool,
+                experiment,
+                probes,
+                configuration,
+                secrets,
+                dry,
+                event_registry,
+            )
+
+            for future in as_completed(futures):
+                index = futures[future]
+                run = runs[index] = future.result()
+                if not probe_run_met_tolerance(
+                    probes[index], run, configuration, secrets, dry
+                ):
+                    met = False
+                    break
+        finally:
+            for future in futures:
+                if future.cancel():
+                    probe = probes[futures[future]]
+                    logger.debug(
+                        "Cancelled probe '{}'".format(
+                            probe.get("name", probe.get("ref"))
+                        )
+                    )
+            event_registry.abandon()
+            if not all(future.done() for future in futures):
+                cancel.cancel("another probe is not within its tolerance")
+
+    return met, [run for run in runs if run is not None]
+
+
+def submit_probes(
+    pool: ThreadPoolExecutor,
+    experiment: Experiment,
+    probes: List[Activity],
+    configuration: Configuration,
+    secrets: Secrets,
+    dry: Dry,
+    event_registry: "AbandonableEventRegistry",
+) -> Dict[Future, int]:
+    """
+    Submit the probes to the pool, mapping their future to their index.
+    """
+    return {
+        submit_in_context(
+            pool,
+            execute_activity,
+            experiment=experiment,
+            activity=activity,
+            configuration=configuration,
+            secrets=secrets,
+            dry=dry,
+            event_registry=event_registry,
+        ): index
+        for index, activity in enumerate(probes)
+    }
+
+
+class AbandonableEventRegistry:
+    """
+    Forwards the activity events of the probes to the registry until they
+    are abandoned, the probes still running then complete silently.
+    """
+
+    def __init__(self, registry: Optional["EventHandlerRegistry"]) -> None:
+        self.registry = registry
+        self.abandoned = False
+        self.lock = threading.Lock()
+
+    def abandon(self) -> None:
+        with self.lock:
+            self.abandoned = True
+
+    def start_activity(self, activity: Activity) -> None:
+        with self.lock:
+            if self.registry and not self.abandoned:
+                self.registry.start_activity(activity)
+
+    def activity_completed(self, activity: Activity, run: Run) -> None:
+        with self.lock:
+            if self.registry and not self.abandoned:
+                self.registry.activity_completed(activity, run)
+
+
+async def run_probes_concurrently_async(
+    experiment: Experiment,
+    probes: List[Activity],
+    configuration: Configuration,
+    secrets: Secrets,
+    dry: Dry,
+    event_registry: "EventHandlerRegistry",
+    max_workers: int = None,
+) -> Tuple[bool, List[Run]]:
+    """
+    Counterpart of :func:`run_probes_concurrently` where probes are tasks on
+    the event loop. Once a probe is not within its tolerance, all the probes
+    still pending or running are cancelled.
+    """
+    if not probes:
+        return True, []
+
+    runs = [None] * len(probes)
+    met = True
+    semaphore = asyncio.Semaphore(max_workers or len(probes))
+
+    async def run_probe(activity: Activity) -> Run:
+        async with semaphore:
+            return await execute_activity_async(
+                experiment=experiment,
+                activity=activity,
+                configuration=configuration,
+                secrets=secrets,
+                dry=dry,
+                event_registry=event_registry,
+            )
+
+    tasks = {
+        asyncio.ensure_future(run_probe(activity)): index
+        for index, activity in enumerate(probes)
+    }
+    pending = set(tasks)
+    try:
+        while pending and met:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in sorted(done, key=tasks.get):
+                index = tasks[task]
+                run = runs[index] = task.result()
+                if not await probe_run_met_tolerance_async(
+                    probes[index], run, configuration, secrets, dry
+                ):
+                    met = False
+                    break
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    return met, [run for run in runs if run is not None]
+
+
+class ContinuousHypothesisRetention:
+    """
+    Decide which states of the continuous hypothesis are kept verbatim in
+    the journal and aggregate all of them per probe.
+
+    When `keep_last` is set, only the last `keep_last` iterations are kept
+    along with those that deviated. Otherwise, all of them are kept. In
+    both cases, every iteration is folded into the summary returned by
+    :meth:`summary`, so the journal stays bounded however long the run is.
+    """
+
+    def __init__(self, keep_last: int = None) -> None:
+        self.keep_last = keep_last
+        self.window = deque()
+        self.iterations = 0
+        self.deviations = 0
+        self.dropped = 0
+        self.probes: Dict[str, ProbeAggregate] = {}
+
+    def record(self, during: List[Dict[str, Any]], state: Dict[str, Any]) -> None:
+        """
+        Record the state of an iteration in the `during` list of states.
+        """
+        self.iterations += 1
+        if state is not None:
+            if not state.get("steady_state_met"):
+                self.deviations += 1
+
+            for run in state.get("probes", []):
+                name = run.get("activity", {}).get("name")
+                aggregate = self.probes.get(name)
+                if aggregate is None:
+                    aggregate = self.probes[name] = ProbeAggregate()
+                aggregate.add(run)
+
+        during.append(state)
+        if self.keep_last is None:
+            return
+
+        self.window.append(state)
+        while len(self.window) > self.keep_last:
+            previous = self.window.popleft()
+            if previous is not None and not previous.get("steady_state_met"):
+                continue
+
+            for index, kept in enumerate(during):
+                if kept is previous:
+                    del during[index]
+                    self.dropped += 1
+                    break
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "iterations": self.iterations,
+            "deviations": self.deviations,
+            "dropped": self.dropped,
+            "probes": {
+                name: aggregate.summary() for name, aggregate in self.probes.items()
+            },
+        }
+
+
+class FixedRateClock:
+    """
+    Ticks every `period` seconds on a monotonic clock, whatever the time
+    taken by the iterations started on these ticks.
+
+    Call :meth:`wait_time` to know how long to wait for the next tick and
+    :meth:`tick` once it is due. When an iteration overran the next tick,
+    the `overrun` policy decides whether the ticks missed meanwhile are
+    skipped or still started, late, one after the other. With
+    `Overrun.CONCURRENT`, iterations are expected not to block the clock
+    and ticks are only ever late by the scheduling delay.
+
+    The delay between the time a tick was due and the time it was started
+    is measured for each tick.
+    """
+
+    def __init__(
+        self,
+        period: float,
+        overrun: Overrun = Overrun.SKIP,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.period = period
+        self.overrun = overrun
+        self.clock = clock
+        self.start = None
+        self.next_index = 0
+        self.ticks = 0
+        self.skipped = 0
+        self.jitter = LatencyHistogram()
+
+    def wait_time(self) -> float:
+        """
+        Seconds until the next tick is due, zero when it is due already.
+        """
+        now = self.clock()
+        if self.start is None:
+            self.start = now
+            return 0.0
+
+        due = self.start + self.next_index * self.period
+        if now > due and self.overrun == Overrun.SKIP:
+            missed = math.ceil((now - due) / self.period)
+            self.next_index += missed
+            self.skipped += missed
+            due += missed * self.period
+
+        return max(0.0, due - now)
+
+    def skip(self) -> None:
+        """
+        Skip the tick that is due.
+        """
+        self.next_index += 1
+        self.skipped += 1
+
+    def tick(self) -> Dict[str, Any]:
+        """
+        Start the tick that is due and return its index, its offset from the
+        first tick and how late it was started, in seconds.
+        """
+        index = self.next_index
+        offset = index * self.period
+        jitter = max(0.0, self.clock() - (self.start + offset))
+        self.jitter.add(jitter)
+        self.ticks += 1
+        self.next_index += 1
+        return {"index": index, "offset": offset, "jitter": jitter}
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "mode": "fixed-rate",
+            "period": self.period,
+            "overrun": self.overrun.value,
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "jitter": self.jitter.summary(),
+        }
+
+
+class ProbeAggregate:
+    """
+    Counters and latency distribution of the runs of a probe.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.succeeded = 0
+        self.tolerance_met = 0
+        self.latency = LatencyHistogram()
+
+    def add(self, run: Run) -> None:
+        self.count += 1
+        if run.get("status") == "succeeded":
+            self.succeeded += 1
+        if run.get("tolerance_met"):
+            self.tolerance_met += 1
+        if run.get("duration") is not None:
+            self.latency.add(run["duration"])
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "succeeded": self.succeeded,
+            "failed": self.count - self.succeeded,
+            "tolerance_met": self.tolerance_met,
+            "pass_ratio": self.tolerance_met / self.count if self.count else None,
+            "latency": self.latency.summary(),
+        }
+
+
+class LatencyHistogram:
+    """
+    Distribution of durations, in seconds, counted in buckets each 10%
+    wider than the previous one. Percentiles are therefore approximated
+    within 10% while the memory used does not depend on how many durations
+    were added.
+    """
+
+    base = 0.001
+    growth = math.log(1.1)
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, duration: float) -> None:
+        index = 0
+        if duration > self.base:
+            index = math.ceil(math.log(duration / self.base) / self.growth)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += duration
+        self.min = duration if self.min is None else min(self.min, duration)
+        self.max = duration if self.max is None else max(self.max, duration)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self.count:
+            return None
+
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                upper = self.base * math.exp(index * self.growth)
+                return max(self.min, min(upper, self.max))
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "min": self.min,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+def get_spilled_output(value: Any, target: str) -> Optional[str]:
+    """
+    Path of the file the targeted output of a process was spilled to, if
+    it was too large to be kept in memory.
+    """
+    if isinstance(value, dict) and isinstance(target, str):
+        return value.get(f"{target}_file")
+
+
+def probe_run_met_tolerance(
+    activity: Activity,
+    run: Run,
+    configuration: Configuration,
+    secrets: Secrets,
+    dry: Dry = None,
+) -> bool:
+    """
+    Validate the run of a hypothesis probe against the probe's tolerance.
+    The run is flagged accordingly.
+    """
+    if run["status"] == "failed":
+        run["tolerance_met"] = False
+        logger.warning(
+            "Probe terminated unexpectedly, so its tolerance could not be validated"
+        )
+        return False
+
+    run["tolerance_met"] = True
+
+    if dry in (Dry.PROBES, Dry.ACTIVITIES):
+        # do not check for tolerance when dry mode is on
+        return True
+
+    tolerance = activity.get("tolerance")
+    logger.debug(f"allowed tolerance is {str(tolerance)}")
+    checked = within_tolerance(
+        tolerance, run["output"], configuration=configuration, secrets=secrets
+    )
+    if not checked:
+        run["tolerance_met"] = False
+        return False
+
+    return True
+
+
+async def probe_run_met_tolerance_async(
+    activity: Activity,
+    run: Run,
+    configuration: Configuration,
+    secrets: Secrets,
+    dry: Dry = None,
+) -> bool:
+    """
+    Counterpart of :func:`probe_run_met_tolerance` to be awaited from an event
+    loop.
+    """
+    tolerance = activity.get("tolerance")
+    if isinstance(tolerance, dict) and tolerance.get("type") == "probe":
+        # a probe tolerance is an activity of its own, which would
+        # otherwise block the loop
+        return await run_in_executor_in_context(
+            None,
+            probe_run_met_tolerance,
+            activity,
+            run,
+            configuration,
+            secrets,
+            dry,
+        )
+    return probe_run_met_tolerance(activity, run, configuration, secrets, dry)
+
+
 @singledispatch
 def within_tolerance(
     tolerance: Any,
@@ -256,6 +871,13 @@ def within_tolerance(
     follow the activity provider specification so that it can be called with
     the probe's result `value` as an argument, returning a success when the
     `value` is within range.
+
+    When a process output was too large to be kept in memory, `regex` and
+    `jsonpath` tolerances targeting it read it from the file it was spilled
+    to. Other tolerances, `probe` ones included, are given the result as is:
+    the output is only a summary of its head and tail, the full output can
+    be read from the file set under the `stdout_file`, or `stderr_file`,
+    key of the result.
     """
     pass
 
@@ -321,6 +943,7 @@ def _(
     tolerance_type = tolerance.get("type")
 
     if tolerance_type == "probe":
+        # spilled outputs are passed as their summary and `<output>_file` path
         tolerance["provider"]["arguments"]["value"] = value
         try:
             rtn = run_activity(tolerance, configuration, secrets)
@@ -337,6 +960,9 @@ def _(
         logger.debug(f"Applied pattern is: {pattern}")
         rx = re.compile(pattern)
         if target:
+            spilled = get_spilled_output(value, target)
+            if spilled:
+                return search_spilled_output(pattern, spilled)
             value = value.get(target, value)
         return rx.search(value) is not None
     elif tolerance_type == "jsonpath":
@@ -349,7 +975,11 @@ def _(
 
         if target:
             # if no target was provided, we use the tested value as-is
-            value = value.get(target, value)
+            spilled = get_spilled_output(value, target)
+            if spilled:
+                value = read_spilled_output(spilled)
+            else:
+                value = value.get(target, value)
 
         if isinstance(value, bytes):
             value = value.decode("utf-8")
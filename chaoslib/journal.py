@@ -0,0 +1,347 @@
+import os
+import threading
+import time
+from abc import abstractmethod
+from typing import IO, Any, Dict, Iterable, List, Optional
+
+from logzero import logger
+
+try:
+    import simplejson as json
+    from simplejson.errors import JSONDecodeError
+except ImportError:
+    import json
+    from json.decoder import JSONDecodeError
+
+from chaoslib import PayloadEncoder
+from chaoslib.run import RunEventHandler
+from chaoslib.types import Activity, Experiment, Journal, Run
+
+__all__ = [
+    "JournalSink",
+    "JsonLinesJournalSink",
+    "load_journal_stream",
+    "rebuild_journal",
+    "summarize_state",
+]
+
+
+class JournalSink(RunEventHandler):
+    """
+    Event handler streaming the journal as the experiment runs, rather than
+    waiting for the end of the execution.
+
+    The journal is turned into a sequence of records: the journal as it
+    started, each run of the method and rollbacks, each steady-state
+    hypothesis and the final status. The complete journal can be rebuilt
+    from them with :func:`rebuild_journal`.
+
+    When `summaries_only` is set, the states of the continuous hypothesis
+    iterations kept in memory, in the journal, are summarized as soon as
+    every handler was given them. Their full version only lives in the
+    stream.
+
+    Runs are written as their activities complete, each with the index of
+    the activity in its declaration so the journal is rebuilt with the runs
+    in the same order as the journal kept in memory.
+
+    Implementations only need to provide :meth:`write` and, optionally,
+    :meth:`close`. Records are written one at a time, even though the
+    events may come from different threads.
+    """
+
+    def __init__(self, summaries_only: bool = False) -> None:
+        self.summaries_only = summaries_only
+        self.phase = None
+        self.probes = set()
+        self.written = set()
+        self.order = {}
+        self.lock = threading.Lock()
+
+    @abstractmethod
+    def write(self, record: Dict[str, Any]) -> None:
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+    def emit(self, kind: str, **data: Any) -> None:
+        record = {"event": kind, "ts": time.time()}
+        record.update(data)
+        with self.lock:
+            self.write(record)
+
+    def started(self, experiment: Experiment, journal: Journal) -> None:
+        self.phase = None
+        self.written = set()
+        hypo = experiment.get("steady-state-hypothesis") or {}
+        self.probes = {id(p) for p in hypo.get("probes", [])}
+        self.order = {
+            "run": DeclarationOrder(experiment.get("method")),
+            "rollback": DeclarationOrder(experiment.get("rollbacks")),
+        }
+        self.emit("started", journal=journal)
+
+    def hypothesis_before_completed(
+        self, experiment: Experiment, state: Dict[str, Any], journal: Journal
+    ) -> None:
+        self.emit("hypothesis-before", state=state, **journal_status(journal))
+
+    def continuous_hypothesis_iteration(self, iteration_index: int, state: Any) -> None:
+        self.emit("hypothesis-iteration", iteration=iteration_index, state=state)
+
+    def continuous_hypothesis_iteration_handled(
+        self, iteration_index: int, state: Any
+    ) -> None:
+        if self.summaries_only and state:
+            # in place, the journal and the retention of the states keep
+            # track of it by identity
+            state.update(summarize_state(state))
+
+    def continuous_hypothesis_completed(
+        self, experiment: Experiment, journal: Journal, exception: Exception = None
+    ) -> None:
+        self.emit("status", **journal_status(journal))
+
+    def hypothesis_after_completed(
+        self, experiment: Experiment, state: Dict[str, Any], journal: Journal
+    ) -> None:
+        self.emit("hypothesis-after", state=state, **journal_status(journal))
+
+    def start_method(self, experiment: Experiment) -> None:
+        self.phase = "run"
+
+    def method_completed(self, experiment: Experiment, state: Any = None) -> None:
+        # runs we could not attribute to the method while it was played,
+        # such as those referencing a hypothesis probe
+        for run in state or []:
+            if isinstance(run, dict) and id(run) not in self.written:
+                self.write_run("run", run, run.get("activity") or {})
+        self.phase = None
+
+    def start_rollbacks(self, experiment: Experiment) -> None:
+        self.phase = "rollback"
+
+    def rollbacks_completed(self, experiment: Experiment, journal: Journal) -> None:
+        for run in journal.get("rollbacks", []):
+            if id(run) not in self.written:
+                self.write_run("rollback", run, run.get("activity") or {})
+        self.phase = None
+        self.emit("status", **journal_status(journal))
+
+    def activity_completed(self, activity: Activity, run: Run) -> None:
+        phase = self.phase
+        if phase == "run" and id(activity) in self.probes:
+            # a probe of the continuous hypothesis, recorded with its state
+            return
+        if phase:
+            self.write_run(phase, run, activity)
+
+    def interrupted(self, experiment: Experiment, journal: Journal) -> None:
+        self.emit("status", **journal_status(journal))
+
+    def finish(self, journal: Journal) -> None:
+        try:
+            self.emit(
+                "finished",
+                end=journal.get("end"),
+                duration=journal.get("duration"),
+                **journal_status(journal),
+            )
+        finally:
+            self.close()
+
+    def write_run(self, kind: str, run: Run, activity: Activity) -> None:
+        with self.lock:
+            self.written.add(id(run))
+            order = self.order.get(kind)
+            index = order.index_of(activity) if order else None
+        self.emit(kind, run=run, index=index)
+
+
+class JsonLinesJournalSink(JournalSink):
+    """
+    Journal sink appending each record as a JSON line to the given file.
+
+    Every line is flushed as soon as it is written so the stream survives
+    a crash of the process. Set `fsync` to also ask the system to write it
+    to disk.
+    """
+
+    def __init__(
+        self, path: str, summaries_only: bool = False, fsync: bool = False
+    ) -> None:
+        JournalSink.__init__(self, summaries_only=summaries_only)
+        self.path = path
+        self.fsync = fsync
+        self.stream = None
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self.stream is None:
+            self.stream = open(self.path, "a", encoding="utf-8")
+
+        self.stream.write(
+            json.dumps(record, cls=JournalEncoder, ensure_ascii=False) + "\n"
+        )
+        self.stream.flush()
+        if self.fsync:
+            os.fsync(self.stream.fileno())
+
+    def close(self) -> None:
+        with self.lock:
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+
+
+def load_journal_stream(path: str) -> Optional[Journal]:
+    """
+    Rebuild the journal from a stream written by
+    :class:`JsonLinesJournalSink`.
+
+    A last line truncated by a crash is ignored, the journal is then
+    rebuilt as it was when the previous record was written.
+
+    Runs are ordered by the declaration of their activity, not by the order
+    they were written in.
+    """
+    with open(path, encoding="utf-8") as f:
+        return rebuild_journal(read_records(f))
+
+
+def rebuild_journal(records: Iterable[Dict[str, Any]]) -> Optional[Journal]:
+    """
+    Rebuild the journal from the records of a journal sink. Returns `None`
+    when the experiment never started.
+    """
+    journal = None
+    indices = {}
+    for record in records:
+        kind = record.get("event")
+        if kind == "started":
+            journal = record["journal"]
+            journal["steady_states"] = {"before": None, "after": None, "during": []}
+            journal["run"] = []
+            journal["rollbacks"] = []
+            indices = {}
+            continue
+
+        if journal is None:
+            continue
+
+        if kind == "hypothesis-before":
+            journal["steady_states"]["before"] = record["state"]
+        elif kind == "hypothesis-after":
+            journal["steady_states"]["after"] = record["state"]
+        elif kind == "hypothesis-iteration":
+            journal["steady_states"]["during"].append(record["state"])
+        elif kind == "run":
+            journal["run"].append(record["run"])
+            indices[id(record["run"])] = record.get("index")
+        elif kind == "rollback":
+            journal["rollbacks"].append(record["run"])
+            indices[id(record["run"])] = record.get("index")
+        elif kind == "finished":
+            journal["end"] = record.get("end")
+            journal["duration"] = record.get("duration")
+
+        if "status" in record:
+            journal["status"] = record["status"]
+            journal["deviated"] = record["deviated"]
+
+    if journal is not None:
+        for key in ("run", "rollbacks"):
+            # stable, runs without an index keep the order they were written in
+            journal[key].sort(key=lambda run: declaration_index(indices, run))
+
+    return journal
+
+
+def summarize_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A copy of the hypothesis state stripped down to whether it was met and
+    the status of each of its probes. The state itself is left untouched.
+    """
+    summary = dict(state)
+    summary["probes"] = [summarize_run(run) for run in state.get("probes", [])]
+    return summary
+
+
+###############################################################################
+# Internals
+###############################################################################
+class JournalEncoder(PayloadEncoder):
+    def default(self, obj: Any) -> Any:
+        try:
+            return PayloadEncoder.default(self, obj)
+        except TypeError:
+            # activities may return anything, the stream must not break
+            return repr(obj)
+
+
+class DeclarationOrder:
+    """
+    Index of the activities of the method, or rollbacks, in the order they
+    were declared.
+
+    A declared activity is found by identity, a reference by the name of the
+    activity it references, each index being given once.
+    """
+
+    def __init__(self, activities: Optional[List[Activity]]) -> None:
+        self.by_id = {}
+        self.by_name = {}
+        self.used = set()
+        for index, activity in enumerate(activities or []):
+            name = activity.get("ref")
+            if name is None:
+                self.by_id[id(activity)] = index
+                name = activity.get("name")
+            self.by_name.setdefault(name, []).append(index)
+
+    def index_of(self, activity: Activity) -> Optional[int]:
+        index = self.by_id.get(id(activity))
+        if index is None or index in self.used:
+            # a reference, possibly to an activity also declared as-is
+            index = next(
+                (
+                    i
+                    for i in self.by_name.get(activity.get("name"), [])
+                    if i not in self.used
+                ),
+                None,
+            )
+        if index is not None:
+            self.used.add(index)
+        return index
+
+
+def declaration_index(indices: Dict[int, Optional[int]], run: Run) -> float:
+    index = indices.get(id(run))
+    return float("inf") if index is None else index
+
+
+def journal_status(journal: Journal) -> Dict[str, Any]:
+    return {"status": journal.get("status"), "deviated": journal.get("deviated")}
+
+
+def summarize_run(run: Run) -> Run:
+    activity = run.get("activity") or {}
+    summary = {"activity": {"name": activity.get("name"), "type": activity.get("type")}}
+    for key in ("status", "tolerance_met", "start", "end", "duration"):
+        if key in run:
+            summary[key] = run[key]
+    return summary
+
+
+def read_records(lines: IO) -> List[Dict[str, Any]]:
+    records = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except JSONDecodeError:
+            logger.debug("Skipping a journal record that could not be decoded")
+    return records
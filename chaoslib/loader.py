@@ -1,4 +1,10 @@
+import hashlib
+import marshal
+import os
 import os.path
+import tempfile
+import time
+from typing import Any, Dict, Optional
 from urllib.parse import urlparse
 
 import requests
@@ -16,9 +22,10 @@ except ImportError:
 
 from chaoslib.control import controls
 from chaoslib.exceptions import InvalidExperiment
+from chaoslib.parsers import parse_json, parse_yaml
 from chaoslib.types import Experiment, Settings
 
-__all__ = ["load_experiment"]
+__all__ = ["load_experiment", "ExperimentCache"]
 
 
 def parse_experiment_from_file(path: str) -> Experiment:
@@ -29,11 +36,11 @@ def parse_experiment_from_file(path: str) -> Experiment:
         p, ext = os.path.splitext(path)
         if ext in (".yaml", ".yml"):
             try:
-                return yaml.safe_load(f)
+                return parse_yaml(f)
             except yaml.YAMLError as ye:
                 raise InvalidSource(f"Failed parsing YAML experiment: {str(ye)}")
         elif ext == ".json":
-            return json.load(f)
+            return parse_json(f)
 
     raise InvalidExperiment(
         "only files with json, yaml or yml extensions are supported"
@@ -47,19 +54,19 @@ def parse_experiment_from_http(response: requests.Response) -> Experiment:
     content_type = response.headers.get("Content-Type")
 
     if "application/json" in content_type:
-        return response.json()
+        return parse_json(response.content)
     elif "application/x-yaml" in content_type or "text/yaml" in content_type:
         try:
-            return yaml.safe_load(response.text)
+            return parse_yaml(response.text)
         except yaml.YAMLError as ye:
             raise InvalidSource(f"Failed parsing YAML experiment: {str(ye)}")
     elif "text/plain" in content_type:
         content = response.text
         try:
-            return json.loads(content)
+            return parse_json(content)
         except JSONDecodeError:
             try:
-                return yaml.safe_load(content)
+                return parse_yaml(content)
             except yaml.YAMLError:
                 pass
 
@@ -94,6 +101,18 @@ def load_experiment(
     Set `verify_tls` to `False` if the source is a over a self-signed
     certificate HTTP endpoint to instruct the loader to not verify the
     certificates.
+
+    Experiments fetched over HTTP can be cached on disk and revalidated with
+    conditional requests, see :class:`ExperimentCache`:
+
+    ```yaml
+    runtime:
+      loader:
+        cache:
+          path: ~/.chaostoolkit/cache/experiments
+          max_entries: 256
+          max_bytes: 52428800
+    ```
     """
     with controls(level="loader", context=experiment_source) as control:
         if os.path.exists(experiment_source):
@@ -122,11 +141,211 @@ def load_experiment(
                     )
                     break
 
+        cache = get_experiment_cache(settings)
+        key = entry = None
+        if cache is not None:
+            key = cache.key(experiment_source, headers.get("Authorization"))
+            entry = cache.lookup(key)
+            if entry is not None:
+                headers.update(entry.validators())
+
         r = requests.get(experiment_source, headers=headers, verify=verify_tls)
+        if r.status_code == 304 and entry is not None:
+            parsed = cache.load(key)
+            if parsed is not None:
+                logger.debug(f"Experiment at '{experiment_source}' is unchanged")
+                control.with_state(parsed)
+                return parsed
+
+            # the cached copy vanished in the meantime
+            for name in entry.validators():
+                headers.pop(name, None)
+            r = requests.get(experiment_source, headers=headers, verify=verify_tls)
+
         if r.status_code != 200:
             raise InvalidSource(f"Failed to fetch the experiment: {r.text}")
 
         logger.debug(f"Fetched experiment: \n{r.text}")
         parsed = parse_experiment_from_http(r)
+        if cache is not None:
+            cache.store(key, parsed, r.headers)
         control.with_state(parsed)
         return parsed
+
+
+class ExperimentCache:
+    """
+    On-disk cache of the experiments fetched over HTTP.
+
+    Entries are keyed by the URL and the authorization sent to fetch it,
+    hashed, so that experiments are never shared between identities. Only
+    responses carrying an `ETag` or a `Last-Modified` header are cached, as
+    they can be revalidated with a conditional request: the experiment is
+    only downloaded and parsed again when the server says it changed.
+
+    The parsed experiment is stored with :mod:`marshal`, which loads much
+    faster than parsing JSON or YAML again and, unlike pickle, cannot run
+    code. Experiments holding values marshal cannot serialize are not cached.
+
+    Beyond `max_entries` entries or `max_bytes` bytes, the least recently
+    used entries are evicted.
+    """
+
+    def __init__(
+        self, path: str, max_entries: int = 256, max_bytes: int = 50 * 1024 * 1024
+    ) -> None:
+        self.path = os.path.expanduser(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def key(self, url: str, authorization: Optional[str] = None) -> str:
+        h = hashlib.sha256()
+        h.update(url.encode("utf-8"))
+        h.update(b"\0")
+        h.update((authorization or "").encode("utf-8"))
+        return h.hexdigest()
+
+    def lookup(self, key: str) -> Optional["CachedExperiment"]:
+        """
+        The validators of the cached entry, if any.
+        """
+        try:
+            with open(self.entry_path(key, "meta"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return CachedExperiment(meta.get("etag"), meta.get("last_modified"))
+
+    def load(self, key: str) -> Optional[Experiment]:
+        """
+        The cached experiment, marked as recently used, if any.
+        """
+        path = self.entry_path(key, "marshal")
+        try:
+            with open(path, "rb") as f:
+                experiment = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        now = time.time()
+        for p in (path, self.entry_path(key, "meta")):
+            try:
+                os.utime(p, (now, now))
+            except OSError:
+                pass
+        return experiment
+
+    def store(self, key: str, experiment: Experiment, headers: Any) -> bool:
+        """
+        Cache the experiment with the validators of the response it was
+        fetched from. Returns `False` when it could not be cached.
+        """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return False
+
+        try:
+            data = marshal.dumps(experiment)
+        except ValueError:
+            logger.debug("Experiment cannot be cached, it cannot be serialized")
+            return False
+
+        if len(data) > self.max_bytes:
+            return False
+
+        try:
+            os.makedirs(self.path, mode=0o700, exist_ok=True)
+            write_atomically(self.entry_path(key, "marshal"), data)
+            meta = {"etag": etag, "last_modified": last_modified, "size": len(data)}
+            write_atomically(
+                self.entry_path(key, "meta"), json.dumps(meta).encode("utf-8")
+            )
+        except OSError:
+            logger.debug("Failed to cache the experiment", exc_info=True)
+            return False
+
+        self.evict()
+        return True
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the cache fits within
+        its limits.
+        """
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return
+
+        for name in names:
+            if not name.endswith(".marshal"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.path, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name[: -len(".marshal")]))
+            total += st.st_size
+
+        entries.sort()
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, key = entries.pop(0)
+            total -= size
+            for kind in ("marshal", "meta"):
+                try:
+                    os.remove(self.entry_path(key, kind))
+                except OSError:
+                    pass
+
+    def entry_path(self, key: str, kind: str) -> str:
+        return os.path.join(self.path, f"{key}.{kind}")
+
+
+###############################################################################
+# Internals
+###############################################################################
+class CachedExperiment:
+    def __init__(self, etag: Optional[str], last_modified: Optional[str]) -> None:
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def validators(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def get_experiment_cache(settings: Settings = None) -> Optional[ExperimentCache]:
+    cache_settings = (settings or {}).get("runtime", {}).get("loader", {})
+    cache_settings = cache_settings.get("cache")
+    if not cache_settings:
+        return None
+
+    if not isinstance(cache_settings, dict):
+        cache_settings = {}
+
+    return ExperimentCache(
+        cache_settings.get("path", "~/.chaostoolkit/cache/experiments"),
+        max_entries=cache_settings.get("max_entries", 256),
+        max_bytes=cache_settings.get("max_bytes", 50 * 1024 * 1024),
+    )
+
+
+def write_atomically(path: str, data: bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
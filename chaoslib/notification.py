@@ -1,25 +1,39 @@
+import atexit
 import importlib
 import inspect
 import json
+import queue
+import threading
+import time
+from copy import deepcopy
 from datetime import datetime, timezone
 from enum import Enum
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import requests
 from logzero import logger
 from requests.exceptions import HTTPError
 
 from chaoslib import PayloadEncoder
+from chaoslib.provider.http import get_session
 from chaoslib.types import EventPayload, Settings
 
 __all__ = [
     "DiscoverFlowEvent",
     "InitFlowEvent",
+    "NotificationDispatcher",
     "RunFlowEvent",
     "ValidateFlowEvent",
+    "close_notification_dispatcher",
+    "flush_notifications",
+    "get_notification_stats",
     "notify",
 ]
 
+# dispatcher shared by all notifications sent in the background
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
 
 class FlowEvent(Enum):
     pass
@@ -113,6 +127,31 @@ def notify(
     - `"phase"`: which phase this event was raised from
     - `"error"`: if an error was passed on to the function
     - `"ts"`: a UTC timestamp of when the event was raised
+
+    Notifications can also be sent in the background so that a slow channel
+    never holds the experiment back:
+
+    ```yaml
+    runtime:
+      notifications:
+        strategy: background
+        queue_size: 1000
+        retries: 2
+    notifications:
+      -
+        type: http
+        url: http://example.com
+        batch_size: 20
+        batch_interval: 1
+        concurrency: 1
+    ```
+
+    Each channel then has its own queue, bounded by `queue_size`, and
+    `concurrency` threads sending its events. HTTP channels forwarding the
+    event payload may set a `batch_size` to receive up to that many events,
+    waited for at most `batch_interval` seconds, as a list in a single POST.
+    Failed calls are retried `retries` times. Events not fitting in a full
+    queue are dropped. See :class:`NotificationDispatcher`.
     """
     if not settings:
         return
@@ -141,11 +180,20 @@ def notify(
     elif event_class is ValidateFlowEvent:
         event_payload["phase"] = "validate"
 
+    dispatcher = None
+    runtime = settings.get("runtime", {}).get("notifications", {})
+    if runtime.get("strategy") == "background":
+        dispatcher = get_notification_dispatcher(settings)
+
     for channel in notification_channels:
         events = channel.get("events")
         if events and event.value not in events:
             continue
 
+        if dispatcher is not None:
+            dispatcher.submit(channel, event_payload)
+            continue
+
         channel_type = channel.get("type")
         if channel_type == "http":
             notify_with_http(channel, event_payload)
@@ -231,3 +279,323 @@ def notify_via_plugin(channel: Dict[str, str], payload: EventPayload):
                 "could not find function '{f}' in plugin '{mod}' "
                 "for notification".format(mod=mod_name, f=func_name)
             )
+
+
+class NotificationDispatcher:
+    """
+    Send notifications from background threads rather than from the thread
+    raising the event.
+
+    Each channel gets its own queue, holding at most `queue_size` events,
+    and `concurrency` threads, as set on the channel, consuming it. Events
+    submitted while the queue of their channel is full are dropped rather
+    than blocking the caller.
+
+    HTTP channels share the connection pools of the HTTP provider. Those
+    with a `batch_size` greater than one receive their events as a list in
+    a single POST, once that many events are queued or `batch_interval`
+    seconds after the first one. A call failing, or answered with a server
+    error, is retried up to `retries` times. One answered with a client
+    error is counted as failed straight away.
+
+    Events are copied when submitted, the experiment and journal they were
+    raised for keep changing while they wait in the queue.
+
+    Call :meth:`flush` to wait for all the queued events to be sent.
+    """
+
+    def __init__(
+        self, queue_size: int = 1000, retries: int = 2, retry_delay: float = 0.5
+    ) -> None:
+        self.queue_size = queue_size
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.channels: Dict[str, "ChannelQueue"] = {}
+        self.lock = threading.Lock()
+        self.pending = 0
+        self.idle = threading.Condition(self.lock)
+        self.stats = {
+            "submitted": 0,
+            "sent": 0,
+            "dropped": 0,
+            "retried": 0,
+            "failed": 0,
+            "batches": 0,
+        }
+        self.closed = False
+
+    def submit(self, channel: Dict[str, Any], payload: EventPayload) -> bool:
+        """
+        Queue the event for the given channel. Returns `False` when the event
+        was dropped.
+        """
+        payload = snapshot_payload(channel, payload)
+        with self.lock:
+            if self.closed:
+                self.stats["dropped"] += 1
+                return False
+
+            key = json.dumps(channel, sort_keys=True, default=str)
+            channel_queue = self.channels.get(key)
+            if channel_queue is None:
+                channel_queue = self.channels[key] = ChannelQueue(self, channel)
+
+            try:
+                channel_queue.queue.put_nowait(payload)
+            except queue.Full:
+                self.stats["dropped"] += 1
+                logger.debug(
+                    "notification queue of channel '{}' is full, dropping "
+                    "event '{}'".format(channel_label(channel), payload.get("name"))
+                )
+                return False
+
+            self.stats["submitted"] += 1
+            self.pending += 1
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Wait for all queued events to be sent, or given up on. Returns `False`
+        when some were still pending after `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.idle:
+            while self.pending:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                self.idle.wait(remaining)
+        return True
+
+    def close(self, timeout: float = None) -> bool:
+        """
+        Flush the queued events and stop the threads. Events submitted from
+        now on are dropped.
+        """
+        flushed = self.flush(timeout)
+        with self.lock:
+            self.closed = True
+            channels = list(self.channels.values())
+        for channel_queue in channels:
+            channel_queue.stop()
+        return flushed
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            stats = dict(self.stats)
+            stats["pending"] = self.pending
+        return stats
+
+    def done(self, count: int, **stats: int) -> None:
+        with self.lock:
+            for name, value in stats.items():
+                self.stats[name] += value
+            self.pending -= count
+            if not self.pending:
+                self.idle.notify_all()
+
+    def send(
+        self,
+        channel: Dict[str, Any],
+        payloads: List[EventPayload],
+        batch_size: int = 1,
+    ) -> None:
+        """
+        Send a batch of events to the channel, retrying on failures. A channel
+        accepting batches, a `batch_size` greater than one, receives a list.
+        """
+        retried = 0
+        delivered = True
+        for attempt in range(self.retries + 1):
+            try:
+                if channel.get("type") == "http":
+                    delivered = send_http_batch(channel, payloads, batch_size)
+                elif channel.get("type") == "plugin":
+                    for payload in payloads:
+                        notify_via_plugin(channel, payload)
+                break
+            except Exception as x:
+                if attempt == self.retries:
+                    logger.debug(
+                        "notification to channel '{}' failed: {}".format(
+                            channel_label(channel), x
+                        )
+                    )
+                    self.done(len(payloads), failed=len(payloads), retried=retried)
+                    return
+                retried += 1
+                time.sleep(self.retry_delay * (2**attempt))
+
+        if not delivered:
+            self.done(len(payloads), failed=len(payloads), retried=retried)
+            return
+        self.done(len(payloads), sent=len(payloads), batches=1, retried=retried)
+
+
+def get_notification_dispatcher(settings: Settings = None) -> NotificationDispatcher:
+    """
+    Lookup the dispatcher shared by notifications sent in the background or
+    create it, from the `runtime.notifications` settings, if none exists yet.
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            runtime = (settings or {}).get("runtime", {}).get("notifications", {})
+            _dispatcher = NotificationDispatcher(
+                queue_size=runtime.get("queue_size", 1000),
+                retries=runtime.get("retries", 2),
+            )
+        return _dispatcher
+
+
+def flush_notifications(timeout: float = None) -> bool:
+    """
+    Wait for the notifications sent in the background to be delivered.
+    Returns `False` when some were still pending after `timeout` seconds.
+    """
+    dispatcher = _dispatcher
+    if dispatcher is None:
+        return True
+    return dispatcher.flush(timeout)
+
+
+def close_notification_dispatcher(timeout: float = None) -> bool:
+    """
+    Flush and stop the dispatcher of notifications sent in the background.
+    This is called when the interpreter exits so no notification is lost.
+    """
+    global _dispatcher
+    with _dispatcher_lock:
+        dispatcher = _dispatcher
+        _dispatcher = None
+    if dispatcher is None:
+        return True
+    return dispatcher.close(timeout)
+
+
+def get_notification_stats() -> Dict[str, int]:
+    """
+    Counters of the notifications sent in the background: submitted, sent,
+    dropped because their queue was full, retried, failed after all their
+    retries, batches sent and still pending.
+    """
+    dispatcher = _dispatcher
+    if dispatcher is None:
+        return {}
+    return dispatcher.get_stats()
+
+
+atexit.register(close_notification_dispatcher, timeout=10)
+
+
+###############################################################################
+# Internals
+###############################################################################
+class ChannelQueue:
+    def __init__(
+        self, dispatcher: NotificationDispatcher, channel: Dict[str, Any]
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=dispatcher.queue_size)
+        self.batch_size = 1
+        if channel.get("type") == "http" and channel.get("forward_event_payload", True):
+            self.batch_size = max(1, int(channel.get("batch_size", 1)))
+        self.batch_interval = float(channel.get("batch_interval", 1))
+        self.stopped = threading.Event()
+        self.threads = []
+        for i in range(max(1, int(channel.get("concurrency", 1)))):
+            t = threading.Thread(
+                target=self.consume,
+                name="chaoslib-notification-{}".format(i),
+                daemon=True,
+            )
+            t.start()
+            self.threads.append(t)
+
+    def consume(self) -> None:
+        while not self.stopped.is_set():
+            try:
+                payload = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            batch = [payload]
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self.dispatcher.send(self.channel, batch, self.batch_size)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        for t in self.threads:
+            t.join()
+
+
+def channel_label(channel: Dict[str, Any]) -> str:
+    return channel.get("url") or channel.get("module") or "unknown"
+
+
+def snapshot_payload(channel: Dict[str, Any], payload: EventPayload) -> EventPayload:
+    """
+    Copy of the payload as it is when the event is raised. HTTP channels
+    get what would be posted, plugins a deep copy, falling back to the
+    former for payloads which cannot be copied.
+    """
+    if channel.get("type") == "plugin":
+        try:
+            return deepcopy(payload)
+        except Exception:
+            logger.debug("notification payload cannot be copied", exc_info=True)
+    return json.loads(json.dumps(payload, cls=PayloadEncoder))
+
+
+def send_http_batch(
+    channel: Dict[str, Any], payloads: List[EventPayload], batch_size: int = 1
+) -> bool:
+    """
+    Send the payloads to the HTTP channel. Returns `False` when the request
+    was rejected, server errors are raised so the call is retried.
+    """
+    url = channel.get("url")
+    if not url:
+        logger.debug("missing url in notification channel")
+        return False
+
+    verify_tls = channel.get("verify_tls", True)
+    headers = channel.get("headers")
+    # not closed, that would close the connection pool it shares with the
+    # HTTP activities
+    session = get_session(url, verify_tls)
+    if channel.get("forward_event_payload", True):
+        # a channel accepting batches always receives a list
+        body = payloads if batch_size > 1 else payloads[0]
+        resp = session.post(
+            url,
+            headers=headers,
+            verify=verify_tls,
+            timeout=(2, 5),
+            json=body,
+        )
+    else:
+        resp = session.get(url, headers=headers, verify=verify_tls, timeout=(2, 5))
+
+    if resp.status_code >= 500:
+        resp.raise_for_status()
+    if resp.status_code >= 400:
+        # not worth retrying
+        logger.debug(
+            "notification sent to {} failed with: {}".format(url, resp.status_code)
+        )
+        return False
+    return True
@@ -0,0 +1,114 @@
+import threading
+from typing import IO, Any, Dict, List, Tuple, Union
+
+import yaml
+
+try:
+    import simplejson as json
+    from simplejson.errors import JSONDecodeError
+except ImportError:
+    import json
+    from json.decoder import JSONDecodeError
+
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+__all__ = [
+    "JSONDecodeError",
+    "get_parser_backends",
+    "parse_json",
+    "parse_yaml",
+    "use_parser_backends",
+]
+
+Content = Union[str, bytes, IO]
+
+
+def parse_json(content: Content) -> Any:
+    """
+    Parse a JSON document with the selected decoder, `simplejson`, with its C
+    extension, when installed or `json` otherwise.
+
+    `orjson` may be selected with :func:`use_parser_backends`. Mind that it
+    turns integers beyond 64 bits into floats. Documents it rejects, such as
+    those holding `NaN`, are parsed again with the default decoder, so
+    errors are always reported as its :exc:`JSONDecodeError`.
+    """
+    if hasattr(content, "read"):
+        content = content.read()
+
+    loads = _backends["json"][1]
+    if loads is not json.loads:
+        try:
+            return loads(content)
+        except ValueError:
+            pass
+    return json.loads(content)
+
+
+def parse_yaml(content: Content) -> Any:
+    """
+    Parse a YAML document safely, with the libyaml loader when available.
+    Errors are reported as :exc:`yaml.YAMLError`.
+    """
+    return yaml.load(content, Loader=_backends["yaml"][1])  # nosec
+
+
+def get_parser_backends() -> Dict[str, str]:
+    """
+    Name of the backends used to parse JSON and YAML documents.
+    """
+    return {kind: backend[0] for kind, backend in _backends.items()}
+
+
+def use_parser_backends(json_backend: str = None, yaml_backend: str = None) -> None:
+    """
+    Select the backends used to parse JSON and YAML documents, by name, out
+    of those available: `"simplejson"`, `"json"` or `"orjson"` for JSON and
+    `"libyaml"` or `"yaml"`, the pure-Python loader, for YAML. Raises
+    :exc:`ValueError` when the backend is not available.
+    """
+    with _backends_lock:
+        if json_backend is not None:
+            _backends["json"] = find_backend(JSON_BACKENDS, json_backend)
+        if yaml_backend is not None:
+            _backends["yaml"] = find_backend(YAML_BACKENDS, yaml_backend)
+
+
+###############################################################################
+# Internals
+###############################################################################
+Backend = Tuple[str, Any]
+
+# the first backend is the default one, always available
+JSON_BACKENDS: List[Backend] = [(json.__name__, json.loads)]
+if HAS_ORJSON:
+    JSON_BACKENDS.append(("orjson", orjson.loads))
+
+# from the fastest to the slowest
+YAML_BACKENDS: List[Backend] = []
+if hasattr(yaml, "CSafeLoader"):
+    YAML_BACKENDS.append(("libyaml", yaml.CSafeLoader))
+YAML_BACKENDS.append(("yaml", yaml.SafeLoader))
+
+
+def find_backend(backends: List[Backend], name: str) -> Backend:
+    for backend in backends:
+        if backend[0] == name:
+            return backend
+    raise ValueError(
+        "Parser backend '{}' is not available, pick one of: {}".format(
+            name, ", ".join(b[0] for b in backends)
+        )
+    )
+
+
+_backends: Dict[str, Backend] = {
+    "json": JSON_BACKENDS[0],
+    "yaml": YAML_BACKENDS[0],
+}
+_backends_lock = threading.Lock()
@@ -1,16 +1,33 @@
-from typing import Any
+import functools
+import threading
+from typing import Any, Callable, Dict, Tuple
+from urllib.parse import urlparse
 
 import requests
 import urllib3
 from logzero import logger
 
-from chaoslib import substitute
+from chaoslib import get_compiled_substitution, run_in_executor_in_context, substitute
+from chaoslib.cancellation import CancellationToken, get_cancellation_token
 from chaoslib.exceptions import ActivityFailed, InvalidActivity
-from chaoslib.types import Activity, Configuration, Secrets
+from chaoslib.settings import get_loaded_settings
+from chaoslib.types import Activity, Configuration, Secrets, Settings
 
-__all__ = ["run_http_activity", "validate_http_activity"]
+__all__ = [
+    "run_http_activity",
+    "run_http_activity_async",
+    "validate_http_activity",
+    "close_http_pools",
+    "get_http_pools_stats",
+]
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
+# connection pools shared by all HTTP activities of the process so that
+# keep-alive connections and TLS sessions are reused from one call to the next
+_adapters: Dict[Tuple[str, str, Any, int], requests.adapters.HTTPAdapter] = {}
+_adapters_lock = threading.Lock()
+_adapters_stats = {"created": 0, "reused": 0}
+
 
 def run_http_activity(
     activity: Activity, configuration: Configuration, secrets: Secrets
@@ -24,6 +41,11 @@ def run_http_activity(
     Raises :exc:`ActivityFailed` when a timeout occurs for the request or when
     the endpoint returns a status in the 400 or 500 ranges.
 
+    The request is sent from a thread of its own so the activity gives up on
+    it as soon as the run gets cancelled, see
+    :class:`chaoslib.cancellation.CancellationToken`. The abandoned request
+    completes, or times out, in the background and its response is closed.
+
     This should be considered as a private function.
     """
     provider = activity["provider"]
@@ -36,18 +58,17 @@ def run_http_activity(
     max_retries = provider.get("max_retries", 0)
 
     if arguments and (configuration or secrets):
-        arguments = substitute(arguments, configuration, secrets)
+        compiled = get_compiled_substitution(arguments)
+        arguments = compiled.render(configuration, secrets)
 
     if isinstance(timeout, list):
         timeout = tuple(timeout)
 
     try:
-        s = requests.Session()
-        a = requests.adapters.HTTPAdapter(max_retries=max_retries)
-        s.mount("http://", a)
-        s.mount("https://", a)
+        s = get_session(url, verify_tls, max_retries)
         if method == "GET":
-            r = s.get(
+            send = functools.partial(
+                s.get,
                 url,
                 params=arguments,
                 headers=headers,
@@ -56,7 +77,8 @@ def run_http_activity(
             )
         else:
             if headers and headers.get("Content-Type") == "application/json":
-                r = s.request(
+                send = functools.partial(
+                    s.request,
                     method,
                     url,
                     json=arguments,
@@ -65,7 +87,8 @@ def run_http_activity(
                     verify=verify_tls,
                 )
             else:
-                r = s.request(
+                send = functools.partial(
+                    s.request,
                     method,
                     url,
                     data=arguments,
@@ -73,6 +96,7 @@ def run_http_activity(
                     timeout=timeout,
                     verify=verify_tls,
                 )
+        r = send_cancellable(send, get_cancellation_token())
 
         body = None
         if r.headers.get("Content-Type") == "application/json":
@@ -98,6 +122,23 @@ def run_http_activity(
         raise ActivityFailed("activity took too long to complete")
 
 
+async def run_http_activity_async(
+    activity: Activity, configuration: Configuration, secrets: Secrets
+) -> Any:
+    """
+    Run a HTTP activity from within an event loop.
+
+    The request is performed in the loop's default executor, through the
+    same shared connection pools as :func:`run_http_activity`, so that it
+    does not block the loop.
+
+    This should be considered as a private function.
+    """
+    return await run_in_executor_in_context(
+        None, run_http_activity, activity, configuration, secrets
+    )
+
+
 def validate_http_activity(activity: Activity):
     """
     Validate a HTTP activity.
@@ -123,3 +164,135 @@ def validate_http_activity(activity: Activity):
     headers = provider.get("headers")
     if headers and not type(headers) == dict:
         raise InvalidActivity("a HTTP activities expect headers as a mapping")
+
+
+def get_session(
+    url: str, verify_tls: Any = True, max_retries: int = 0
+) -> requests.Session:
+    """
+    Create a session for the given `url` which relies on a connection pool
+    shared with any previous call to the same scheme and host, with the same
+    TLS verification and retries.
+
+    A new session is returned on each call so that state such as cookies is
+    never leaked from one activity to another. Only the connections are
+    shared.
+    """
+    s = requests.Session()
+    a = get_http_adapter(url, verify_tls, max_retries)
+    s.mount("http://", a)
+    s.mount("https://", a)
+    return s
+
+
+def get_http_adapter(
+    url: str,
+    verify_tls: Any = True,
+    max_retries: int = 0,
+    settings: Settings = None,
+) -> requests.adapters.HTTPAdapter:
+    """
+    Lookup the adapter, and its connection pool, for the given `url` or
+    create it if none exists yet.
+
+    The size of the pools can be set in the settings:
+
+    ```yaml
+    runtime:
+      http:
+        pool_connections: 10
+        pool_maxsize: 10
+    ```
+    """
+    p = urlparse(url)
+    key = (p.scheme, p.netloc, verify_tls, max_retries)
+
+    with _adapters_lock:
+        a = _adapters.get(key)
+        if a is not None:
+            _adapters_stats["reused"] += 1
+            return a
+
+        settings = settings if settings is not None else get_loaded_settings()
+        http_settings = (settings or {}).get("runtime", {}).get("http", {})
+        a = requests.adapters.HTTPAdapter(
+            pool_connections=http_settings.get("pool_connections", 10),
+            pool_maxsize=http_settings.get("pool_maxsize", 10),
+            max_retries=max_retries,
+        )
+        _adapters[key] = a
+        _adapters_stats["created"] += 1
+        logger.debug(f"Created HTTP connection pool for '{p.scheme}://{p.netloc}'")
+        return a
+
+
+def close_http_pools() -> None:
+    """
+    Close all the connection pools used by HTTP activities and reset their
+    statistics.
+    """
+    with _adapters_lock:
+        adapters = list(_adapters.values())
+        _adapters.clear()
+        _adapters_stats["created"] = 0
+        _adapters_stats["reused"] = 0
+
+    for a in adapters:
+        try:
+            a.close()
+        except Exception:
+            logger.debug("Failed to close HTTP connection pool", exc_info=True)
+
+
+def get_http_pools_stats() -> Dict[str, int]:
+    """
+    Statistics about the connection pools used by HTTP activities:
+
+    * `"pools"`: how many pools are currently opened
+    * `"created"`: how many pools were created
+    * `"reused"`: how many times a call reused an existing pool
+    """
+    with _adapters_lock:
+        return {
+            "pools": len(_adapters),
+            "created": _adapters_stats["created"],
+            "reused": _adapters_stats["reused"],
+        }
+
+
+def send_cancellable(
+    send: Callable[[], requests.Response], cancel: CancellationToken
+) -> requests.Response:
+    """
+    Send the request and wait for its response, unless the token gets
+    cancelled first.
+    """
+    cancel.raise_if_cancelled()
+    if not cancel.cancellable:
+        return send()
+
+    done = threading.Event()
+    outcome = {}
+
+    def call() -> None:
+        try:
+            outcome["response"] = send()
+        except BaseException as x:
+            outcome["error"] = x
+        finally:
+            done.set()
+            if cancel.cancelled and "response" in outcome:
+                outcome["response"].close()
+
+    unregister = cancel.register(done.set)
+    try:
+        threading.Thread(target=call, name="chaoslib-http", daemon=True).start()
+        done.wait()
+    finally:
+        unregister()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    if "response" not in outcome:
+        cancel.raise_if_cancelled()
+    return outcome["response"]
@@ -1,17 +1,294 @@
+import asyncio
+import codecs
+import functools
 import itertools
+import json
+import mmap
 import os
 import os.path
+import queue
+import re
 import shutil
+import signal
 import subprocess
-from typing import Any
+import tempfile
+import threading
+import time
+import weakref
+from typing import IO, Any, Dict, List, Optional, Pattern, Tuple, Union
 
 from logzero import logger
 
-from chaoslib import decode_bytes, substitute
+from chaoslib import (
+    PayloadEncoder,
+    decode_bytes,
+    detect_encoding,
+    get_compiled_substitution,
+    run_in_executor_in_context,
+)
+from chaoslib.cancellation import CancellationToken, get_cancellation_token
+from chaoslib.context import RunContext, get_run_context
 from chaoslib.exceptions import ActivityFailed, InvalidActivity
-from chaoslib.types import Activity, Configuration, Secrets
+from chaoslib.parsers import parse_json
+from chaoslib.settings import get_loaded_settings
+from chaoslib.types import Activity, Configuration, Secrets, Settings
 
-__all__ = ["run_process_activity", "validate_process_activity"]
+__all__ = [
+    "OutputCapture",
+    "PersistentProcess",
+    "read_spilled_output",
+    "remove_spilled_outputs",
+    "run_process_activity",
+    "run_process_activity_async",
+    "search_spilled_output",
+    "shutdown_persistent_processes",
+    "validate_process_activity",
+]
+
+
+class OutputCapture:
+    """
+    Capture a stream of the process without holding all of it in memory.
+
+    Up to `head_bytes` are kept in memory. Beyond that, the whole output is
+    written to a temporary file, created in `spill_dir`, and only its last
+    `tail_bytes` are kept in memory as well.
+    """
+
+    def __init__(
+        self,
+        head_bytes: int = 4 * 1024 * 1024,
+        tail_bytes: int = 1024 * 1024,
+        spill_dir: str = None,
+    ) -> None:
+        self.head_bytes = head_bytes
+        self.tail_bytes = tail_bytes
+        self.spill_dir = spill_dir
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.size = 0
+        self.spill_file = None
+        self.path = None
+        self.discarded = False
+        self.lock = threading.Lock()
+
+    @property
+    def spilled(self) -> bool:
+        return self.path is not None
+
+    def write(self, chunk: bytes) -> None:
+        with self.lock:
+            if not self.discarded:
+                self.append(chunk)
+
+    def append(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.path is None:
+            room = self.head_bytes - len(self.head)
+            if len(chunk) <= room:
+                self.head.extend(chunk)
+                return
+            self.head.extend(chunk[:room])
+            self.spill()
+            chunk = chunk[room:]
+
+        self.spill_file.write(chunk)
+        self.tail.extend(chunk)
+        if len(self.tail) > self.tail_bytes:
+            del self.tail[: len(self.tail) - self.tail_bytes]
+
+    def spill(self) -> None:
+        f = tempfile.NamedTemporaryFile(
+            prefix="chaostoolkit-process-",
+            suffix=".out",
+            dir=self.spill_dir,
+            delete=False,
+        )
+        self.spill_file = f
+        self.path = f.name
+        f.write(self.head)
+        logger.debug(
+            "Process output is larger than {} bytes, spilling it to '{}'".format(
+                self.head_bytes, self.path
+            )
+        )
+
+    def consume(self, stream: IO[bytes]) -> None:
+        """
+        Read the stream until its end, from a dedicated thread.
+        """
+        try:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                self.write(chunk)
+        finally:
+            stream.close()
+
+    async def consume_async(self, stream: asyncio.StreamReader) -> None:
+        """
+        Read the stream until its end, from the event loop.
+        """
+        while True:
+            chunk = await stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            self.write(chunk)
+
+    def close(self) -> None:
+        with self.lock:
+            if self.spill_file is not None:
+                self.spill_file.close()
+                self.spill_file = None
+
+    def discard(self) -> None:
+        """
+        Close and remove the spilled file, when the output is not needed. What
+        is still read from the stream afterwards is ignored.
+        """
+        with self.lock:
+            self.discarded = True
+        self.close()
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class PersistentProcess:
+    """
+    A helper executable started once and sent a request every time its
+    activity runs, rather than started anew.
+
+    Requests and responses are JSON documents, one per line, exchanged over
+    the standard input and output of the helper. A request holds an `"id"`,
+    the `"activity"` name and its `"request"` payload. The helper answers
+    with a document holding the same `"id"` along with the `"status"`,
+    `"stdout"` and `"stderr"` of the check, which are the result of the
+    activity. Lines of its output which are not such a document are
+    ignored and its standard error is logged.
+
+    The helper is started again when it exited, or was killed because it
+    took too long to respond, before the next request. It is asked to stop
+    by closing its standard input.
+    """
+
+    def __init__(self, arguments: List[str]) -> None:
+        self.arguments = arguments
+        self.proc = None
+        self.responses = None
+        self.request_id = 0
+        self.starts = 0
+        self.lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self) -> None:
+        if self.proc is not None:
+            logger.warning(
+                "Persistent process {} exited with code {}, restarting it".format(
+                    self.arguments, self.proc.returncode
+                )
+            )
+        logger.debug(f"Starting persistent process: {str(self.arguments)}")
+        self.proc = subprocess.Popen(
+            self.arguments,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=os.environ,
+        )
+        self.starts += 1
+        self.responses = queue.Queue()
+        threading.Thread(
+            target=read_lines, args=(self.proc.stdout, self.responses), daemon=True
+        ).start()
+        threading.Thread(
+            target=log_lines, args=(self.proc.stderr, self.arguments[0]), daemon=True
+        ).start()
+
+    def request(
+        self,
+        payload: Dict[str, Any],
+        timeout: float = None,
+        cancel: CancellationToken = None,
+    ) -> Dict[str, Any]:
+        """
+        Send the payload to the helper, starting it when needed, and wait
+        for its response. Raises :exc:`ActivityFailed` when the helper
+        exits or does not respond in time. The helper is killed when
+        `cancel` gets cancelled.
+        """
+        cancel = cancel if cancel is not None else CancellationToken()
+        with self.lock:
+            if not self.alive:
+                self.start()
+
+            unregister = cancel.register(self.proc.kill)
+            try:
+                return self.exchange(payload, timeout, cancel)
+            finally:
+                unregister()
+
+    def exchange(
+        self, payload: Dict[str, Any], timeout: float, cancel: CancellationToken
+    ) -> Dict[str, Any]:
+        self.request_id += 1
+        request_id = self.request_id
+        line = json.dumps(dict(payload, id=request_id), cls=PayloadEncoder)
+        try:
+            self.proc.stdin.write(line.encode("utf-8") + b"\n")
+            self.proc.stdin.flush()
+        except OSError:
+            self.kill()
+            cancel.raise_if_cancelled()
+            raise ActivityFailed(
+                "persistent process exited with code {} before it was "
+                "sent the request".format(self.proc.returncode)
+            )
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                line = self.responses.get(timeout=remaining_time(deadline))
+            except queue.Empty:
+                self.kill()
+                raise ActivityFailed("process activity took too long to complete")
+
+            if line is None:
+                self.kill()
+                cancel.raise_if_cancelled()
+                raise ActivityFailed(
+                    "persistent process exited with code {} before it "
+                    "responded".format(self.proc.returncode)
+                )
+
+            response = parse_response(line)
+            if response is not None and response.get("id") == request_id:
+                return response
+
+    def kill(self) -> None:
+        if self.proc is None:
+            return
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self.proc.stdin.close()
+
+    def stop(self, timeout: float = 5) -> None:
+        """
+        Ask the helper to exit, kill it when it does not in time.
+        """
+        with self.lock:
+            if not self.alive:
+                return
+            logger.debug(f"Stopping persistent process: {str(self.arguments)}")
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=timeout)
+            except (OSError, subprocess.TimeoutExpired):
+                self.kill()
 
 
 def run_process_activity(
@@ -25,58 +302,162 @@ def run_process_activity(
 
     Raises :exc:`ActivityFailed` when a the process takes longer than the
     timeout defined in the activity. There is no timeout by default so be
-    careful when you do not explicitly provide one.
+    careful when you do not explicitly provide one. The process, and the
+    children it started, are killed when it times out or when the run gets
+    cancelled, see :class:`chaoslib.cancellation.CancellationToken`.
+
+    The output of the process is streamed rather than buffered. Only its
+    head and tail are kept in memory when it is larger than the limits set
+    in the settings:
+
+    ```yaml
+    runtime:
+      process:
+        capture:
+          head_bytes: 4194304
+          tail_bytes: 1048576
+          spill_dir: /var/tmp
+    ```
+
+    The whole output is then written to a file, referenced by the
+    `stdout_file` or `stderr_file` keys of the result, along with its size.
+    These files are removed once the experiment has completed, unless
+    `runtime.process.capture.keep` is set to `true`, see
+    :func:`remove_spilled_outputs`.
+
+    When the provider sets `"persistent": true`, the executable is rather
+    started once per run and sent the `"request"` of the provider every time
+    the activity runs, see :class:`PersistentProcess`. This saves the start
+    up of the executable to probes run repeatedly, such as those of a
+    continuous hypothesis.
 
     This should be considered as a private function.
     """
     provider = activity["provider"]
+    if provider.get("persistent"):
+        return run_persistent_process_activity(activity, configuration, secrets)
+
     timeout = provider.get("timeout", None)
-    arguments = provider.get("arguments", [])
+    arguments, shell = build_process_arguments(activity, configuration, secrets)
+    stdout, stderr = make_output_captures()
 
-    if arguments and (configuration or secrets):
-        arguments = substitute(arguments, configuration, secrets)
+    logger.debug(f"Running: {str(arguments)}")
+    deadline = None if timeout is None else time.monotonic() + timeout
+    proc = subprocess.Popen(
+        arguments,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=os.environ,
+        shell=shell,
+        start_new_session=os.name == "posix",
+    )
+    readers = [
+        threading.Thread(target=stdout.consume, args=(proc.stdout,), daemon=True),
+        threading.Thread(target=stderr.consume, args=(proc.stderr,), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
 
-    shell = False
-    path = shutil.which(os.path.expanduser(provider["path"]))
-    if isinstance(arguments, str):
-        shell = True
-        arguments = f"{path} {arguments}"
-    else:
-        if isinstance(arguments, dict):
-            arguments = itertools.chain.from_iterable(arguments.items())
+    cancel = get_cancellation_token()
+    unregister = cancel.register(functools.partial(kill_process_group, proc))
+    try:
+        proc.wait(timeout=remaining_time(deadline))
+        # as when the output was buffered, the process is only done once its
+        # output was read, which must be in time as well
+        for reader in readers:
+            reader.join(remaining_time(deadline))
+        cancel.raise_if_cancelled()
+        if remaining_time(deadline) == 0 or any(r.is_alive() for r in readers):
+            raise subprocess.TimeoutExpired(arguments, timeout)
+    except BaseException as x:
+        # its children may hold on to the pipes long after it exited
+        kill_process_group(proc)
+        proc.wait()
+        for reader in readers:
+            reader.join(READER_GRACE_PERIOD)
+        stdout.discard()
+        stderr.discard()
+        if isinstance(x, subprocess.TimeoutExpired):
+            raise ActivityFailed("process activity took too long to complete")
+        raise
+    finally:
+        unregister()
 
-        arguments = list(str(p) for p in arguments if p not in (None, ""))
-        arguments.insert(0, path)
+    for reader in readers:
+        reader.join()
+    stdout.close()
+    stderr.close()
 
-    try:
-        logger.debug(f"Running: {str(arguments)}")
-        proc = subprocess.run(
+    return process_result(activity, proc.returncode, stdout, stderr)
+
+
+async def run_process_activity_async(
+    activity: Activity, configuration: Configuration, secrets: Secrets
+) -> Any:
+    """
+    Run a process activity from within an event loop, without blocking it
+    while the process runs.
+
+    The process is killed when it takes longer than the timeout defined in
+    the activity or when the awaiting task gets cancelled.
+
+    Requests to a persistent process are sent from the loop's default
+    executor and are not interrupted when the awaiting task gets cancelled.
+
+    This should be considered as a private function.
+    """
+    provider = activity["provider"]
+    if provider.get("persistent"):
+        return await run_in_executor_in_context(
+            None, run_persistent_process_activity, activity, configuration, secrets
+        )
+
+    timeout = provider.get("timeout", None)
+    arguments, shell = build_process_arguments(activity, configuration, secrets)
+    stdout, stderr = make_output_captures()
+
+    logger.debug(f"Running: {str(arguments)}")
+    if shell:
+        proc = await asyncio.create_subprocess_shell(
             arguments,
-            timeout=timeout,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
             env=os.environ,
-            shell=shell,
+            start_new_session=os.name == "posix",
         )
-    except subprocess.TimeoutExpired:
-        raise ActivityFailed("process activity took too long to complete")
-
-    # kind warning to the user that this process returned a non--zero
-    # exit code, as traditionally used to indicate a failure,
-    # but not during the hypothesis check because that could also be
-    # exactly what the user want. This warning is helpful during the
-    # method and rollbacks
-    if "tolerance" not in activity and proc.returncode > 0:
-        logger.warning(
-            "This process returned a non-zero exit code. "
-            "This may indicate some error and not what you expected. "
-            "Please have a look at the logs."
+    else:
+        proc = await asyncio.create_subprocess_exec(
+            *arguments,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=os.environ,
+            start_new_session=os.name == "posix",
         )
 
-    stdout = decode_bytes(proc.stdout)
-    stderr = decode_bytes(proc.stderr)
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(
+                stdout.consume_async(proc.stdout),
+                stderr.consume_async(proc.stderr),
+                proc.wait(),
+            ),
+            timeout,
+        )
+    except asyncio.TimeoutError:
+        await kill_process(proc)
+        stdout.discard()
+        stderr.discard()
+        raise ActivityFailed("process activity took too long to complete")
+    except asyncio.CancelledError:
+        await kill_process(proc)
+        stdout.discard()
+        stderr.discard()
+        raise
+    finally:
+        stdout.close()
+        stderr.close()
 
-    return {"status": proc.returncode, "stdout": stdout, "stderr": stderr}
+    return process_result(activity, proc.returncode, stdout, stderr)
 
 
 def validate_process_activity(activity: Activity):
@@ -87,6 +468,8 @@ def validate_process_activity(activity: Activity):
 
     * a `"path"` key which is an absolute path to an executable the current
       user can call
+    * its `"arguments"` to be a list when it is `"persistent"`, as it is not
+      started through the shell
 
     In all failing cases, raises :exc:`InvalidActivity`.
 
@@ -113,3 +496,373 @@ def validate_process_activity(activity: Activity):
                 path=raw_path, name=name
             )
         )
+
+    if provider.get("persistent") and isinstance(provider.get("arguments"), str):
+        raise InvalidActivity(
+            "a persistent process activity must have its arguments as a list, "
+            "in activity '{name}'".format(name=name)
+        )
+
+
+def shutdown_persistent_processes(run_context: RunContext = None) -> None:
+    """
+    Stop the persistent processes started during the run, this is done by
+    the runner once the experiment has completed.
+    """
+    run_context = run_context if run_context is not None else get_run_context()
+    with _persistent_processes_lock:
+        processes = _persistent_processes.pop(run_context, {})
+
+    for process in processes.values():
+        try:
+            process.stop()
+        except Exception:
+            logger.debug("Failed to stop persistent process", exc_info=True)
+
+
+def remove_spilled_outputs(
+    run_context: RunContext = None, settings: Settings = None
+) -> None:
+    """
+    Remove the files the outputs of the process activities of the run were
+    spilled to, unless `runtime.process.capture.keep` is set. This is done by
+    the runner once the experiment has completed.
+    """
+    run_context = run_context if run_context is not None else get_run_context()
+    with _spilled_outputs_lock:
+        paths = _spilled_outputs.pop(run_context, [])
+
+    settings = settings if settings is not None else get_loaded_settings()
+    capture = (settings or {}).get("runtime", {}).get("process", {}).get("capture", {})
+    if capture.get("keep", False):
+        return
+
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            logger.debug(f"Failed to remove spilled output '{path}'", exc_info=True)
+
+
+###############################################################################
+# Internals
+###############################################################################
+def build_process_arguments(
+    activity: Activity, configuration: Configuration, secrets: Secrets
+) -> Tuple[Union[str, List[str]], bool]:
+    """
+    Build the command line of the process activity and tell if it must be
+    run through the shell, which is the case when its arguments are given
+    as a string.
+    """
+    provider = activity["provider"]
+    arguments = provider.get("arguments", [])
+
+    if arguments and (configuration or secrets):
+        compiled = get_compiled_substitution(arguments)
+        arguments = compiled.render(configuration, secrets)
+
+    shell = False
+    path = shutil.which(os.path.expanduser(provider["path"]))
+    if isinstance(arguments, str):
+        shell = True
+        arguments = f"{path} {arguments}"
+    else:
+        if isinstance(arguments, dict):
+            arguments = itertools.chain.from_iterable(arguments.items())
+
+        arguments = list(str(p) for p in arguments if p not in (None, ""))
+        arguments.insert(0, path)
+
+    return arguments, shell
+
+
+def process_result(
+    activity: Activity,
+    returncode: int,
+    stdout: Union[bytes, OutputCapture],
+    stderr: Union[bytes, OutputCapture],
+) -> Dict[str, Any]:
+    """
+    Build the output of a process activity once the process has completed.
+    """
+    warn_on_failure(activity, returncode)
+
+    # a process tends to always write the same encoding, remember it
+    path = activity.get("provider", {}).get("path")
+    result = {"status": returncode}
+    for name, output in (("stdout", stdout), ("stderr", stderr)):
+        cache_key = (activity.get("name"), path, name)
+        if isinstance(output, OutputCapture):
+            if output.spilled:
+                result[name] = summarize_spilled_output(output)
+                result[f"{name}_file"] = output.path
+                result[f"{name}_size"] = output.size
+                remember_spilled_output(output.path)
+                continue
+            output = bytes(output.head)
+        result[name] = decode_bytes(output, cache_key=cache_key)
+
+    return result
+
+
+def warn_on_failure(activity: Activity, returncode: int) -> None:
+    # kind warning to the user that this process returned a non--zero
+    # exit code, as traditionally used to indicate a failure,
+    # but not during the hypothesis check because that could also be
+    # exactly what the user want. This warning is helpful during the
+    # method and rollbacks
+    if "tolerance" not in activity and returncode > 0:
+        logger.warning(
+            "This process returned a non-zero exit code. "
+            "This may indicate some error and not what you expected. "
+            "Please have a look at the logs."
+        )
+
+
+def run_persistent_process_activity(
+    activity: Activity, configuration: Configuration, secrets: Secrets
+) -> Dict[str, Any]:
+    provider = activity["provider"]
+    arguments, _ = build_process_arguments(activity, configuration, secrets)
+    process = get_persistent_process(arguments)
+
+    request = provider.get("request", {})
+    if request and (configuration or secrets):
+        request = get_compiled_substitution(request).render(configuration, secrets)
+
+    response = process.request(
+        {"activity": activity.get("name"), "request": request},
+        timeout=provider.get("timeout"),
+        cancel=get_cancellation_token(),
+    )
+
+    status = response.get("status", 0)
+    warn_on_failure(activity, status)
+    return {
+        "status": status,
+        "stdout": response.get("stdout", ""),
+        "stderr": response.get("stderr", ""),
+    }
+
+
+def get_persistent_process(
+    arguments: List[str], run_context: RunContext = None
+) -> PersistentProcess:
+    """
+    The persistent process of the run for this command line, created the
+    first time it is asked for.
+    """
+    run_context = run_context if run_context is not None else get_run_context()
+    with _persistent_processes_lock:
+        processes = _persistent_processes.setdefault(run_context, {})
+        key = tuple(arguments)
+        if key not in processes:
+            processes[key] = PersistentProcess(arguments)
+        return processes[key]
+
+
+def parse_response(line: bytes) -> Optional[Dict[str, Any]]:
+    try:
+        response = parse_json(line)
+    except ValueError:
+        logger.debug(f"Ignoring output of persistent process: {line!r}")
+        return None
+    return response if isinstance(response, dict) else None
+
+
+def read_lines(stream: IO[bytes], lines: queue.Queue) -> None:
+    try:
+        for line in iter(stream.readline, b""):
+            lines.put(line)
+    finally:
+        lines.put(None)
+        stream.close()
+
+
+def log_lines(stream: IO[bytes], name: str) -> None:
+    try:
+        for line in iter(stream.readline, b""):
+            logger.debug(
+                "{}: {}".format(name, line.decode("utf-8", errors="replace").rstrip())
+            )
+    finally:
+        stream.close()
+
+
+def search_spilled_output(pattern: str, path: str) -> bool:
+    """
+    Tell if the regular expression matches the output spilled to the given
+    file, as it would match that output decoded in memory. The file is
+    memory-mapped and decoded a chunk at a time, as UTF-8 or the encoding
+    detected otherwise, so it can be larger than the available memory.
+
+    Consecutive chunks overlap by `SEARCH_OVERLAP` characters, a match
+    straddling two chunks is only found when it spans fewer characters
+    than half of that, including what its lookarounds look at.
+    """
+    rx = re.compile(pattern)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return rx.search("") is not None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            try:
+                return search_decoded_output(rx, mm, "utf-8")
+            except UnicodeDecodeError as x:
+                encoding = detect_encoding(mm, x.start)
+
+            try:
+                return search_decoded_output(rx, mm, encoding)
+            except (UnicodeDecodeError, LookupError):
+                raise ActivityFailed(
+                    f"Failed to decode bytes using encoding '{encoding}'"
+                )
+
+
+def read_spilled_output(path: str) -> str:
+    """
+    Read and decode the whole output spilled to the given file.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return decode_bytes(mm[:])
+
+
+CHUNK_SIZE = 64 * 1024
+# spilled outputs are searched a chunk of that many bytes at a time
+SEARCH_CHUNK_SIZE = 1024 * 1024
+SEARCH_OVERLAP = 64 * 1024
+# how long to wait for the pipes of a killed process to be drained
+READER_GRACE_PERIOD = 1
+
+
+def get_capture_settings(settings: Settings = None) -> Dict[str, Any]:
+    settings = settings if settings is not None else get_loaded_settings()
+    capture = (settings or {}).get("runtime", {}).get("process", {}).get("capture", {})
+    return {
+        "head_bytes": capture.get("head_bytes", 4 * 1024 * 1024),
+        "tail_bytes": capture.get("tail_bytes", 1024 * 1024),
+        "spill_dir": capture.get("spill_dir"),
+    }
+
+
+def remaining_time(deadline: Optional[float]) -> Optional[float]:
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
+
+
+def make_output_captures() -> Tuple[OutputCapture, OutputCapture]:
+    limits = get_capture_settings()
+    return OutputCapture(**limits), OutputCapture(**limits)
+
+
+def search_decoded_output(rx: Pattern, data: mmap.mmap, encoding: str) -> bool:
+    """
+    Search the data decoded a chunk at a time, each chunk being searched
+    along with the end of the previous one. Matches ending close to the
+    end of a chunk, which could depend on what follows, are left to the
+    next chunk unless it is the last one.
+
+    A :exc:`UnicodeDecodeError` raised when the data cannot be decoded has
+    its `start` set to the position of the invalid byte in the data.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    size = len(data)
+    margin = SEARCH_OVERLAP // 2
+    carry = ""
+    pos = 0
+    for start in range(0, size, SEARCH_CHUNK_SIZE):
+        end = min(start + SEARCH_CHUNK_SIZE, size)
+        try:
+            text = decoder.decode(data[start:end], final=end == size)
+        except UnicodeDecodeError as x:
+            x.start += start
+            raise
+
+        window = carry + text
+        m = rx.search(window, pos)
+        while m is not None:
+            if end == size or m.end() <= len(window) - margin:
+                return True
+            if m.start() >= len(window) - SEARCH_OVERLAP:
+                # searched again along with the next chunk
+                break
+            m = rx.search(window, m.start() + 1)
+
+        if len(window) > SEARCH_OVERLAP + 1:
+            # once the start of the data is dropped, the first character
+            # carried over is only there as the context of the next ones,
+            # such as for `\b`, `^` then no longer matches before them
+            pos = 1
+        carry = window[-(SEARCH_OVERLAP + 1) :]
+    return False
+
+
+def summarize_spilled_output(output: OutputCapture) -> str:
+    """
+    The head and the tail of a spilled output, around a note telling how
+    much was left out and where to find it.
+    """
+    omitted = output.size - len(output.head) - len(output.tail)
+    return "{}\n[... {} bytes omitted, the full output is in {} ...]\n{}".format(
+        decode_excerpt(bytes(output.head)),
+        max(omitted, 0),
+        output.path,
+        decode_excerpt(bytes(output.tail)),
+    )
+
+
+def decode_excerpt(data: bytes) -> str:
+    # an excerpt may be cut in the middle of a character, its encoding is
+    # not remembered as it may well be a wrong guess
+    try:
+        return decode_bytes(data)
+    except ActivityFailed:
+        return data.decode("utf-8", errors="replace")
+
+
+def remember_spilled_output(path: str) -> None:
+    with _spilled_outputs_lock:
+        _spilled_outputs.setdefault(get_run_context(), []).append(path)
+
+
+def kill_process_group(proc: subprocess.Popen) -> None:
+    """
+    Kill the process, and its children when it runs in its own session.
+    """
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def kill_process(proc: asyncio.subprocess.Process):
+    """
+    Kill the process, and its children when it runs in its own session, and
+    drain its pipes so they are closed before the loop goes away.
+    """
+    try:
+        if os.name == "posix":
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except ProcessLookupError:
+        pass
+    await proc.communicate()
+
+
+PersistentProcesses = Dict[Tuple[str, ...], PersistentProcess]
+_persistent_processes: "weakref.WeakKeyDictionary[RunContext, PersistentProcesses]" = (
+    weakref.WeakKeyDictionary()
+)
+_persistent_processes_lock = threading.Lock()
+_spilled_outputs: "weakref.WeakKeyDictionary[RunContext, List[str]]" = (
+    weakref.WeakKeyDictionary()
+)
+_spilled_outputs_lock = threading.Lock()
@@ -1,16 +1,43 @@
+import asyncio
+import atexit
+import functools
 import importlib
 import inspect
+import multiprocessing
+import os
+import pickle
+import signal
 import sys
+import threading
 import traceback
-from typing import Any
+from multiprocessing.connection import Connection
+from types import ModuleType
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 from logzero import logger
 
-from chaoslib import substitute
-from chaoslib.exceptions import ActivityFailed, InvalidActivity
-from chaoslib.types import Activity, Configuration, Secrets
+from chaoslib import get_compiled_substitution, run_in_executor_in_context
+from chaoslib.cancellation import CancellationToken, get_cancellation_token
+from chaoslib.exceptions import ActivityCancelled, ActivityFailed, InvalidActivity
+from chaoslib.settings import get_loaded_settings
+from chaoslib.types import Activity, Configuration, Secrets, Settings
 
-__all__ = ["run_python_activity", "validate_python_activity"]
+try:
+    from multiprocessing.shared_memory import SharedMemory
+
+    HAS_SHARED_MEMORY = True
+except ImportError:
+    HAS_SHARED_MEMORY = False
+
+__all__ = [
+    "PythonWorkerPool",
+    "clear_resolved_functions",
+    "get_python_workers",
+    "run_python_activity",
+    "run_python_activity_async",
+    "shutdown_python_workers",
+    "validate_python_activity",
+]
 
 
 def run_python_activity(
@@ -22,44 +49,244 @@ def run_python_activity(
     A python activity is a function from any importable module. The result
     of that function is returned as the activity's output.
 
+    The function is called from the current thread unless the activity is
+    isolated, see :class:`PythonWorkerPool`, in which case its `timeout` is
+    enforced.
+
+    A function with a `cancel` parameter is given the token of the run, see
+    :class:`chaoslib.cancellation.CancellationToken`, so it can stop when
+    the run gets cancelled.
+
     This should be considered as a private function.
     """
-    provider = activity["provider"]
-    mod_path = provider["module"]
-    func_name = provider["func"]
-    mod = importlib.import_module(mod_path)
-    func = getattr(mod, func_name)
-    try:
-        logger.debug(
-            "Activity '{}' loaded from '{}'".format(
-                activity.get("name"), inspect.getfile(func)
-            )
+    func, arguments = load_python_activity(activity, configuration, secrets)
+    if is_isolated(activity):
+        provider = activity["provider"]
+        arguments.pop("cancel", None)
+        return get_python_workers().run(
+            provider["module"],
+            provider["func"],
+            arguments,
+            timeout=activity.get("timeout"),
+            cancel=get_cancellation_token(),
         )
-    except TypeError:
-        pass
 
-    arguments = provider.get("arguments", {}).copy()
+    try:
+        return func(**arguments)
+    except ActivityCancelled:
+        raise
+    except Exception as x:
+        raise ActivityFailed(
+            traceback.format_exception_only(type(x), x)[0].strip()
+        ).with_traceback(sys.exc_info()[2])
 
-    if configuration or secrets:
-        arguments = substitute(arguments, configuration, secrets)
 
-    sig = inspect.signature(func)
-    if "secrets" in provider and "secrets" in sig.parameters:
-        arguments["secrets"] = {}
-        for s in provider["secrets"]:
-            arguments["secrets"].update(secrets.get(s, {}).copy())
+async def run_python_activity_async(
+    activity: Activity, configuration: Configuration, secrets: Secrets
+) -> Any:
+    """
+    Run a Python activity from within an event loop.
 
-    if "configuration" in sig.parameters:
-        arguments["configuration"] = configuration.copy()
+    Coroutine functions are awaited directly. Regular functions are run in
+    the loop's default executor so they do not block the loop. Isolated
+    activities are awaited from the default executor as well.
+
+    This should be considered as a private function.
+    """
+    func, arguments = load_python_activity(activity, configuration, secrets)
+    if is_isolated(activity):
+        provider = activity["provider"]
+        arguments.pop("cancel", None)
+        run = functools.partial(
+            get_python_workers().run,
+            provider["module"],
+            provider["func"],
+            arguments,
+            timeout=activity.get("timeout"),
+            cancel=get_cancellation_token(),
+        )
+        return await run_in_executor_in_context(None, run)
 
     try:
-        return func(**arguments)
+        if inspect.iscoroutinefunction(func):
+            return await func(**arguments)
+
+        return await run_in_executor_in_context(None, func, **arguments)
+    except ActivityCancelled:
+        raise
     except Exception as x:
         raise ActivityFailed(
             traceback.format_exception_only(type(x), x)[0].strip()
         ).with_traceback(sys.exc_info()[2])
 
 
+class PythonWorkerPool:
+    """
+    Warm worker processes Python activities are run in when they are
+    isolated, either because the `runtime.python.isolation` setting or the
+    `"isolation"` key of their provider is `"process"`:
+
+    ```yaml
+    runtime:
+      python:
+        isolation: process
+        max_workers: 8
+        start_method: spawn
+    ```
+
+    There are as many workers as CPUs by default, so CPU-bound probes do not
+    contend for the GIL with each other or with the runner's threads.
+    Workers are started when first needed and kept for the next activities.
+    Each one imports the modules of the activities it runs once.
+
+    A worker running an activity for longer than its `timeout` is killed
+    and the activity fails. Arguments and results are pickled. Results
+    larger than `shared_memory_threshold` bytes are handed over through
+    shared memory rather than the pipe to the worker.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        start_method: str = "spawn",
+        shared_memory_threshold: int = 1024 * 1024,
+    ) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.context = multiprocessing.get_context(start_method)
+        self.shared_memory_threshold = shared_memory_threshold
+        self.idle: List[PythonWorker] = []
+        self.size = 0
+        self.closed = False
+        self.available = threading.Condition()
+
+    def run(
+        self,
+        mod_name: str,
+        func_name: str,
+        arguments: Dict[str, Any],
+        timeout: float = None,
+        cancel: CancellationToken = None,
+    ) -> Any:
+        """
+        Call the function with the arguments from a worker and return its
+        result. Raises :exc:`ActivityFailed` when the function raised, took
+        longer than `timeout` or its worker exited.
+
+        The worker is killed when `cancel` gets cancelled. A function with
+        a `cancel` parameter is given a token of the worker which is never
+        cancelled.
+        """
+        try:
+            task = pickle.dumps(
+                (mod_name, func_name, arguments, self.shared_memory_threshold)
+            )
+        except Exception as x:
+            raise ActivityFailed(f"arguments of the activity cannot be pickled: {x}")
+
+        worker = self.acquire()
+        healthy = False
+        unregister = cancel.register(worker.process.kill) if cancel else None
+        try:
+            worker.conn.send_bytes(task)
+            if not worker.conn.poll(timeout):
+                raise ActivityFailed("activity took too long to complete")
+            message = worker.conn.recv()
+            healthy = True
+        except (EOFError, OSError):
+            if cancel is not None:
+                cancel.raise_if_cancelled()
+            worker.process.join(1)
+            raise ActivityFailed(
+                "Python worker exited with code {} while running the "
+                "activity".format(worker.process.exitcode)
+            )
+        finally:
+            if unregister is not None:
+                unregister()
+            self.release(worker, healthy)
+
+        return load_worker_result(message)
+
+    def acquire(self) -> "PythonWorker":
+        with self.available:
+            while True:
+                if self.closed:
+                    raise ActivityFailed("Python workers have been shut down")
+                if self.idle:
+                    return self.idle.pop()
+                if self.size < self.max_workers:
+                    self.size += 1
+                    break
+                self.available.wait()
+
+        try:
+            return PythonWorker(self.context)
+        except BaseException:
+            with self.available:
+                self.size -= 1
+                self.available.notify()
+            raise
+
+    def release(self, worker: "PythonWorker", healthy: bool) -> None:
+        with self.available:
+            keep = healthy and not self.closed
+            if keep:
+                self.idle.append(worker)
+            else:
+                self.size -= 1
+            self.available.notify()
+
+        if not healthy:
+            worker.kill()
+        elif not keep:
+            worker.stop()
+
+    def shutdown(self, timeout: float = 5) -> None:
+        """
+        Stop the idle workers, busy ones are stopped once done.
+        """
+        with self.available:
+            self.closed = True
+            idle = self.idle
+            self.idle = []
+            self.size -= len(idle)
+            self.available.notify_all()
+
+        for worker in idle:
+            worker.stop(timeout)
+
+
+def get_python_workers(settings: Settings = None) -> PythonWorkerPool:
+    """
+    Lookup the pool isolated Python activities run in or create it, from
+    the `runtime.python` settings, if none exists yet.
+    """
+    global _workers
+    with _workers_lock:
+        if _workers is None:
+            settings = settings if settings is not None else get_loaded_settings()
+            runtime = (settings or {}).get("runtime", {}).get("python", {})
+            _workers = PythonWorkerPool(
+                max_workers=runtime.get("max_workers"),
+                start_method=runtime.get("start_method", "spawn"),
+            )
+        return _workers
+
+
+def shutdown_python_workers(timeout: float = 5) -> None:
+    """
+    Stop the workers isolated Python activities run in. They are started
+    again when an activity needs them. This is called when the runner is
+    cleaned up and when the interpreter exits.
+    """
+    global _workers
+    with _workers_lock:
+        workers = _workers
+        _workers = None
+    if workers is not None:
+        workers.shutdown(timeout)
+
+
 def validate_python_activity(activity: Activity):  # noqa: C901
     """
     Validate a Python activity.
@@ -87,62 +314,64 @@ def validate_python_activity(activity: Activity):  # noqa: C901
         raise InvalidActivity("a Python activity must have a function name")
 
     try:
-        mod = importlib.import_module(mod_name)
+        resolved = resolve_python_function(mod_name, func)
     except ImportError:
         raise InvalidActivity(
             "could not find Python module '{mod}' "
             "in activity '{name}'".format(mod=mod_name, name=activity_name)
         )
+    except (AttributeError, TypeError):
+        # no such attribute or not a callable
+        resolved = None
 
     found_func = False
     arguments = provider.get("arguments", {})
-    candidates = set(inspect.getmembers(mod, inspect.isfunction)).union(
-        inspect.getmembers(mod, inspect.isbuiltin)
-    )
-    for name, cb in candidates:
-        if name == func:
-            found_func = True
-
-            # let's try to bind the activity's arguments with the function
-            # signature see if they match
-            sig = inspect.signature(cb)
-            try:
-                # config and secrets are provided through specific parameters
-                # to an activity that needs them. However, they are declared
-                # out of band of the `arguments` mapping. Here, we simply
-                # ensure the signature of the activity is valid by injecting
-                # fake `configuration` and `secrets` arguments into the mapping
-                args = arguments.copy()
-
-                if "secrets" in sig.parameters:
-                    args["secrets"] = None
-
-                if "configuration" in sig.parameters:
-                    args["configuration"] = None
-
-                sig.bind(**args)
-            except TypeError as x:
-                # I dislike this sort of lookup but not sure we can
-                # differentiate them otherwise
-                msg = str(x)
-                if "missing" in msg:
-                    arg = msg.rsplit(":", 1)[1].strip()
-                    raise InvalidActivity(
-                        "required argument {arg} is missing from "
-                        "activity '{name}'".format(arg=arg, name=name)
-                    )
-                elif "unexpected" in msg:
-                    arg = msg.rsplit(" ", 1)[1].strip()
-                    raise InvalidActivity(
-                        "argument {arg} is not part of the "
-                        "function signature in activity '{name}'".format(
-                            arg=arg, name=name
-                        )
-                    )
-                else:
-                    # another error? let's fail fast
-                    raise
-            break
+    if resolved and (
+        inspect.isfunction(resolved.func) or inspect.isbuiltin(resolved.func)
+    ):
+        found_func = True
+        name = func
+
+        # let's try to bind the activity's arguments with the function
+        # signature see if they match
+        sig = resolved.signature
+        try:
+            # config and secrets are provided through specific parameters
+            # to an activity that needs them. However, they are declared
+            # out of band of the `arguments` mapping. Here, we simply
+            # ensure the signature of the activity is valid by injecting
+            # fake `configuration` and `secrets` arguments into the mapping
+            args = arguments.copy()
+
+            if resolved.wants_secrets:
+                args["secrets"] = None
+
+            if resolved.wants_configuration:
+                args["configuration"] = None
+
+            if resolved.wants_cancel:
+                args["cancel"] = None
+
+            sig.bind(**args)
+        except TypeError as x:
+            # I dislike this sort of lookup but not sure we can
+            # differentiate them otherwise
+            msg = str(x)
+            if "missing" in msg:
+                arg = msg.rsplit(":", 1)[1].strip()
+                raise InvalidActivity(
+                    "required argument {arg} is missing from "
+                    "activity '{name}'".format(arg=arg, name=name)
+                )
+            elif "unexpected" in msg:
+                arg = msg.rsplit(" ", 1)[1].strip()
+                raise InvalidActivity(
+                    "argument {arg} is not part of the "
+                    "function signature in activity '{name}'".format(arg=arg, name=name)
+                )
+            else:
+                # another error? let's fail fast
+                raise
 
     if not found_func:
         raise InvalidActivity(
@@ -151,3 +380,234 @@ def validate_python_activity(activity: Activity):  # noqa: C901
                 mod=mod_name, func=func, type=activity["type"], name=activity_name
             )
         )
+
+
+def clear_resolved_functions(mod_name: str = None):
+    """
+    Forget the functions resolved so far, or only those of the given module.
+    """
+    with _resolved_functions_lock:
+        if mod_name is None:
+            _resolved_functions.clear()
+            return
+
+        for key in list(_resolved_functions):
+            if key[0] == mod_name:
+                _resolved_functions.pop(key, None)
+
+
+###############################################################################
+# Internals
+###############################################################################
+def load_python_activity(
+    activity: Activity, configuration: Configuration, secrets: Secrets
+) -> Tuple[Callable, Dict[str, Any]]:
+    """
+    Import the function of the activity and build the arguments it should
+    be called with.
+    """
+    provider = activity["provider"]
+    resolved = resolve_python_function(provider["module"], provider["func"])
+    func = resolved.func
+    if resolved.source:
+        logger.debug(
+            "Activity '{}' loaded from '{}'".format(
+                activity.get("name"), resolved.source
+            )
+        )
+
+    arguments = provider.get("arguments", {})
+
+    if arguments and (configuration or secrets):
+        compiled = get_compiled_substitution(arguments)
+        arguments = compiled.render(configuration, secrets)
+    else:
+        arguments = arguments.copy()
+
+    if "secrets" in provider and resolved.wants_secrets:
+        arguments["secrets"] = {}
+        for s in provider["secrets"]:
+            arguments["secrets"].update(secrets.get(s, {}).copy())
+
+    if resolved.wants_configuration:
+        arguments["configuration"] = configuration.copy()
+
+    if resolved.wants_cancel:
+        arguments["cancel"] = get_cancellation_token()
+
+    return func, arguments
+
+
+class ResolvedFunction(NamedTuple):
+    module: ModuleType
+    func: Callable
+    signature: inspect.Signature
+    wants_secrets: bool
+    wants_configuration: bool
+    wants_cancel: bool
+    source: Optional[str]
+
+
+_resolved_functions: Dict[Tuple[str, str], ResolvedFunction] = {}
+_resolved_functions_lock = threading.Lock()
+
+
+def resolve_python_function(mod_name: str, func_name: str) -> ResolvedFunction:
+    """
+    Import the function from its module and inspect its signature once only.
+
+    Entries are looked up by module and function names. An entry is
+    considered stale, and resolved again, when the module or the function it
+    holds are not the ones currently loaded anymore, for instance after the
+    module was reloaded or the function patched.
+
+    Raises :exc:`ImportError` when the module cannot be imported and
+    :exc:`AttributeError` when it has no such attribute.
+    """
+    key = (mod_name, func_name)
+    resolved = _resolved_functions.get(key)
+    if resolved is not None:
+        mod = sys.modules.get(mod_name)
+        if mod is resolved.module and getattr(mod, func_name, None) is resolved.func:
+            return resolved
+
+    mod = importlib.import_module(mod_name)
+    func = getattr(mod, func_name)
+
+    sig = inspect.signature(func)
+    try:
+        source = inspect.getfile(func)
+    except TypeError:
+        source = None
+
+    resolved = ResolvedFunction(
+        module=mod,
+        func=func,
+        signature=sig,
+        wants_secrets="secrets" in sig.parameters,
+        wants_configuration="configuration" in sig.parameters,
+        wants_cancel="cancel" in sig.parameters,
+        source=source,
+    )
+    with _resolved_functions_lock:
+        _resolved_functions[key] = resolved
+    return resolved
+
+
+def is_isolated(activity: Activity, settings: Settings = None) -> bool:
+    isolation = activity["provider"].get("isolation")
+    if isolation is None:
+        settings = settings if settings is not None else get_loaded_settings()
+        runtime = (settings or {}).get("runtime", {}).get("python", {})
+        isolation = runtime.get("isolation")
+    return isolation == "process"
+
+
+class PythonWorker:
+    """
+    A worker process, talking with the pool over a pipe.
+    """
+
+    def __init__(self, context: multiprocessing.context.BaseContext) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=serve_python_activities,
+            args=(child_conn,),
+            name="chaoslib-python-worker",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        logger.debug(f"Started Python worker {self.process.pid}")
+
+    def stop(self, timeout: float = 5) -> None:
+        try:
+            self.conn.send_bytes(pickle.dumps(None))
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+            return
+        self.conn.close()
+
+    def kill(self) -> None:
+        logger.debug(f"Killing Python worker {self.process.pid}")
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def serve_python_activities(conn: Connection) -> None:
+    """
+    Loop of a worker process, running the activities it is sent until it is
+    told to stop or its pool goes away.
+    """
+    # interruptions are handled by the runner, which kills busy workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+
+        mod_name, func_name, arguments, shared_memory_threshold = task
+        try:
+            resolved = resolve_python_function(mod_name, func_name)
+            if resolved.wants_cancel:
+                arguments["cancel"] = CancellationToken()
+            result = resolved.func(**arguments)
+            if inspect.iscoroutine(result):
+                result = asyncio.run(result)
+            message = dump_worker_result(result, shared_memory_threshold)
+        except Exception as x:
+            message = (
+                "error",
+                traceback.format_exception_only(type(x), x)[0].strip(),
+                traceback.format_exc(),
+            )
+        conn.send(message)
+
+
+def dump_worker_result(result: Any, shared_memory_threshold: int) -> Tuple:
+    try:
+        data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as x:
+        raise ActivityFailed(f"result of the activity cannot be pickled: {x}")
+
+    if not HAS_SHARED_MEMORY or len(data) <= shared_memory_threshold:
+        return ("result", data)
+
+    shm = SharedMemory(create=True, size=len(data))
+    try:
+        shm.buf[: len(data)] = data
+    finally:
+        shm.close()
+    return ("shared_memory", shm.name, len(data))
+
+
+def load_worker_result(message: Tuple) -> Any:
+    kind = message[0]
+    if kind == "error":
+        logger.debug(f"Activity failed in Python worker:\n{message[2]}")
+        raise ActivityFailed(message[1])
+
+    if kind == "shared_memory":
+        _, name, size = message
+        shm = SharedMemory(name=name)
+        try:
+            data = bytes(shm.buf[:size])
+        finally:
+            shm.close()
+            shm.unlink()
+        return pickle.loads(data)
+
+    return pickle.loads(message[1])
+
+
+_workers: Optional[PythonWorkerPool] = None
+_workers_lock = threading.Lock()
+atexit.register(shutdown_python_workers)
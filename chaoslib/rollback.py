@@ -3,6 +3,7 @@ from typing import TYPE_CHECKING, Iterator
 
 from logzero import logger
 
+from chaoslib import submit_in_context
 from chaoslib.activity import execute_activity
 from chaoslib.types import Configuration, Dry, Experiment, Run, Secrets
 
@@ -35,7 +36,8 @@ def run_rollbacks(
 
         if activity.get("background"):
             logger.debug("rollback activity will run in the background")
-            yield pool.submit(
+            yield submit_in_context(
+                pool,
                 execute_activity,
                 experiment=experiment,
                 activity=activity,
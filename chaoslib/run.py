@@ -1,23 +1,31 @@
-from abc import ABCMeta
-from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
-
-try:
-    import ctypes
-
-    HAS_CTYPES = True
-except ImportError:
-    HAS_CTYPES = False
+import asyncio
 import platform
+import signal
 import threading
 import time
+from abc import ABCMeta
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 
 from logzero import logger
 
-from chaoslib import __version__, substitute
-from chaoslib.activity import run_activities
+from chaoslib import __version__, submit_in_context, substitute
+from chaoslib.activity import (
+    execute_activity_async,
+    run_activities,
+    run_activities_graph,
+    run_activities_graph_async,
+)
+from chaoslib.cancellation import CancellationToken, get_cancellation_token
 from chaoslib.configuration import load_configuration, load_dynamic_configuration
+from chaoslib.context import (
+    RunContext,
+    active_run,
+    count_active_runs,
+    get_run_context,
+)
 from chaoslib.control import (
     Control,
     cleanup_controls,
@@ -26,15 +34,23 @@ from chaoslib.control import (
     initialize_controls,
     initialize_global_controls,
 )
-from chaoslib.exceptions import (
-    ChaosException,
-    ExperimentExitedException,
-    InterruptExecution,
+from chaoslib.exceptions import ChaosException, InterruptExecution
+from chaoslib.exit import exit_signals, wait_with_exit_signals
+from chaoslib.hypothesis import (
+    ContinuousHypothesisRetention,
+    FixedRateClock,
+    run_steady_state_hypothesis,
+    run_steady_state_hypothesis_async,
 )
-from chaoslib.exit import exit_signals
-from chaoslib.hypothesis import run_steady_state_hypothesis
+from chaoslib.notification import flush_notifications
+from chaoslib.provider.http import close_http_pools
+from chaoslib.provider.process import (
+    remove_spilled_outputs,
+    shutdown_persistent_processes,
+)
+from chaoslib.provider.python import shutdown_python_workers
 from chaoslib.rollback import run_rollbacks
-from chaoslib.secret import load_secrets
+from chaoslib.secret import get_secrets_cache, load_secrets
 from chaoslib.settings import get_loaded_settings
 from chaoslib.types import (
     Activity,
@@ -42,14 +58,16 @@ from chaoslib.types import (
     Dry,
     Experiment,
     Journal,
+    Overrun,
     Run,
     Schedule,
+    ScheduleMode,
     Secrets,
     Settings,
     Strategy,
 )
 
-__all__ = ["Runner", "RunEventHandler"]
+__all__ = ["AsyncRunner", "Runner", "RunEventHandler"]
 
 
 class RunEventHandler(metaclass=ABCMeta):
@@ -89,6 +107,14 @@ class RunEventHandler(metaclass=ABCMeta):
     def continuous_hypothesis_iteration(self, iteration_index: int, state: Any) -> None:
         pass
 
+    def continuous_hypothesis_iteration_handled(
+        self, iteration_index: int, state: Any
+    ) -> None:
+        """
+        Called once every handler was given the state of the iteration.
+        """
+        pass
+
     def continuous_hypothesis_completed(
         self, experiment: Experiment, journal: Journal, exception: Exception = None
     ) -> None:
@@ -201,6 +227,12 @@ class EventHandlerRegistry:
             except Exception:
                 logger.debug(f"Handler {h.__class__.__name__} failed", exc_info=True)
 
+        for h in self.handlers:
+            try:
+                h.continuous_hypothesis_iteration_handled(iteration_index, state)
+            except Exception:
+                logger.debug(f"Handler {h.__class__.__name__} failed", exc_info=True)
+
     def continuous_hypothesis_completed(
         self, experiment: Experiment, journal: Journal, exception: Exception = None
     ) -> None:
@@ -300,10 +332,26 @@ class EventHandlerRegistry:
 
 
 class Runner:
-    def __init__(self, strategy: Strategy, schedule: Schedule = None):
+    """
+    Play an experiment, from its steady-state hypothesis to its rollbacks.
+
+    The activity index, the global controls and the settings of the run are
+    held by a :class:`chaoslib.context.RunContext`, made current for the
+    duration of :meth:`run`. Runners given their own context, with the
+    global controls they should apply, do not interfere with other runners
+    of the same process. Otherwise, they share the context of the process.
+    """
+
+    def __init__(
+        self,
+        strategy: Strategy,
+        schedule: Schedule = None,
+        run_context: RunContext = None,
+    ):
         self.strategy = strategy
         self.schedule = schedule or Schedule()
         self.event_registry = EventHandlerRegistry()
+        self.run_context = run_context
 
     def __enter__(self) -> "Runner":
         return self
@@ -322,16 +370,25 @@ class Runner:
     ) -> None:
         config_vars, secret_vars = experiment_vars or (None, None)
         self.settings = settings if settings is not None else get_loaded_settings()
+        if self.run_context is not None and self.run_context.settings is None:
+            self.run_context.settings = self.settings
         self.config = load_configuration(
             experiment.get("configuration", {}), config_vars
         )
         self.secrets = load_secrets(
-            experiment.get("secrets", {}), self.config, secret_vars
+            experiment.get("secrets", {}),
+            self.config,
+            secret_vars,
+            cache=get_secrets_cache(self.settings),
+        )
+        self.config = load_dynamic_configuration(
+            self.config, self.secrets, settings=self.settings
         )
-        self.config = load_dynamic_configuration(self.config, self.secrets)
 
     def cleanup(self):
-        pass
+        # notifications sent in the background rely on the HTTP pools
+        flush_notifications(timeout=10)
+        release_shared_resources()
 
     def run(
         self,
@@ -340,20 +397,35 @@ class Runner:
         experiment_vars: Dict[str, Any] = None,
         journal: Journal = None,
     ) -> Journal:
-        self.configure(experiment, settings, experiment_vars)
-        with exit_signals():
-            journal = self._run(
-                self.strategy,
-                self.schedule,
-                experiment,
-                journal,
-                self.config,
-                self.secrets,
-                self.settings,
-                self.event_registry,
-            )
+        with self.activate(experiment), CancellationToken().activate():
+            self.configure(experiment, settings, experiment_vars)
+            with exit_signals(), active_run():
+                journal = self._run(
+                    self.strategy,
+                    self.schedule,
+                    experiment,
+                    journal,
+                    self.config,
+                    self.secrets,
+                    self.settings,
+                    self.event_registry,
+                )
         return journal
 
+    @contextmanager
+    def activate(self, experiment: Experiment) -> Iterator[RunContext]:
+        """
+        Make the context of this runner current, the activities of the
+        experiment are indexed into it when it is not the process' one.
+        """
+        if self.run_context is None:
+            yield get_run_context()
+            return
+
+        self.run_context.index_activities(experiment)
+        with self.run_context.activate():
+            yield self.run_context
+
     def _run(
         self,
         strategy: Strategy,
@@ -372,8 +444,8 @@ class Runner:
         journal = journal or initialize_run_journal(experiment)
         event_registry.started(experiment, journal)
 
-        control = Control()
-        activity_pool, rollback_pool = get_background_pools(experiment)
+        control = Control(self.run_context)
+        activity_pool, rollback_pool = get_background_pools(experiment, settings)
         hypo_pool = get_hypothesis_pool()
         continuous_hypo_event = threading.Event()
 
@@ -381,7 +453,12 @@ class Runner:
         if dry and isinstance(dry, Dry):
             logger.warning(f"Running experiment with dry {dry.value}")
         initialize_global_controls(
-            experiment, configuration, secrets, settings, event_registry=event_registry
+            experiment,
+            configuration,
+            secrets,
+            settings,
+            event_registry=event_registry,
+            run_context=self.run_context,
         )
         initialize_controls(
             experiment, configuration, secrets, event_registry=event_registry
@@ -415,7 +492,13 @@ class Runner:
                 state = object()
                 if with_ssh and should_run_before_method(strategy):
                     state = run_gate_hypothesis(
-                        experiment, journal, configuration, secrets, event_registry, dry
+                        experiment,
+                        journal,
+                        configuration,
+                        secrets,
+                        event_registry,
+                        dry,
+                        settings=settings,
                     )
 
                 if state is not None:
@@ -431,6 +514,7 @@ class Runner:
                             secrets,
                             event_registry,
                             dry,
+                            settings=settings,
                         )
 
                     state = run_method(
@@ -442,6 +526,7 @@ class Runner:
                         secrets,
                         event_registry,
                         dry,
+                        settings=settings,
                     )
 
                     continuous_hypo_event.set()
@@ -458,6 +543,7 @@ class Runner:
                                 secrets,
                                 event_registry,
                                 dry,
+                                settings=settings,
                             )
             except InterruptExecution as i:
                 journal["status"] = "interrupted"
@@ -474,6 +560,8 @@ class Runner:
                 exit_gracefully_with_rollbacks = x.code != 30
                 if not exit_gracefully_with_rollbacks:
                     logger.warning("Ignoring rollbacks as per signal")
+                    # probes of the hypothesis still running must stop too
+                    get_cancellation_token().cancel("SIGUSR2 signal received")
                 event_registry.signal_exit()
             finally:
                 hypo_pool.shutdown(wait=True)
@@ -524,8 +612,218 @@ class Runner:
         finally:
             try:
                 cleanup_controls(experiment)
-                cleanup_global_controls()
+                cleanup_global_controls(self.run_context)
+            finally:
+                shutdown_persistent_processes(self.run_context)
+                remove_spilled_outputs(self.run_context, settings)
+                if self.run_context is not None:
+                    # the process' context outlives the run
+                    self.run_context.shutdown_pools()
+                event_registry.finish(journal)
+
+        return journal
+
+
+class AsyncRunner(Runner):
+    """
+    Runner executing the experiment on an asyncio event loop rather than on
+    threads.
+
+    The lifecycle is the same as the one of :class:`Runner` but background
+    activities, the continuous hypothesis and background rollbacks are tasks
+    on the loop. Python activities implemented as coroutine functions are
+    awaited natively and process activities do not block the loop. HTTP
+    activities and regular Python functions run in the loop's default
+    executor.
+
+    Call :meth:`run` from synchronous code or await :meth:`run_async` from
+    an existing event loop.
+    """
+
+    def run(
+        self,
+        experiment: Experiment,
+        settings: Settings = None,
+        experiment_vars: Dict[str, Any] = None,
+        journal: Journal = None,
+    ) -> Journal:
+        return asyncio.run(
+            self.run_async(experiment, settings, experiment_vars, journal)
+        )
+
+    async def run_async(
+        self,
+        experiment: Experiment,
+        settings: Settings = None,
+        experiment_vars: Dict[str, Any] = None,
+        journal: Journal = None,
+    ) -> Journal:
+        with self.activate(experiment), CancellationToken().activate():
+            self.configure(experiment, settings, experiment_vars)
+            with active_run():
+                return await self._run_async(
+                    self.strategy,
+                    self.schedule,
+                    experiment,
+                    journal,
+                    self.config,
+                    self.secrets,
+                    self.settings,
+                    self.event_registry,
+                )
+
+    async def _run_async(
+        self,
+        strategy: Strategy,
+        schedule: Schedule,  # noqa: C901
+        experiment: Experiment,
+        journal: Journal,
+        configuration: Configuration,
+        secrets: Secrets,
+        settings: Settings,
+        event_registry: EventHandlerRegistry,
+    ) -> Journal:
+        experiment["title"] = substitute(experiment["title"], configuration, secrets)
+        logger.info("Running experiment: {t}".format(t=experiment["title"]))
+
+        started_at = time.time()
+        journal = journal or initialize_run_journal(experiment)
+        event_registry.started(experiment, journal)
+
+        control = Control(self.run_context)
+        received_signals = []
+
+        dry = experiment.get("dry", None)
+        if dry and isinstance(dry, Dry):
+            logger.warning(f"Running experiment with dry {dry.value}")
+        initialize_global_controls(
+            experiment,
+            configuration,
+            secrets,
+            settings,
+            event_registry=event_registry,
+            run_context=self.run_context,
+        )
+        initialize_controls(
+            experiment, configuration, secrets, event_registry=event_registry
+        )
+        event_registry.running(
+            experiment, journal, configuration, secrets, schedule, settings
+        )
+
+        if not strategy:
+            strategy = Strategy.DEFAULT
+
+        logger.info(f"Steady-state strategy: {strategy.value}")
+        rollback_strategy = (
+            settings.get("runtime", {}).get("rollbacks", {}).get("strategy", "default")
+        )
+        logger.info(f"Rollbacks strategy: {rollback_strategy}")
+
+        exit_gracefully_with_rollbacks = True
+        with_ssh = has_steady_state_hypothesis_with_probes(experiment)
+        if not with_ssh:
+            logger.info(
+                "No steady state hypothesis defined. That's ok, just exploring."
+            )
+
+        def ungraceful_exit() -> bool:
+            return getattr(signal, "SIGUSR2", None) in received_signals
+
+        def on_signal(signum: int) -> None:
+            received_signals.append(signum)
+            # cancelling the tasks does not interrupt the calls they await in
+            # the executor, those observe the run's token instead
+            if ungraceful_exit():
+                get_cancellation_token().cancel("SIGUSR2 signal received")
+
+        try:
+            try:
+                control.begin(
+                    "experiment", experiment, experiment, configuration, secrets
+                )
+
+                await wait_with_exit_signals(
+                    play_experiment_async(
+                        strategy,
+                        schedule,
+                        experiment,
+                        journal,
+                        configuration,
+                        secrets,
+                        event_registry,
+                        dry,
+                        settings,
+                        with_ssh,
+                        ungraceful_exit,
+                    ),
+                    on_signal=on_signal,
+                )
+            except InterruptExecution as i:
+                journal["status"] = "interrupted"
+                logger.fatal(str(i))
+                event_registry.interrupted(experiment, journal)
+            except (KeyboardInterrupt, asyncio.CancelledError):
+                journal["status"] = "interrupted"
+                logger.warning("Received a termination signal (Ctrl-C)...")
+                event_registry.signal_exit()
+            except SystemExit as x:
+                journal["status"] = "interrupted"
+                logger.warning(f"Received the exit signal: {x.code}")
+
+                exit_gracefully_with_rollbacks = x.code != 30
+                if not exit_gracefully_with_rollbacks:
+                    logger.warning("Ignoring rollbacks as per signal")
+                event_registry.signal_exit()
+
+            if exit_gracefully_with_rollbacks:
+                await run_rollback_async(
+                    rollback_strategy,
+                    experiment,
+                    journal,
+                    configuration,
+                    secrets,
+                    event_registry,
+                    dry,
+                )
+
+            journal["end"] = datetime.utcnow().isoformat()
+            journal["duration"] = time.time() - started_at
+
+            if journal["status"] not in (
+                "completed",
+                "failed",
+                "aborted",
+                "interrupted",
+            ):
+                journal["status"] = "completed"
+
+            has_deviated = journal["deviated"]
+            status = "deviated" if has_deviated else journal["status"]
+            logger.info(f"Experiment ended with status: {status}")
+            if has_deviated:
+                logger.info(
+                    "The steady-state has deviated, a weakness may have been "
+                    "discovered"
+                )
+
+            control.with_state(journal)
+            try:
+                control.end(
+                    "experiment", experiment, experiment, configuration, secrets
+                )
+            except ChaosException:
+                logger.debug("Failed to close controls", exc_info=True)
+        finally:
+            try:
+                cleanup_controls(experiment)
+                cleanup_global_controls(self.run_context)
             finally:
+                shutdown_persistent_processes(self.run_context)
+                remove_spilled_outputs(self.run_context, settings)
+                if self.run_context is not None:
+                    # the process' context outlives the run
+                    self.run_context.shutdown_pools()
                 event_registry.finish(journal)
 
         return journal
@@ -550,6 +848,7 @@ def run_gate_hypothesis(
     secrets: Secrets,
     event_registry: EventHandlerRegistry,
     dry: Dry,
+    settings: Settings = None,
 ) -> Dict[str, Any]:
     """
     Run the hypothesis before the method and bail the execution if it did
@@ -558,8 +857,26 @@ def run_gate_hypothesis(
     logger.debug("Running steady-state hypothesis before the method")
     event_registry.start_hypothesis_before(experiment)
     state = run_steady_state_hypothesis(
-        experiment, configuration, secrets, dry=dry, event_registry=event_registry
+        experiment,
+        configuration,
+        secrets,
+        dry=dry,
+        event_registry=event_registry,
+        settings=settings,
     )
+    return record_gate_hypothesis(experiment, journal, state, event_registry)
+
+
+def record_gate_hypothesis(
+    experiment: Experiment,
+    journal: Journal,
+    state: Dict[str, Any],
+    event_registry: EventHandlerRegistry,
+) -> Dict[str, Any]:
+    """
+    Record the state of the hypothesis run before the method and return
+    `None` when it did not pass so the execution should bail.
+    """
     journal["steady_states"]["before"] = state
     event_registry.hypothesis_before_completed(experiment, state, journal)
     if state is not None and not state["steady_state_met"]:
@@ -574,7 +891,7 @@ def run_gate_hypothesis(
         else:
             journal["status"] = "failed"
 
-        p = state["probes"][-1]
+        p = get_failed_probe_run(state)
         logger.fatal(
             "Steady state probe '{p}' is not in the given "
             "tolerance so failing this experiment".format(p=p["activity"]["name"])
@@ -590,6 +907,7 @@ def run_deviation_validation_hypothesis(
     secrets: Secrets,
     event_registry: EventHandlerRegistry,
     dry: Dry,
+    settings: Settings = None,
 ) -> Dict[str, Any]:
     """
     Run the hypothesis after the method and report to the journal if the
@@ -598,8 +916,28 @@ def run_deviation_validation_hypothesis(
     logger.debug("Running steady-state hypothesis after the method")
     event_registry.start_hypothesis_after(experiment)
     state = run_steady_state_hypothesis(
-        experiment, configuration, secrets, dry=dry, event_registry=event_registry
+        experiment,
+        configuration,
+        secrets,
+        dry=dry,
+        event_registry=event_registry,
+        settings=settings,
+    )
+    return record_deviation_validation_hypothesis(
+        experiment, journal, state, event_registry
     )
+
+
+def record_deviation_validation_hypothesis(
+    experiment: Experiment,
+    journal: Journal,
+    state: Dict[str, Any],
+    event_registry: EventHandlerRegistry,
+) -> Dict[str, Any]:
+    """
+    Record the state of the hypothesis run after the method and flag the
+    journal as deviated when it did not pass.
+    """
     journal["steady_states"]["after"] = state
     event_registry.hypothesis_after_completed(experiment, state, journal)
     if state is not None and not state["steady_state_met"]:
@@ -613,7 +951,7 @@ def run_deviation_validation_hypothesis(
             journal["status"] = "completed"
         else:
             journal["status"] = "failed"
-        p = state["probes"][-1]
+        p = get_failed_probe_run(state)
         logger.fatal(
             "Steady state probe '{p}' is not in the "
             "given tolerance so failing this "
@@ -622,6 +960,17 @@ def run_deviation_validation_hypothesis(
     return state
 
 
+def get_failed_probe_run(state: Dict[str, Any]) -> Run:
+    """
+    The run of the probe that failed the hypothesis. With concurrent probes,
+    it is not necessarily the last one recorded.
+    """
+    for run in state["probes"]:
+        if run.get("tolerance_met") is False:
+            return run
+    return state["probes"][-1]
+
+
 def run_hypothesis_during_method(
     hypo_pool: ThreadPoolExecutor,
     continuous_hypo_event: threading.Event,
@@ -633,6 +982,7 @@ def run_hypothesis_during_method(
     secrets: Secrets,
     event_registry: EventHandlerRegistry,
     dry: Dry,
+    settings: Settings = None,
 ) -> Future:
     """
     Run the hypothesis continuously in a background thread and report the
@@ -640,18 +990,12 @@ def run_hypothesis_during_method(
     """
 
     def completed(f: Future):
-        exc = f.exception()
-        event_registry.continuous_hypothesis_completed(experiment, journal, exc)
-        if exc is not None:
-            if isinstance(exc, InterruptExecution):
-                journal["status"] = "interrupted"
-                logger.fatal(str(exc))
-            elif isinstance(exc, Exception):
-                journal["status"] = "aborted"
-                logger.fatal(str(exc))
-        logger.info("Continuous steady state hypothesis terminated")
+        record_continuous_hypothesis_completion(
+            experiment, journal, event_registry, f.exception()
+        )
 
-    f = hypo_pool.submit(
+    f = submit_in_context(
+        hypo_pool,
         run_hypothesis_continuously,
         continuous_hypo_event,
         schedule,
@@ -661,11 +1005,33 @@ def run_hypothesis_during_method(
         secrets,
         event_registry,
         dry=dry,
+        settings=settings,
     )
     f.add_done_callback(completed)
     return f
 
 
+def record_continuous_hypothesis_completion(
+    experiment: Experiment,
+    journal: Journal,
+    event_registry: EventHandlerRegistry,
+    exc: Optional[BaseException] = None,
+) -> None:
+    """
+    Report the termination of the continuous hypothesis and flag the journal
+    when it was terminated by an exception.
+    """
+    event_registry.continuous_hypothesis_completed(experiment, journal, exc)
+    if exc is not None:
+        if isinstance(exc, InterruptExecution):
+            journal["status"] = "interrupted"
+            logger.fatal(str(exc))
+        elif isinstance(exc, Exception):
+            journal["status"] = "aborted"
+            logger.fatal(str(exc))
+    logger.info("Continuous steady state hypothesis terminated")
+
+
 def run_method(
     strategy: Strategy,
     activity_pool: ThreadPoolExecutor,
@@ -675,6 +1041,7 @@ def run_method(
     secrets: Secrets,
     event_registry: EventHandlerRegistry,
     dry: Dry,
+    settings: Settings = None,
 ) -> Optional[List[Run]]:
     logger.info("Playing your experiment's method now...")
     event_registry.start_method(experiment)
@@ -690,6 +1057,7 @@ def run_method(
             dry,
             event_registry,
             runs=runs,
+            settings=settings,
         )
         event_registry.method_completed(experiment, runs)
         return runs
@@ -715,6 +1083,31 @@ def run_rollback(
     event_registry: EventHandlerRegistry,
     dry: Dry,
 ) -> None:
+    if should_play_rollbacks(rollback_strategy, journal):
+        event_registry.start_rollbacks(experiment)
+        try:
+            journal["rollbacks"] = apply_rollbacks(
+                experiment, configuration, secrets, rollback_pool, dry, event_registry
+            )
+        except InterruptExecution as i:
+            journal["status"] = "interrupted"
+            logger.fatal(str(i))
+        except (KeyboardInterrupt, SystemExit):
+            journal["status"] = "interrupted"
+            logger.warning(
+                "Received an exit signal."
+                "Terminating now without running the "
+                "remaining rollbacks."
+            )
+        finally:
+            event_registry.rollbacks_completed(experiment, journal)
+
+
+def should_play_rollbacks(rollback_strategy: str, journal: Journal) -> bool:
+    """
+    Decide if rollbacks should be played given the rollback strategy and
+    the current status of the execution.
+    """
     has_deviated = journal["deviated"]
     journal_status = journal["status"]
     play_rollbacks = False
@@ -742,24 +1135,7 @@ def run_rollback(
                 "the case, we will not play them."
             )
 
-    if play_rollbacks:
-        event_registry.start_rollbacks(experiment)
-        try:
-            journal["rollbacks"] = apply_rollbacks(
-                experiment, configuration, secrets, rollback_pool, dry, event_registry
-            )
-        except InterruptExecution as i:
-            journal["status"] = "interrupted"
-            logger.fatal(str(i))
-        except (KeyboardInterrupt, SystemExit):
-            journal["status"] = "interrupted"
-            logger.warning(
-                "Received an exit signal."
-                "Terminating now without running the "
-                "remaining rollbacks."
-            )
-        finally:
-            event_registry.rollbacks_completed(experiment, journal)
+    return play_rollbacks
 
 
 def initialize_run_journal(experiment: Experiment) -> Journal:
@@ -777,10 +1153,30 @@ def initialize_run_journal(experiment: Experiment) -> Journal:
     }
 
 
-def get_background_pools(experiment: Experiment) -> ThreadPoolExecutor:
+def get_method_strategy(settings: Settings = None) -> str:
+    """
+    How the method should be played, as set in the settings under
+    `runtime.method.strategy`. Either `"sequential"`, the default, or
+    `"graph"` when activities should be scheduled following their declared
+    `depends_on` dependencies.
+    """
+    return (
+        (settings or {})
+        .get("runtime", {})
+        .get("method", {})
+        .get("strategy", "sequential")
+    )
+
+
+def get_background_pools(
+    experiment: Experiment, settings: Settings = None
+) -> ThreadPoolExecutor:
     """
     Create a pool for background activities. The pool is as big as the number
     of declared background activities. If none are declared, returned `None`.
+
+    When the method is played as a graph, the activity pool is bounded by
+    the `runtime.method.max_workers` setting instead.
     """
     method = experiment.get("method", [])
     rollbacks = experiment.get("rollbacks", [])
@@ -791,7 +1187,14 @@ def get_background_pools(experiment: Experiment) -> ThreadPoolExecutor:
             activity_background_count = activity_background_count + 1
 
     activity_pool = None
-    if activity_background_count:
+    if method and get_method_strategy(settings) == "graph":
+        max_workers = settings.get("runtime", {}).get("method", {}).get("max_workers")
+        logger.debug(
+            "Method activities will be scheduled as a graph on a pool of "
+            "{} workers".format(max_workers or "default")
+        )
+        activity_pool = ThreadPoolExecutor(max_workers)
+    elif activity_background_count:
         logger.debug(
             "{c} activities will be run in the background".format(
                 c=activity_background_count
@@ -834,9 +1237,22 @@ def run_hypothesis_continuously(
     secrets: Secrets,
     event_registry: EventHandlerRegistry,
     dry: Dry,
+    settings: Settings = None,
 ):
+    if schedule.mode == ScheduleMode.FIXED_RATE:
+        return run_hypothesis_at_fixed_rate(
+            event,
+            schedule,
+            experiment,
+            journal,
+            configuration,
+            secrets,
+            event_registry,
+            dry,
+            settings=settings,
+        )
+
     frequency = schedule.continuous_hypothesis_frequency
-    fail_fast_ratio = schedule.fail_fast_ratio
 
     event_registry.start_continuous_hypothesis(frequency)
     logger.info(
@@ -844,8 +1260,8 @@ def run_hypothesis_continuously(
         "every {} seconds".format(frequency)
     )
 
+    retention = ContinuousHypothesisRetention(schedule.keep_last_iterations)
     failed_iteration = 0
-    failed_ratio = 0
     iteration = 1
     while not event.is_set():
         # already marked as terminated, let's exit now
@@ -853,30 +1269,24 @@ def run_hypothesis_continuously(
             break
 
         state = run_steady_state_hypothesis(
-            experiment, configuration, secrets, dry=dry, event_registry=event_registry
+            experiment,
+            configuration,
+            secrets,
+            dry=dry,
+            event_registry=event_registry,
+            settings=settings,
         )
-        journal["steady_states"]["during"].append(state)
-        event_registry.continuous_hypothesis_iteration(iteration, state)
-
-        if state is not None and not state["steady_state_met"]:
-            failed_iteration += 1
-            failed_ratio = (failed_iteration * 100) / iteration
-            p = state["probes"][-1]
-            logger.warning(
-                "Continuous steady state probe '{p}' is not in the given "
-                "tolerance".format(p=p["activity"]["name"])
-            )
-
-            if schedule.fail_fast:
-                if failed_ratio >= fail_fast_ratio:
-                    m = "Terminating immediately the experiment"
-                    if failed_ratio != 0.0:
-                        m = "{} after {:.1f}% hypothesis deviated".format(
-                            m, failed_ratio
-                        )
-                    logger.info(m)
-                    journal["status"] = "failed"
-                    break
+        failed_iteration = record_continuous_hypothesis_iteration(
+            schedule,
+            journal,
+            event_registry,
+            state,
+            iteration,
+            failed_iteration,
+            retention=retention,
+        )
+        if journal["status"] == "failed":
+            break
         iteration += 1
 
         # we do not adjust the frequency based on the time taken by probes
@@ -885,6 +1295,185 @@ def run_hypothesis_continuously(
         event.wait(timeout=frequency)
 
 
+def run_hypothesis_at_fixed_rate(
+    event: threading.Event,
+    schedule: Schedule,
+    experiment: Experiment,
+    journal: Journal,
+    configuration: Configuration,
+    secrets: Secrets,
+    event_registry: EventHandlerRegistry,
+    dry: Dry,
+    settings: Settings = None,
+) -> None:
+    """
+    Run the hypothesis on ticks every `continuous_hypothesis_frequency`
+    seconds of a monotonic clock, so iterations sample the system at the
+    same rate whatever the latency of the probes.
+
+    The schedule's `overrun` policy decides what happens to the ticks due
+    while an iteration is still running: they are skipped, started late one
+    after the other, or iterations run concurrently on their own thread. At
+    most `max_concurrent_iterations` iterations run at once, the ticks due
+    meanwhile are skipped.
+
+    Each state records the tick it was started on, and how late it was,
+    while the schedule is summarized in the `during_schedule` entry of the
+    steady states.
+    """
+    frequency = schedule.continuous_hypothesis_frequency
+
+    event_registry.start_continuous_hypothesis(frequency)
+    logger.info(
+        "Executing the steady-state hypothesis continuously "
+        "at a fixed rate of every {} seconds".format(frequency)
+    )
+
+    clock = FixedRateClock(frequency, schedule.overrun)
+    retention = ContinuousHypothesisRetention(schedule.keep_last_iterations)
+    lock = threading.Lock()
+    counters = {"iteration": 0, "failed": 0}
+
+    errors = []
+
+    def iterate(tick: Dict[str, Any], slots: threading.Semaphore = None) -> None:
+        try:
+            state = run_steady_state_hypothesis(
+                experiment,
+                configuration,
+                secrets,
+                dry=dry,
+                event_registry=event_registry,
+                settings=settings,
+            )
+            with lock:
+                record_fixed_rate_iteration(
+                    schedule,
+                    journal,
+                    event_registry,
+                    state,
+                    tick,
+                    clock,
+                    retention,
+                    counters,
+                )
+        except Exception as x:
+            errors.append(x)
+        finally:
+            if slots is not None:
+                slots.release()
+
+    pool = slots = None
+    if schedule.overrun == Overrun.CONCURRENT:
+        max_iterations = max(1, schedule.max_concurrent_iterations)
+        pool = ThreadPoolExecutor(
+            max_workers=max_iterations, thread_name_prefix="chaoslib-hypothesis"
+        )
+        # nothing is ever queued on the pool, iterations that cannot start
+        # right away are skipped
+        slots = threading.Semaphore(max_iterations)
+
+    try:
+        while not event.is_set() and not errors:
+            if journal["status"] in ["failed", "interrupted", "aborted"]:
+                break
+
+            if event.wait(timeout=clock.wait_time()):
+                break
+
+            if pool is None:
+                iterate(clock.tick())
+            elif slots.acquire(blocking=False):
+                submit_in_context(pool, iterate, clock.tick(), slots)
+            else:
+                clock.skip()
+    finally:
+        if pool is not None:
+            # only the iterations already running are waited for
+            pool.shutdown(wait=True)
+
+    if errors:
+        # reported as the termination of the continuous hypothesis
+        raise errors[0]
+
+
+def record_fixed_rate_iteration(
+    schedule: Schedule,
+    journal: Journal,
+    event_registry: EventHandlerRegistry,
+    state: Dict[str, Any],
+    tick: Dict[str, Any],
+    clock: FixedRateClock,
+    retention: ContinuousHypothesisRetention,
+    counters: Dict[str, int],
+) -> None:
+    """
+    Record the state of an iteration started on a tick of the given clock.
+    Iterations are counted as they complete, which is not necessarily the
+    order of their ticks when they run concurrently.
+    """
+    if isinstance(state, dict):
+        state["tick"] = tick
+
+    counters["iteration"] += 1
+    counters["failed"] = record_continuous_hypothesis_iteration(
+        schedule,
+        journal,
+        event_registry,
+        state,
+        counters["iteration"],
+        counters["failed"],
+        retention=retention,
+    )
+    journal["steady_states"]["during_schedule"] = clock.summary()
+
+
+def record_continuous_hypothesis_iteration(
+    schedule: Schedule,
+    journal: Journal,
+    event_registry: EventHandlerRegistry,
+    state: Dict[str, Any],
+    iteration: int,
+    failed_iteration: int,
+    retention: ContinuousHypothesisRetention = None,
+) -> int:
+    """
+    Record the state of an iteration of the continuous hypothesis and return
+    the number of iterations that failed so far.
+
+    The `retention` decides which states are kept in the journal and
+    aggregates them all into the `during_summary` of the steady states.
+
+    When the schedule is set to fail fast and the ratio of failed iterations
+    reaches the threshold, the journal is marked as failed.
+    """
+    if retention is None:
+        journal["steady_states"]["during"].append(state)
+    else:
+        retention.record(journal["steady_states"]["during"], state)
+        journal["steady_states"]["during_summary"] = retention.summary()
+    event_registry.continuous_hypothesis_iteration(iteration, state)
+
+    if state is not None and not state["steady_state_met"]:
+        failed_iteration += 1
+        failed_ratio = (failed_iteration * 100) / iteration
+        p = state["probes"][-1]
+        logger.warning(
+            "Continuous steady state probe '{p}' is not in the given "
+            "tolerance".format(p=p["activity"]["name"])
+        )
+
+        if schedule.fail_fast:
+            if failed_ratio >= schedule.fail_fast_ratio:
+                m = "Terminating immediately the experiment"
+                if failed_ratio != 0.0:
+                    m = "{} after {:.1f}% hypothesis deviated".format(m, failed_ratio)
+                logger.info(m)
+                journal["status"] = "failed"
+
+    return failed_iteration
+
+
 def apply_activities(
     experiment: Experiment,
     configuration: Configuration,
@@ -894,6 +1483,7 @@ def apply_activities(
     dry: Dry,
     event_registry: EventHandlerRegistry,
     runs: List[Run],
+    settings: Settings = None,
 ) -> None:
     with controls(
         level="method",
@@ -905,20 +1495,36 @@ def apply_activities(
         futures = []
         wait_for_background_activities = True
 
+        def should_stop() -> bool:
+            return journal["status"] in ["aborted", "failed", "interrupted"]
+
         try:
-            for activity in run_activities(
-                experiment,
-                configuration,
-                secrets,
-                pool,
-                dry,
-                event_registry,
-                runs,
-            ):
-                if isinstance(activity, Future):
-                    futures.append(activity)
-                if journal["status"] in ["aborted", "failed", "interrupted"]:
-                    break
+            if pool and get_method_strategy(settings) == "graph":
+                run_activities_graph(
+                    experiment,
+                    configuration,
+                    secrets,
+                    pool,
+                    dry,
+                    event_registry,
+                    runs,
+                    should_stop=should_stop,
+                    futures=futures,
+                )
+            else:
+                for activity in run_activities(
+                    experiment,
+                    configuration,
+                    secrets,
+                    pool,
+                    dry,
+                    event_registry,
+                    runs,
+                ):
+                    if isinstance(activity, Future):
+                        futures.append(activity)
+                    if should_stop():
+                        break
         except SystemExit as x:
             # when we got a signal for an ungraceful exit, we can decide
             # not to wait for background activities. Their statuses will
@@ -932,19 +1538,7 @@ def apply_activities(
                 logger.debug("Waiting for background activities to complete")
                 pool.shutdown(wait=True)
             elif pool:
-                harshly_terminate_pending_background_activities(pool)
-                logger.debug(
-                    "Do not wait for the background activities to finish "
-                    "as per signal"
-                )
-
-                for f in futures:
-                    try:
-                        if f.running():
-                            f.result(timeout=0.2)
-                    except TimeoutError:
-                        pass
-
+                cancel_background_activities(futures, settings)
                 pool.shutdown(wait=False)
 
 
@@ -995,38 +1589,524 @@ def has_steady_state_hypothesis_with_probes(experiment: Experiment) -> bool:
     return False
 
 
-def harshly_terminate_pending_background_activities(pool: ThreadPoolExecutor) -> None:
+def release_shared_resources() -> None:
     """
-    Ugly hack to try to force background activities to terminate now.
+    Close the HTTP connection pools and stop the workers of isolated Python
+    activities, which all the runs of the process share, unless some runs
+    are still playing, see :func:`chaoslib.context.count_active_runs`.
+    They are created again when needed.
+    """
+    active = count_active_runs()
+    if active:
+        logger.debug(
+            "Keeping the shared HTTP pools and Python workers, "
+            "{} runs are still active".format(active)
+        )
+        return
+
+    close_http_pools()
+    shutdown_python_workers()
+
 
-    This can only have an impact over functions that are still in the Python
-    land. Any code outside of the Python VM (say calling a C function, even
-    time.sleep()) will not be impacted and therefore will continue hanging
-    until it does complete of its own accord.
+def cancel_background_activities(
+    futures: List[Future], settings: Settings = None
+) -> None:
+    """
+    Cancel the run so its background activities still running stop, see
+    :class:`chaoslib.cancellation.CancellationToken`, and wait for them for
+    at most `runtime.cancellation.grace_period` seconds, `2` by default.
 
-    This could have really bizarre side effects so it's only applied when
-    a SIGUSR2 signal was received.
+    Activities which cannot be cancelled, such as Python functions without a
+    `cancel` parameter, are left running in the background.
     """
-    if not HAS_CTYPES:
-        logger.debug(
-            "Your Python implementation does not provide the `ctypes` "
-            "module and we cannot terminate very harshly running background "
-            "activities."
+    cancel = get_cancellation_token()
+    cancel.cancel("SIGUSR2 signal received")
+
+    grace_period = get_cancellation_grace_period(settings)
+    _, pending = wait([f for f in futures if not f.done()], timeout=grace_period)
+    if pending:
+        logger.warning(
+            "{} background activities did not stop within {}s of being "
+            "cancelled, not waiting for them".format(len(pending), grace_period)
         )
         return
 
     logger.debug(
-        "Harshly trying to interrupt remaining background activities still " "running"
+        "Background activities stopped {:.3f}s after being cancelled".format(
+            cancel.elapsed()
+        )
+    )
+
+
+def get_cancellation_grace_period(settings: Settings = None) -> float:
+    return (
+        (settings or {})
+        .get("runtime", {})
+        .get("cancellation", {})
+        .get("grace_period", 2)
     )
 
-    # oh and of course we use private properties... might as well when trying
-    # to be ugly
-    for thread in pool._threads:
-        tid = ctypes.c_long(thread.ident)
+
+async def play_experiment_async(
+    strategy: Strategy,
+    schedule: Schedule,
+    experiment: Experiment,
+    journal: Journal,
+    configuration: Configuration,
+    secrets: Secrets,
+    event_registry: EventHandlerRegistry,
+    dry: Dry,
+    settings: Settings,
+    with_ssh: bool,
+    ungraceful_exit: Callable[[], bool] = None,
+) -> None:
+    """
+    Play the hypothesis before, during and after the method, as well as the
+    method itself, from within an event loop.
+    """
+    state = object()
+    if with_ssh and should_run_before_method(strategy):
+        event_registry.start_hypothesis_before(experiment)
+        state = await run_steady_state_hypothesis_async(
+            experiment,
+            configuration,
+            secrets,
+            dry=dry,
+            event_registry=event_registry,
+            settings=settings,
+        )
+        state = record_gate_hypothesis(experiment, journal, state, event_registry)
+
+    if state is None:
+        return
+
+    continuous_hypo_event = asyncio.Event()
+    hypo_task = None
+    if with_ssh and should_run_during_method(strategy):
+        hypo_task = asyncio.ensure_future(
+            run_hypothesis_continuously_async(
+                continuous_hypo_event,
+                schedule,
+                experiment,
+                journal,
+                configuration,
+                secrets,
+                event_registry,
+                dry,
+                settings=settings,
+            )
+        )
+
+    try:
+        state = await run_method_async(
+            experiment,
+            journal,
+            configuration,
+            secrets,
+            event_registry,
+            dry,
+            settings,
+            ungraceful_exit,
+        )
+    finally:
+        continuous_hypo_event.set()
+        if hypo_task:
+            try:
+                await asyncio.shield(hypo_task)
+            except asyncio.CancelledError:
+                hypo_task.cancel()
+                await asyncio.gather(hypo_task, return_exceptions=True)
+                raise
+            except Exception:
+                pass
+            finally:
+                if hypo_task.done():
+                    exc = None if hypo_task.cancelled() else hypo_task.exception()
+                    record_continuous_hypothesis_completion(
+                        experiment, journal, event_registry, exc
+                    )
+
+    if journal["status"] not in ["interrupted", "aborted"]:
+        if with_ssh and (state is not None) and should_run_after_method(strategy):
+            event_registry.start_hypothesis_after(experiment)
+            state = await run_steady_state_hypothesis_async(
+                experiment,
+                configuration,
+                secrets,
+                dry=dry,
+                event_registry=event_registry,
+                settings=settings,
+            )
+            record_deviation_validation_hypothesis(
+                experiment, journal, state, event_registry
+            )
+
+
+async def run_hypothesis_continuously_async(
+    event: asyncio.Event,
+    schedule: Schedule,
+    experiment: Experiment,
+    journal: Journal,
+    configuration: Configuration,
+    secrets: Secrets,
+    event_registry: EventHandlerRegistry,
+    dry: Dry,
+    settings: Settings = None,
+) -> None:
+    """
+    Counterpart of :func:`run_hypothesis_continuously` to be run as a task
+    on the event loop.
+    """
+    if schedule.mode == ScheduleMode.FIXED_RATE:
+        return await run_hypothesis_at_fixed_rate_async(
+            event,
+            schedule,
+            experiment,
+            journal,
+            configuration,
+            secrets,
+            event_registry,
+            dry,
+            settings=settings,
+        )
+
+    frequency = schedule.continuous_hypothesis_frequency
+
+    event_registry.start_continuous_hypothesis(frequency)
+    logger.info(
+        "Executing the steady-state hypothesis continuously "
+        "every {} seconds".format(frequency)
+    )
+
+    retention = ContinuousHypothesisRetention(schedule.keep_last_iterations)
+    failed_iteration = 0
+    iteration = 1
+    while not event.is_set():
+        if journal["status"] in ["failed", "interrupted", "aborted"]:
+            break
+
+        state = await run_steady_state_hypothesis_async(
+            experiment,
+            configuration,
+            secrets,
+            dry=dry,
+            event_registry=event_registry,
+            settings=settings,
+        )
+        failed_iteration = record_continuous_hypothesis_iteration(
+            schedule,
+            journal,
+            event_registry,
+            state,
+            iteration,
+            failed_iteration,
+            retention=retention,
+        )
+        if journal["status"] == "failed":
+            break
+        iteration += 1
+
         try:
-            gil = ctypes.pythonapi.PyGILState_Ensure()
-            ctypes.pythonapi.PyThreadState_SetAsyncExc(
-                tid, ctypes.py_object(ExperimentExitedException)
+            await asyncio.wait_for(event.wait(), timeout=frequency)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_hypothesis_at_fixed_rate_async(
+    event: asyncio.Event,
+    schedule: Schedule,
+    experiment: Experiment,
+    journal: Journal,
+    configuration: Configuration,
+    secrets: Secrets,
+    event_registry: EventHandlerRegistry,
+    dry: Dry,
+    settings: Settings = None,
+) -> None:
+    """
+    Counterpart of :func:`run_hypothesis_at_fixed_rate` to be run as a task
+    on the event loop. Concurrent iterations run as tasks of their own.
+    """
+    frequency = schedule.continuous_hypothesis_frequency
+
+    event_registry.start_continuous_hypothesis(frequency)
+    logger.info(
+        "Executing the steady-state hypothesis continuously "
+        "at a fixed rate of every {} seconds".format(frequency)
+    )
+
+    clock = FixedRateClock(frequency, schedule.overrun)
+    retention = ContinuousHypothesisRetention(schedule.keep_last_iterations)
+    counters = {"iteration": 0, "failed": 0}
+
+    errors = []
+
+    async def iterate(tick: Dict[str, Any]) -> None:
+        try:
+            state = await run_steady_state_hypothesis_async(
+                experiment,
+                configuration,
+                secrets,
+                dry=dry,
+                event_registry=event_registry,
+                settings=settings,
+            )
+            record_fixed_rate_iteration(
+                schedule,
+                journal,
+                event_registry,
+                state,
+                tick,
+                clock,
+                retention,
+                counters,
             )
+        except Exception as x:
+            errors.append(x)
+
+    tasks = set()
+    try:
+        while not event.is_set() and not errors:
+            if journal["status"] in ["failed", "interrupted", "aborted"]:
+                break
+
+            try:
+                await asyncio.wait_for(event.wait(), timeout=clock.wait_time())
+                break
+            except asyncio.TimeoutError:
+                pass
+
+            if schedule.overrun != Overrun.CONCURRENT:
+                await iterate(clock.tick())
+                continue
+
+            if len(tasks) >= max(1, schedule.max_concurrent_iterations):
+                clock.skip()
+                continue
+
+            task = asyncio.ensure_future(iterate(clock.tick()))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if errors:
+        raise errors[0]
+
+
+async def run_method_async(
+    experiment: Experiment,
+    journal: Journal,
+    configuration: Configuration,
+    secrets: Secrets,
+    event_registry: EventHandlerRegistry,
+    dry: Dry,
+    settings: Settings = None,
+    ungraceful_exit: Callable[[], bool] = None,
+) -> Optional[List[Run]]:
+    """
+    Counterpart of :func:`run_method` to be awaited from an event loop.
+    """
+    logger.info("Playing your experiment's method now...")
+    event_registry.start_method(experiment)
+    try:
+        runs = []
+        journal["run"] = runs
+        await apply_activities_async(
+            experiment,
+            configuration,
+            secrets,
+            journal,
+            dry,
+            event_registry,
+            runs,
+            settings=settings,
+            ungraceful_exit=ungraceful_exit,
+        )
+        event_registry.method_completed(experiment, runs)
+        return runs
+    except (InterruptExecution, asyncio.CancelledError):
+        event_registry.method_completed(experiment)
+        raise
+    except Exception:
+        journal["status"] = "aborted"
+        event_registry.method_completed(experiment)
+        logger.fatal(
+            "Experiment ran into an un expected fatal error, aborting now.",
+            exc_info=True,
+        )
+
+
+async def apply_activities_async(
+    experiment: Experiment,
+    configuration: Configuration,
+    secrets: Secrets,
+    journal: Journal,
+    dry: Dry,
+    event_registry: EventHandlerRegistry,
+    runs: List[Run],
+    settings: Settings = None,
+    ungraceful_exit: Callable[[], bool] = None,
+) -> None:
+    """
+    Counterpart of :func:`apply_activities` to be awaited from an event loop.
+    Background activities are tasks on the loop.
+
+    When the execution gets cancelled, background activities are still
+    awaited unless `ungraceful_exit` tells otherwise.
+    """
+    with controls(
+        level="method",
+        experiment=experiment,
+        context=experiment,
+        configuration=configuration,
+        secrets=secrets,
+    ) as control:
+        tasks = []
+
+        def should_stop() -> bool:
+            return journal["status"] in ["aborted", "failed", "interrupted"]
+
+        try:
+            if get_method_strategy(settings) == "graph":
+                max_workers = (
+                    settings.get("runtime", {}).get("method", {}).get("max_workers")
+                )
+                await run_activities_graph_async(
+                    experiment,
+                    configuration,
+                    secrets,
+                    max_workers,
+                    dry,
+                    event_registry,
+                    runs,
+                    should_stop=should_stop,
+                )
+            else:
+                method = experiment.get("method", [])
+                if not method:
+                    logger.info("No declared activities, let's move on.")
+
+                for activity in method:
+                    aw = execute_activity_async(
+                        experiment=experiment,
+                        activity=activity,
+                        configuration=configuration,
+                        secrets=secrets,
+                        dry=dry,
+                        event_registry=event_registry,
+                        runs=runs,
+                    )
+                    if activity.get("background"):
+                        logger.debug("activity will run in the background")
+                        tasks.append(asyncio.ensure_future(aw))
+                    else:
+                        await aw
+                    if should_stop():
+                        break
         finally:
-            ctypes.pythonapi.PyGILState_Release(gil)
+            control.with_state(runs)
+
+            if tasks:
+                if ungraceful_exit and ungraceful_exit():
+                    logger.debug(
+                        "Do not wait for the background activities to finish "
+                        "as per signal"
+                    )
+                    for task in tasks:
+                        task.cancel()
+                else:
+                    logger.debug("Waiting for background activities to complete")
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_rollback_async(
+    rollback_strategy: str,
+    experiment: Experiment,
+    journal: Journal,
+    configuration: Configuration,
+    secrets: Secrets,
+    event_registry: EventHandlerRegistry,
+    dry: Dry,
+) -> None:
+    """
+    Counterpart of :func:`run_rollback` to be awaited from an event loop.
+    """
+    if not should_play_rollbacks(rollback_strategy, journal):
+        return
+
+    event_registry.start_rollbacks(experiment)
+    try:
+        journal["rollbacks"] = await wait_with_exit_signals(
+            apply_rollbacks_async(
+                experiment, configuration, secrets, dry, event_registry
+            )
+        )
+    except InterruptExecution as i:
+        journal["status"] = "interrupted"
+        logger.fatal(str(i))
+    except (KeyboardInterrupt, SystemExit, asyncio.CancelledError):
+        journal["status"] = "interrupted"
+        logger.warning(
+            "Received an exit signal."
+            "Terminating now without running the "
+            "remaining rollbacks."
+        )
+    finally:
+        event_registry.rollbacks_completed(experiment, journal)
+
+
+async def apply_rollbacks_async(
+    experiment: Experiment,
+    configuration: Configuration,
+    secrets: Secrets,
+    dry: Dry,
+    event_registry: EventHandlerRegistry,
+) -> List[Run]:
+    """
+    Counterpart of :func:`apply_rollbacks` to be awaited from an event loop.
+    Background rollbacks are tasks on the loop.
+    """
+    logger.info("Let's rollback...")
+    with controls(
+        level="rollback",
+        experiment=experiment,
+        context=experiment,
+        configuration=configuration,
+        secrets=secrets,
+    ) as control:
+        rollbacks = experiment.get("rollbacks", [])
+        if not rollbacks:
+            logger.info("No declared rollbacks, let's move on.")
+
+        played = []
+        for activity in rollbacks:
+            logger.info("Rollback: {t}".format(t=activity.get("name")))
+            aw = execute_activity_async(
+                experiment,
+                activity,
+                configuration=configuration,
+                secrets=secrets,
+                dry=dry,
+                event_registry=event_registry,
+            )
+            if activity.get("background"):
+                logger.debug("rollback activity will run in the background")
+                played.append(asyncio.ensure_future(aw))
+            else:
+                played.append(await aw)
+
+        result = []
+        for rollback in played:
+            if isinstance(rollback, asyncio.Future):
+                rollback = await rollback
+            if rollback:
+                result.append(rollback)
+
+        control.with_state(result)
+
+    return result
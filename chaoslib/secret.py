@@ -1,5 +1,10 @@
+import hashlib
 import os
-from typing import Any, Dict
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
 
 from logzero import logger
 
@@ -11,15 +16,26 @@ except ImportError:
     HAS_HVAC = False
 
 from chaoslib.exceptions import InvalidExperiment
-from chaoslib.types import Configuration, Secrets
+from chaoslib.types import Configuration, Secrets, Settings
 
-__all__ = ["load_secrets", "create_vault_client"]
+__all__ = [
+    "load_secrets",
+    "create_vault_client",
+    "SecretsCache",
+    "get_secrets_cache",
+    "clear_secrets_cache",
+]
+
+# cache shared by all the runs of the process, when enabled in the settings
+_secrets_cache = None
+_secrets_cache_lock = threading.Lock()
 
 
 def load_secrets(
     secrets_info: Dict[str, Dict[str, str]],
     configuration: Configuration = None,
     extra_vars: Dict[str, Any] = None,
+    cache: "SecretsCache" = None,
 ) -> Secrets:
     """
     Takes the the secrets definition from an experiment and tries to load
@@ -74,31 +90,16 @@ def load_secrets(
         }
     }
     ```
+
+    When a `cache` is given, payloads read from Vault are looked up there
+    first and stored there afterwards. See :func:`get_secrets_cache`.
     """
     logger.debug("Loading secrets...")
 
-    extra_vars = extra_vars or {}
-
-    secrets = {}
-
-    for key, value in secrets_info.items():
-        if isinstance(value, dict):
-            if extra_vars.get(key, None) is not None:
-                secrets[key] = extra_vars.get(key)
-
-            elif value.get("type") == "env":
-                secrets[key] = load_secret_from_env(value)
-
-            elif value.get("type") == "vault":
-                secrets[key] = load_secrets_from_vault(value, configuration)
-
-            else:
-                secrets[key] = load_secrets(
-                    value, configuration, extra_vars.get(key, None)
-                )
-
-        else:
-            secrets[key] = value
+    vault_secrets = []
+    secrets = collect_secrets(secrets_info, extra_vars, vault_secrets)
+    if vault_secrets:
+        fetch_vault_secrets(vault_secrets, configuration, cache=cache)
 
     logger.debug("Done loading secrets")
 
@@ -169,62 +170,339 @@ def load_secrets_from_vault(
 
     In that case, `mykey` will be set to the value at `secret/foo/bar` under
     the Vault secret key `mypassword`.
+
+    When loading many secrets at once, prefer :func:`load_secrets` which
+    authenticates once and reads each path only once.
     """
+    if not isinstance(secrets_info, dict) or secrets_info.get("type") != "vault":
+        return {}
 
-    secret = {}
+    holder = {}
+    fetch_vault_secrets([(holder, "secret", secrets_info)], configuration)
+    return holder["secret"]
 
-    client = create_vault_client(configuration)
 
-    if isinstance(secrets_info, dict) and secrets_info.get("type") == "vault":
-        if not HAS_HVAC:
-            logger.error(
-                "Install the `hvac` package to fetch secrets "
-                "from Vault: `pip install chaostoolkit-lib[vault]`."
+class SecretsCache:
+    """
+    In-memory cache of the payloads read from secret stores, such as Vault,
+    shared by the runs of a long-lived process.
+
+    Entries expire `ttl` seconds after they were read. Once they reached
+    `refresh_ahead` of their lifetime, the next lookup still returns them but
+    reads them again in the background, so that entries in use never
+    expire. The least recently used entries are evicted beyond `max_size`.
+
+    Secrets only ever live in memory, the cache refuses to be pickled.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300,
+        max_size: int = 256,
+        refresh_ahead: float = 0.8,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_size = max_size
+        self.refresh_ahead = refresh_ahead
+        self.clock = clock
+        self.entries: "OrderedDict[Hashable, CachedSecret]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "evictions": 0}
+
+    def __reduce__(self) -> Any:
+        raise TypeError("the secrets cache cannot be serialized")
+
+    def get(self, key: Hashable, refresh: Callable[[], Any] = None) -> Optional[Any]:
+        """
+        Lookup the payload stored under `key`, `None` when it is missing or
+        expired. When it is about to expire, it is read again in the
+        background by calling `refresh`.
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+
+            age = self.clock() - entry.stored_at
+            if age >= self.ttl:
+                del self.entries[key]
+                self.stats["misses"] += 1
+                return None
+
+            self.entries.move_to_end(key)
+            self.stats["hits"] += 1
+            if (
+                refresh is not None
+                and not entry.refreshing
+                and age >= self.ttl * self.refresh_ahead
+            ):
+                entry.refreshing = True
+                threading.Thread(
+                    target=self.refresh,
+                    args=(key, entry, refresh),
+                    name="chaoslib-secrets-refresh",
+                    daemon=True,
+                ).start()
+            return entry.value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self.lock:
+            self.entries[key] = CachedSecret(value, self.clock())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def refresh(
+        self, key: Hashable, entry: "CachedSecret", refresh: Callable[[], Any]
+    ) -> None:
+        try:
+            value = refresh()
+        except Exception:
+            logger.debug("Failed to refresh a cached secret", exc_info=True)
+            value = None
+
+        with self.lock:
+            entry.refreshing = False
+            if value is None or self.entries.get(key) is not entry:
+                return
+            self.stats["refreshes"] += 1
+        self.set(key, value)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+def get_secrets_cache(settings: Settings = None) -> Optional[SecretsCache]:
+    """
+    Lookup the secrets cache shared by the runs of the process, or create it
+    if none exists yet. Returns `None` unless it was enabled in the settings:
+
+    ```yaml
+    runtime:
+      secrets:
+        cache:
+          ttl: 300
+          max_size: 256
+          refresh_ahead: 0.8
+    ```
+    """
+    global _secrets_cache
+    runtime = (settings or {}).get("runtime", {}).get("secrets", {})
+    cache_settings = runtime.get("cache")
+    if not cache_settings:
+        return None
+
+    if not isinstance(cache_settings, dict):
+        cache_settings = {}
+
+    with _secrets_cache_lock:
+        if _secrets_cache is None:
+            _secrets_cache = SecretsCache(
+                ttl=cache_settings.get("ttl", 300),
+                max_size=cache_settings.get("max_size", 256),
+                refresh_ahead=cache_settings.get("refresh_ahead", 0.8),
             )
-            return {}
+        return _secrets_cache
 
-        vault_path = secrets_info.get("path")
 
+def clear_secrets_cache() -> None:
+    """
+    Forget the secrets cache shared by the runs of the process.
+    """
+    global _secrets_cache
+    with _secrets_cache_lock:
+        if _secrets_cache is not None:
+            _secrets_cache.clear()
+        _secrets_cache = None
+
+
+###############################################################################
+# Internals
+###############################################################################
+class CachedSecret:
+    __slots__ = ("value", "stored_at", "refreshing")
+
+    def __init__(self, value: Any, stored_at: float) -> None:
+        self.value = value
+        self.stored_at = stored_at
+        self.refreshing = False
+
+
+# a vault secret to fetch: the dictionary and key to set it at, and its
+# declaration
+VaultSecret = Tuple[Dict[str, Any], str, Dict[str, Any]]
+
+
+def collect_secrets(
+    secrets_info: Dict[str, Any],
+    extra_vars: Optional[Dict[str, Any]],
+    vault_secrets: List[VaultSecret],
+) -> Secrets:
+    """
+    Load the secrets that are readily available and collect those to be
+    fetched from Vault, so that they can all be fetched at once.
+    """
+    extra_vars = extra_vars or {}
+
+    secrets = {}
+
+    for key, value in secrets_info.items():
+        if isinstance(value, dict):
+            if extra_vars.get(key, None) is not None:
+                secrets[key] = extra_vars.get(key)
+
+            elif value.get("type") == "env":
+                secrets[key] = load_secret_from_env(value)
+
+            elif value.get("type") == "vault":
+                secrets[key] = None
+                vault_secrets.append((secrets, key, value))
+
+            else:
+                secrets[key] = collect_secrets(
+                    value, extra_vars.get(key, None), vault_secrets
+                )
+
+        else:
+            secrets[key] = value
+
+    return secrets
+
+
+def fetch_vault_secrets(
+    vault_secrets: List[VaultSecret],
+    configuration: Configuration = None,
+    cache: SecretsCache = None,
+) -> None:
+    """
+    Fetch the given Vault secrets with a single client, authenticated once.
+    Each path is read only once, whatever the number of keys taken from it,
+    and paths are read concurrently.
+
+    Paths found in the `cache` are not read at all, nor is the client
+    authenticated when they all are.
+    """
+    if not HAS_HVAC:
+        logger.error(
+            "Install the `hvac` package to fetch secrets "
+            "from Vault: `pip install chaostoolkit-lib[vault]`."
+        )
+        for holder, key, _ in vault_secrets:
+            holder[key] = {}
+        return
+
+    configuration = configuration or {}
+
+    paths = []
+    for holder, key, secrets_info in vault_secrets:
+        vault_path = secrets_info.get("path")
         if vault_path is None:
             logger.warning(f"Missing Vault secret path for '{secrets_info}'")
-            return {}
-
-        # see https://github.com/chaostoolkit/chaostoolkit/issues/98
-        kv = client.secrets.kv
-        is_kv1 = kv.default_kv_version == "1"
-        if is_kv1:
-            vault_payload = kv.v1.read_secret(
-                path=vault_path,
-                mount_point=configuration.get("vault_secrets_mount_point", "secret"),
+        elif vault_path not in paths:
+            paths.append(vault_path)
+
+    payloads = {}
+    if cache is not None:
+        for path in list(paths):
+            payload = cache.get(
+                vault_cache_key(configuration, path),
+                refresh=lambda path=path: read_vault_secret(
+                    create_vault_client(configuration), path, configuration
+                ),
             )
+            if payload is not None:
+                payloads[path] = payload
+                paths.remove(path)
+
+    if paths:
+        client = create_vault_client(configuration)
+
+    if len(paths) == 1:
+        payloads[paths[0]] = read_vault_secret(client, paths[0], configuration)
+    elif paths:
+        max_workers = min(len(paths), configuration.get("vault_max_workers", 8))
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="chaoslib-vault"
+        ) as pool:
+            futures = {
+                path: pool.submit(read_vault_secret, client, path, configuration)
+                for path in paths
+            }
+        payloads.update({path: f.result() for path, f in futures.items()})
+
+    if cache is not None:
+        for path in paths:
+            if payloads.get(path) is not None:
+                cache.set(vault_cache_key(configuration, path), payloads[path])
+
+    for holder, key, secrets_info in vault_secrets:
+        data = payloads.get(secrets_info.get("path"))
+        if data is None:
+            holder[key] = {}
+            continue
+
+        secret_key = secrets_info.get("key")
+        if secret_key is not None:
+            holder[key] = data[secret_key]
+        elif isinstance(data, dict):
+            # each secret owns its copy of the payload read at that path
+            holder[key] = dict(data)
         else:
-            vault_payload = kv.v2.read_secret_version(
-                path=vault_path,
-                mount_point=configuration.get("vault_secrets_mount_point", "secret"),
-            )
+            holder[key] = data
 
-        if not vault_payload:
-            logger.warning(f"No Vault secret found at path: {vault_path}")
-            return {}
 
-        if is_kv1:
-            data = vault_payload.get("data")
-        else:
-            data = vault_payload.get("data", {}).get("data")
-
-        key = secrets_info.get("key")
+def vault_cache_key(configuration: Configuration, vault_path: str) -> Tuple:
+    """
+    Identify the payload at the given path by the Vault server, mount point,
+    KV version and the identity it is read with, so that secrets are never
+    shared between identities.
+    """
+    identity = ""
+    for name in ("vault_token", "vault_role_id", "vault_sa_role"):
+        if configuration.get(name):
+            identity = "{}:{}".format(name, configuration[name])
+            break
+
+    return (
+        "vault",
+        configuration.get("vault_addr"),
+        configuration.get("vault_secrets_mount_point", "secret"),
+        str(configuration.get("vault_kv_version", "2")),
+        vault_path,
+        hashlib.sha256(identity.encode("utf-8")).hexdigest(),
+    )
+
+
+def read_vault_secret(
+    client: Any, vault_path: str, configuration: Configuration
+) -> Optional[Dict[str, Any]]:
+    """
+    Read the payload at the given path of the Vault KV store.
+    """
+    # see https://github.com/chaostoolkit/chaostoolkit/issues/98
+    kv = client.secrets.kv
+    is_kv1 = kv.default_kv_version == "1"
+    mount_point = configuration.get("vault_secrets_mount_point", "secret")
+    if is_kv1:
+        vault_payload = kv.v1.read_secret(path=vault_path, mount_point=mount_point)
+    else:
+        vault_payload = kv.v2.read_secret_version(
+            path=vault_path, mount_point=mount_point
+        )
 
-        if key is not None:
-            secret = data[key]
-        else:
-            secret = data
+    if not vault_payload:
+        logger.warning(f"No Vault secret found at path: {vault_path}")
+        return None
 
-        return secret
+    if is_kv1:
+        return vault_payload.get("data")
+    return vault_payload.get("data", {}).get("data")
 
 
-###############################################################################
-# Internals
-###############################################################################
 def create_vault_client(configuration: Configuration = None):
     """
     Initialize a Vault client from either a token or an approle.
@@ -249,8 +527,10 @@ def create_vault_client(configuration: Configuration = None):
             role_id = configuration.get("vault_role_id")
             role_secret = configuration.get("vault_role_secret")
 
+            # hvac 1.0 moved the authentication methods to `client.auth`
+            login = getattr(client, "auth_approle", None) or client.auth.approle.login
             try:
-                app_role = client.auth_approle(role_id, role_secret)
+                app_role = login(role_id, role_secret)
             except Exception as ve:
                 raise InvalidExperiment(
                     f"Failed to connect to Vault with the AppRole: {str(ve)}"
@@ -269,9 +549,11 @@ def create_vault_client(configuration: Configuration = None):
                 with open(sa_token_path) as sa_token:
                     jwt = sa_token.read()
                     role = configuration.get("vault_sa_role")
-                    client.auth_kubernetes(
-                        role=role, jwt=jwt, use_token=True, mount_point=mount_point
+                    login = (
+                        getattr(client, "auth_kubernetes", None)
+                        or client.auth.kubernetes.login
                     )
+                    login(role=role, jwt=jwt, use_token=True, mount_point=mount_point)
             except OSError:
                 raise InvalidExperiment(
                     "Failed to get service account token at: {path}".format(
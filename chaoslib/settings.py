@@ -7,6 +7,8 @@ from typing import Any, Dict, List, Optional, Tuple, Union
 import yaml
 from logzero import logger
 
+from chaoslib.context import get_run_context
+from chaoslib.parsers import parse_yaml
 from chaoslib.types import Settings
 
 __all__ = [
@@ -35,7 +37,7 @@ def load_settings(settings_path: str = CHAOSTOOLKIT_CONFIG_PATH) -> Settings:
 
     with open(settings_path) as f:
         try:
-            settings = yaml.safe_load(f.read())
+            settings = parse_yaml(f.read())
             loaded_settings.set(settings)
             return settings
         except yaml.YAMLError as ye:
@@ -58,8 +60,12 @@ def save_settings(settings: Settings, settings_path: str = CHAOSTOOLKIT_CONFIG_P
 
 def get_loaded_settings() -> Settings:
     """
-    Settings that have been loaded in the current context.
+    Settings that have been loaded in the current context, or those of the
+    current run context when it was given some.
     """
+    settings = get_run_context().settings
+    if settings is not None:
+        return settings
     return loaded_settings.get()
 
 
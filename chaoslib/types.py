@@ -25,6 +25,8 @@ __all__ = [
     "Control",
     "Strategy",
     "Schedule",
+    "ScheduleMode",
+    "Overrun",
     "ConfigVars",
     "SecretVars",
 ]
@@ -109,13 +111,60 @@ class Dry(enum.Enum):
         raise ValueError("Unknown dry")
 
 
+class ScheduleMode(enum.Enum):
+    FIXED_DELAY = "fixed-delay"
+    FIXED_RATE = "fixed-rate"
+
+    @staticmethod
+    def from_string(value: str) -> "ScheduleMode":
+        if value == "fixed-delay":
+            return ScheduleMode.FIXED_DELAY
+        elif value == "fixed-rate":
+            return ScheduleMode.FIXED_RATE
+
+        raise ValueError("Unknown schedule mode")
+
+
+class Overrun(enum.Enum):
+    SKIP = "skip"
+    QUEUE = "queue"
+    CONCURRENT = "concurrent"
+
+    @staticmethod
+    def from_string(value: str) -> "Overrun":
+        if value == "skip":
+            return Overrun.SKIP
+        elif value == "queue":
+            return Overrun.QUEUE
+        elif value == "concurrent":
+            return Overrun.CONCURRENT
+
+        raise ValueError("Unknown overrun policy")
+
+
 class Schedule:
     def __init__(
         self,
         continuous_hypothesis_frequency: float = 1.0,
         fail_fast: bool = False,
         fail_fast_ratio: float = 0,
+        keep_last_iterations: Optional[int] = None,
+        mode: ScheduleMode = ScheduleMode.FIXED_DELAY,
+        overrun: Overrun = Overrun.SKIP,
+        max_concurrent_iterations: int = 4,
     ):
         self.continuous_hypothesis_frequency = continuous_hypothesis_frequency
         self.fail_fast = fail_fast
         self.fail_fast_ratio = fail_fast_ratio
+        # with a fixed delay, the hypothesis waits for the frequency after
+        # each iteration. With a fixed rate, iterations start on ticks every
+        # frequency seconds and `overrun` decides what happens to the ticks
+        # due while an iteration is still running
+        self.mode = mode
+        self.overrun = overrun
+        # with `Overrun.CONCURRENT`, ticks due while that many iterations
+        # are still running are skipped
+        self.max_concurrent_iterations = max_concurrent_iterations
+        # when set, only the last iterations of the continuous hypothesis,
+        # and those that deviated, are kept in the journal
+        self.keep_last_iterations = keep_last_iterations
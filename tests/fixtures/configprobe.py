@@ -1,2 +1,8 @@
 def raise_exception():
     raise RuntimeError("booom")
+
+
+def read_secrets(secrets):
+    seen = dict(secrets)
+    secrets["token"] = "tampered"
+    return seen
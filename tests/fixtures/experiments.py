@@ -948,3 +948,129 @@ ExperimentWithOnlyTopLevelControls["controls"] = [
         },
     },
 ]
+
+
+ExperimentWithDependencyGraph = {
+    "title": "Hello world!",
+    "description": "Say hello world.",
+    "method": [
+        {
+            "type": "action",
+            "name": "pause-a",
+            "provider": {
+                "type": "python",
+                "module": "fixtures.longpythonfunc",
+                "func": "pause",
+                "arguments": {"howlong": 0.5},
+            },
+        },
+        {
+            "type": "action",
+            "name": "pause-b",
+            "provider": {
+                "type": "python",
+                "module": "fixtures.longpythonfunc",
+                "func": "pause",
+                "arguments": {"howlong": 0.5},
+            },
+        },
+        {
+            "type": "action",
+            "name": "pause-c",
+            "depends_on": ["pause-a", "pause-b"],
+            "provider": {
+                "type": "python",
+                "module": "fixtures.longpythonfunc",
+                "func": "pause",
+                "arguments": {"howlong": 0.1},
+            },
+        },
+    ],
+}
+
+
+ExperimentWithDependencyCycle = deepcopy(ExperimentWithDependencyGraph)
+ExperimentWithDependencyCycle["method"][0]["depends_on"] = ["pause-c"]
+
+
+ExperimentWithUnknownDependency = deepcopy(ExperimentWithDependencyGraph)
+ExperimentWithUnknownDependency["method"][0]["depends_on"] = ["pause-z"]
+
+
+ExperimentWithCoroutineActivities = {
+    "title": "Hello world!",
+    "description": "Say hello world.",
+    "steady-state-hypothesis": {
+        "title": "World needs politeness",
+        "probes": [
+            {
+                "type": "probe",
+                "name": "has-world",
+                "tolerance": 0,
+                "provider": {"type": "process", "path": "echo", "arguments": "hello"},
+            }
+        ],
+    },
+    "method": [
+        {
+            "type": "probe",
+            "name": "pause-{}".format(i),
+            "background": True,
+            "provider": {
+                "type": "python",
+                "module": "fixtures.longpythonfunc",
+                "func": "pause_async",
+                "arguments": {"howlong": 0.5},
+            },
+        }
+        for i in range(10)
+    ],
+    "rollbacks": [
+        {
+            "type": "action",
+            "name": "echo-rollback-is-done",
+            "provider": {"type": "process", "path": "echo", "arguments": "done!!"},
+        }
+    ],
+}
+
+
+def sleep_probe(name: str, seconds: float) -> dict:
+    return {
+        "type": "probe",
+        "name": name,
+        "tolerance": 0,
+        "provider": {"type": "process", "path": "sleep", "arguments": [str(seconds)]},
+    }
+
+
+ExperimentWithSlowHypothesisProbes = {
+    "title": "Slow probes",
+    "description": "Each probe takes a while to complete",
+    "steady-state-hypothesis": {
+        "title": "All is well",
+        "probes": [sleep_probe("sleep-{}".format(i), 0.5) for i in range(4)],
+    },
+    "method": [],
+}
+
+
+ExperimentWithFailingSlowHypothesisProbes = {
+    "title": "Slow probes",
+    "description": "A probe fails while another one is still running",
+    "steady-state-hypothesis": {
+        "title": "All is not well",
+        "probes": [
+            sleep_probe("sleep-long", 2),
+            {
+                "type": "probe",
+                "name": "fail-fast",
+                "tolerance": 0,
+                "provider": {"type": "process", "path": "false"},
+            },
+            sleep_probe("sleep-never", 0.1),
+            sleep_probe("sleep-never-either", 0.1),
+        ],
+    },
+    "method": [],
+}
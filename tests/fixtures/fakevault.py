@@ -0,0 +1,83 @@
+import json
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+__all__ = ["FakeVault"]
+
+
+class FakeVault:
+    """
+    A tiny Vault HTTP server implementing AppRole logins and KV reads, which
+    counts the requests it receives.
+    """
+
+    def __init__(self, secrets: Dict[str, Dict[str, Any]], delay: float = 0) -> None:
+        self.secrets = secrets
+        self.delay = delay
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.make_handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FakeVault":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def make_handler(self) -> type:
+        vault = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args: Any) -> None:
+                pass
+
+            def reply(self, status: int, body: Dict[str, Any] = None) -> None:
+                payload = json.dumps(body or {}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                with vault.lock:
+                    vault.requests[("POST", self.path)] += 1
+                if self.path == "/v1/auth/approle/login":
+                    self.reply(200, {"auth": {"client_token": "s.fake-token"}})
+                else:
+                    self.reply(404, {"errors": []})
+
+            def do_GET(self) -> None:
+                with vault.lock:
+                    vault.requests[("GET", self.path)] += 1
+                    vault.in_flight += 1
+                    vault.max_in_flight = max(vault.max_in_flight, vault.in_flight)
+                try:
+                    time.sleep(vault.delay)
+                    path = self.path.split("?")[0]
+                    if path.startswith("/v1/secret/data/"):
+                        data = vault.secrets.get(path[len("/v1/secret/data/") :])
+                        if data is not None:
+                            self.reply(200, {"data": {"data": data, "metadata": {}}})
+                            return
+                    self.reply(404, {"errors": []})
+                finally:
+                    with vault.lock:
+                        vault.in_flight -= 1
+
+        return Handler
@@ -0,0 +1,29 @@
+import asyncio
+import os
+import time
+
+
+def whoami() -> int:
+    return os.getpid()
+
+
+def sleep_then_whoami(howlong: float = 3.0) -> int:
+    time.sleep(howlong)
+    return os.getpid()
+
+
+def large_output(size: int) -> bytes:
+    return b"x" * size
+
+
+def boom() -> None:
+    raise ValueError("boom")
+
+
+def unpicklable() -> object:
+    return lambda: None
+
+
+async def whoami_async() -> int:
+    await asyncio.sleep(0)
+    return os.getpid()
@@ -1,10 +1,18 @@
+import asyncio
 import time
 
+from chaoslib.cancellation import CancellationToken
+
 
 def pause(howlong: float = 3.0) -> None:
     time.sleep(howlong)
 
 
+async def pause_async(howlong: float = 3.0) -> float:
+    await asyncio.sleep(howlong)
+    return howlong
+
+
 def be_long(howlong: float = 3.0) -> int:
     end = time.time() + howlong
 
@@ -14,3 +22,15 @@ def be_long(howlong: float = 3.0) -> int:
         time.sleep(0.1)
 
     return i
+
+
+def be_long_cancellable(howlong: float = 3.0, cancel: CancellationToken = None) -> int:
+    end = time.time() + howlong
+
+    i = 0
+    while time.time() < end:
+        i = i + 1
+        if cancel.wait(0.1):
+            cancel.raise_if_cancelled()
+
+    return i
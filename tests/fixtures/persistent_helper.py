@@ -0,0 +1,28 @@
+# A helper answering the requests of persistent process activities, it
+# responds with its pid and the number of requests it has served
+import json
+import os
+import sys
+import time
+
+served = 0
+for line in sys.stdin:
+    request = json.loads(line)
+    payload = request["request"]
+    if payload.get("crash"):
+        sys.exit(3)
+    time.sleep(payload.get("sleep", 0))
+
+    served += 1
+    print("not a response, ignored", flush=True)
+    print(
+        json.dumps(
+            {
+                "id": request["id"],
+                "status": payload.get("status", 0),
+                "stdout": f"{os.getpid()} {served}",
+                "stderr": "",
+            }
+        ),
+        flush=True,
+    )
@@ -0,0 +1,133 @@
+import threading
+from copy import deepcopy
+
+from fixtures import experiments
+
+from chaoslib.batch import BatchRunner
+from chaoslib.control import (
+    cleanup_global_controls,
+    get_global_controls,
+    load_global_controls,
+)
+from chaoslib.run import RunEventHandler
+
+
+def make_experiment(title: str, path: str, pause: float = 0.1) -> dict:
+    return {
+        "title": title,
+        "description": "checks a path",
+        "method": [
+            {
+                "type": "probe",
+                "name": "check-path",
+                "pauses": {"after": pause},
+                "provider": {
+                    "type": "python",
+                    "module": "os.path",
+                    "func": "exists",
+                    "arguments": {"path": path},
+                },
+            }
+        ],
+        "rollbacks": [{"ref": "check-path"}],
+    }
+
+
+class ConcurrencyHandler(RunEventHandler):
+    def __init__(self, counter: dict, lock: threading.Lock) -> None:
+        self.counter = counter
+        self.lock = lock
+
+    def started(self, experiment, journal) -> None:
+        with self.lock:
+            self.counter["current"] += 1
+            self.counter["max"] = max(self.counter["max"], self.counter["current"])
+
+    def finish(self, journal) -> None:
+        with self.lock:
+            self.counter["current"] -= 1
+
+
+def test_batch_runs_have_their_own_activity_cache():
+    batch = [
+        make_experiment("exists", __file__),
+        make_experiment("missing", "/does/not/exist"),
+    ]
+
+    with BatchRunner(max_workers=2) as runner:
+        report = runner.run(batch, {})
+
+    runs = report["runs"]
+    assert [r["title"] for r in runs] == ["exists", "missing"]
+    assert [r["status"] for r in runs] == ["completed", "completed"]
+
+    # each rollback played the activity of its own experiment
+    assert runs[0]["journal"]["rollbacks"][0]["output"] is True
+    assert runs[1]["journal"]["rollbacks"][0]["output"] is False
+
+
+def test_batch_runs_at_most_max_workers_experiments_at_once():
+    counter = {"current": 0, "max": 0}
+    lock = threading.Lock()
+    batch = [make_experiment(f"exp-{i}", __file__, pause=0.2) for i in range(6)]
+
+    with BatchRunner(max_workers=3) as runner:
+        report = runner.run(
+            batch, {}, event_handlers=lambda e: [ConcurrencyHandler(counter, lock)]
+        )
+
+    assert counter["max"] == 3
+    assert report["max_workers"] == 3
+    assert report["summary"]["total"] == 6
+    assert report["summary"]["completed"] == 6
+
+
+def test_batch_max_workers_can_be_set_from_settings():
+    settings = {"runtime": {"batch": {"max_workers": 2}}}
+    with BatchRunner() as runner:
+        report = runner.run([make_experiment("one", __file__)], settings)
+    assert report["max_workers"] == 2
+
+
+def test_batch_reports_runs_that_could_not_start():
+    broken = make_experiment("broken", __file__)
+    broken["configuration"] = {"mykey": {"type": "env", "key": "DOES_NOT_EXIST"}}
+    batch = [make_experiment("fine", __file__), broken]
+
+    with BatchRunner(max_workers=2) as runner:
+        report = runner.run(batch, {})
+
+    fine, errored = report["runs"]
+    assert fine["status"] == "completed"
+    assert errored["status"] == "errored"
+    assert errored["journal"] is None
+    assert "DOES_NOT_EXIST" in errored["error"]
+    assert report["summary"]["errored"] == 1
+    assert report["summary"]["completed"] == 1
+
+
+def test_batch_runs_have_their_own_global_controls():
+    settings = {
+        "dummy-key": "hello there",
+        "controls": {
+            "dummy": {
+                "provider": {"type": "python", "module": "fixtures.controls.dummy"}
+            }
+        },
+    }
+    batch = [deepcopy(experiments.ExperimentNoControls) for _ in range(3)]
+
+    load_global_controls(settings)
+    try:
+        with BatchRunner(max_workers=3) as runner:
+            report = runner.run(batch, settings)
+
+        # runs cleaned up their copy only
+        assert len(get_global_controls()) == 1
+    finally:
+        cleanup_global_controls()
+
+    assert report["summary"]["completed"] == 3
+    for experiment in batch:
+        assert experiment["control-value"] == "hello there"
+        assert experiment["method"][0]["after_activity_control"] is True
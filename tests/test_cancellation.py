@@ -0,0 +1,235 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from chaoslib.cancellation import CancellationToken, get_cancellation_token
+from chaoslib.exceptions import ActivityCancelled
+from chaoslib.provider.http import run_http_activity, send_cancellable
+from chaoslib.provider.process import (
+    run_process_activity,
+    shutdown_persistent_processes,
+)
+from chaoslib.provider.python import run_python_activity, shutdown_python_workers
+from chaoslib.run import AsyncRunner, cancel_background_activities
+from chaoslib.types import Strategy
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(3)
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    yield "http://127.0.0.1:{}".format(server.server_address[1])
+    server.shutdown()
+    server.server_close()
+
+
+def cancel_in(token: CancellationToken, seconds: float) -> threading.Timer:
+    timer = threading.Timer(seconds, token.cancel, args=("test",))
+    timer.start()
+    return timer
+
+
+def python_activity(func: str, **arguments) -> dict:
+    return {
+        "type": "action",
+        "name": func,
+        "provider": {
+            "type": "python",
+            "module": "fixtures.longpythonfunc",
+            "func": func,
+            "arguments": arguments,
+        },
+    }
+
+
+def test_callbacks_are_called_once():
+    token = CancellationToken()
+    calls = []
+    token.register(lambda: calls.append("first"))
+    unregister = token.register(lambda: calls.append("unregistered"))
+    unregister()
+
+    token.cancel("because")
+    token.cancel("again")
+    assert calls == ["first"]
+    assert token.reason == "because"
+    assert token.elapsed() >= 0
+
+    # too late, called straight away
+    token.register(lambda: calls.append("late"))
+    assert calls == ["first", "late"]
+
+    with pytest.raises(ActivityCancelled) as x:
+        token.raise_if_cancelled()
+    assert "activity was cancelled: because" in str(x.value)
+
+
+def test_wait_returns_as_soon_as_cancelled():
+    token = CancellationToken()
+    assert token.wait(0.01) is False
+
+    cancel_in(token, 0.1)
+    started = time.time()
+    assert token.wait(10) is True
+    assert time.time() - started < 1
+
+
+def test_token_of_the_current_run():
+    outside = get_cancellation_token()
+    assert outside is not get_cancellation_token()
+    assert outside.cancelled is False
+    assert outside.cancellable is False
+
+    with CancellationToken().activate() as token:
+        assert get_cancellation_token() is token
+        assert token.cancellable is True
+    assert get_cancellation_token() is not token
+
+
+def test_python_activity_is_given_the_token():
+    activity = python_activity("be_long_cancellable", howlong=10)
+    with CancellationToken().activate() as token:
+        cancel_in(token, 0.2)
+        started = time.time()
+        with pytest.raises(ActivityCancelled):
+            run_python_activity(activity, None, None)
+    assert time.time() - started < 2
+
+
+def test_isolated_python_activity_worker_is_killed():
+    activity = python_activity("pause", howlong=30)
+    activity["provider"]["isolation"] = "process"
+    try:
+        with CancellationToken().activate() as token:
+            cancel_in(token, 1)
+            started = time.time()
+            with pytest.raises(ActivityCancelled):
+                run_python_activity(activity, None, None)
+        assert time.time() - started < 10
+    finally:
+        shutdown_python_workers()
+
+
+def test_process_is_killed():
+    activity = {
+        "type": "action",
+        "name": "sleep",
+        "provider": {"type": "process", "path": "sleep", "arguments": ["30"]},
+    }
+    with CancellationToken().activate() as token:
+        cancel_in(token, 0.2)
+        started = time.time()
+        with pytest.raises(ActivityCancelled):
+            run_process_activity(activity, None, None)
+    assert time.time() - started < 2
+
+
+def test_persistent_process_is_killed(tmp_path):
+    activity = {
+        "type": "probe",
+        "name": "helper",
+        "provider": {
+            "type": "process",
+            "path": sys.executable,
+            "arguments": ["tests/fixtures/persistent_helper.py"],
+            "persistent": True,
+            "request": {"sleep": 30},
+        },
+    }
+    with CancellationToken().activate() as token:
+        try:
+            cancel_in(token, 0.5)
+            started = time.time()
+            with pytest.raises(ActivityCancelled):
+                run_process_activity(activity, None, None)
+            assert time.time() - started < 5
+        finally:
+            shutdown_persistent_processes()
+
+
+def test_http_request_is_abandoned(slow_server):
+    activity = {
+        "type": "probe",
+        "name": "slow",
+        "provider": {"type": "http", "url": slow_server, "timeout": 10},
+    }
+    with CancellationToken().activate() as token:
+        cancel_in(token, 0.2)
+        started = time.time()
+        with pytest.raises(ActivityCancelled):
+            run_http_activity(activity, None, None)
+    assert time.time() - started < 2
+
+
+def test_http_request_is_sent_inline_when_it_cannot_be_cancelled():
+    def send():
+        return threading.current_thread()
+
+    outside = get_cancellation_token()
+    assert send_cancellable(send, outside) is threading.current_thread()
+    with CancellationToken().activate() as token:
+        assert send_cancellable(send, token) is not threading.current_thread()
+
+
+def test_async_runner_http_request_is_abandoned(slow_server):
+    experiment = {
+        "title": "interrupted while waiting on a slow server",
+        "description": "n/a",
+        "method": [
+            {
+                "type": "probe",
+                "name": "interrupt-next-action",
+                "background": True,
+                "provider": {
+                    "type": "python",
+                    "module": "fixtures.interrupter",
+                    "func": "interrupt_ungracefully_in",
+                    "arguments": {"seconds": 0.5},
+                },
+            },
+            {
+                "type": "action",
+                "name": "slow",
+                "provider": {"type": "http", "url": slow_server, "timeout": 10},
+            },
+        ],
+    }
+    started = time.time()
+    with AsyncRunner(Strategy.DEFAULT) as runner:
+        journal = runner.run(experiment)
+
+    assert journal["status"] == "interrupted"
+    assert time.time() - started < 2.5
+
+
+def test_background_activities_are_waited_for_a_bounded_time():
+    settings = {"runtime": {"cancellation": {"grace_period": 0.5}}}
+    pool = ThreadPoolExecutor(max_workers=2)
+    with CancellationToken().activate() as token:
+        cooperative = pool.submit(token.wait, 10)
+        stubborn = pool.submit(time.sleep, 2)
+
+        started = time.time()
+        cancel_background_activities([cooperative, stubborn], settings)
+        elapsed = time.time() - started
+
+    assert token.cancelled
+    assert cooperative.result() is True
+    assert not stubborn.done()
+    assert 0.4 < elapsed < 1.5
+    pool.shutdown(wait=True)
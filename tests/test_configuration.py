@@ -1,6 +1,7 @@
 import json
 import os
 import tempfile
+import time
 from unittest.mock import patch
 
 import pytest
@@ -362,3 +363,87 @@ def test_env_var_can_be_used_with_loading_dynamic_config(fixtures_dir: str):
     dcfg = load_dynamic_configuration(cfg)
     assert dcfg["some_config_1"] == os.getcwd()
     assert dcfg["some_config_2"] is True
+
+
+def shell_probe(script: str) -> dict:
+    return {
+        "type": "probe",
+        "provider": {"type": "process", "path": "sh", "arguments": ["-c", script]},
+    }
+
+
+def test_dynamic_configuration_probes_can_run_concurrently():
+    settings = {"runtime": {"configuration": {"strategy": "concurrent"}}}
+    config = {"greeting": "hello"}
+    for i in range(5):
+        config[f"slow-{i}"] = shell_probe(f"sleep 0.3; echo {i}")
+
+    start = time.monotonic()
+    loaded = load_dynamic_configuration(config, settings=settings)
+    duration = time.monotonic() - start
+
+    assert loaded == {
+        "greeting": "hello",
+        "slow-0": "0",
+        "slow-1": "1",
+        "slow-2": "2",
+        "slow-3": "3",
+        "slow-4": "4",
+    }
+    assert list(loaded.keys()) == list(config.keys())
+    assert duration < 1.2
+
+
+def test_concurrent_dynamic_configuration_waits_for_referenced_keys():
+    settings = {"runtime": {"configuration": {"strategy": "concurrent"}}}
+    loaded = load_dynamic_configuration(
+        {
+            "capped": {
+                "type": "probe",
+                "provider": {
+                    "type": "python",
+                    "module": "string",
+                    "func": "capwords",
+                    "arguments": {"s": "hello world from earth"},
+                },
+            },
+            "independent": shell_probe("echo alone"),
+            "shorten": {
+                "type": "probe",
+                "provider": {
+                    "type": "python",
+                    "module": "textwrap",
+                    "func": "shorten",
+                    "arguments": {"text": "${capped}", "width": 12},
+                },
+            },
+            "explicit": dict(
+                shell_probe("sleep 0.1; echo done"), depends_on=["shorten"]
+            ),
+        },
+        settings=settings,
+    )
+
+    assert loaded["capped"] == "Hello World From Earth"
+    assert loaded["shorten"] == "Hello [...]"
+    assert loaded["independent"] == "alone"
+    assert loaded["explicit"] == "done"
+
+
+def test_dynamic_configuration_probes_share_secrets_without_copying_them():
+    probe = {
+        "type": "probe",
+        "provider": {
+            "type": "python",
+            "module": "fixtures.configprobe",
+            "func": "read_secrets",
+        },
+    }
+    secrets = {"vault": {"token": "shhh"}, "k8s": {"ca": "---"}}
+
+    loaded = load_dynamic_configuration({"seen": probe}, secrets)
+
+    assert loaded["seen"] == {"token": "shhh", "ca": "---"}
+    # the declaration is left untouched so secrets never end up in the journal
+    assert "secrets" not in probe["provider"]
+    assert secrets == {"vault": {"token": "shhh"}, "k8s": {"ca": "---"}}
@@ -0,0 +1,132 @@
+import threading
+from copy import deepcopy
+
+from fixtures import experiments
+
+from chaoslib.activity import execute_activity
+from chaoslib.caching import cache_activities, clear_cache, lookup_activity
+from chaoslib.context import RunContext, get_run_context
+from chaoslib.control import get_global_controls, load_global_controls
+from chaoslib.run import Runner
+from chaoslib.settings import get_loaded_settings
+from chaoslib.types import Strategy
+
+DUMMY_CONTROL_SETTINGS = {
+    "dummy-key": "hello there",
+    "controls": {
+        "dummy": {"provider": {"type": "python", "module": "fixtures.controls.dummy"}}
+    },
+}
+
+
+def make_experiment(title: str, path: str) -> dict:
+    return {
+        "title": title,
+        "description": "checks a path",
+        "method": [
+            {
+                "type": "probe",
+                "name": "check-path",
+                "pauses": {"after": 0.2},
+                "provider": {
+                    "type": "python",
+                    "module": "os.path",
+                    "func": "exists",
+                    "arguments": {"path": path},
+                },
+            }
+        ],
+        "rollbacks": [{"ref": "check-path"}],
+    }
+
+
+def test_process_context_is_used_when_none_is_active():
+    process = get_run_context()
+    assert get_run_context() is process
+
+    context = RunContext()
+    with context.activate():
+        assert get_run_context() is context
+        with RunContext().activate() as nested:
+            assert get_run_context() is nested
+        assert get_run_context() is context
+
+    assert get_run_context() is process
+
+
+def test_activities_are_looked_up_in_the_current_context():
+    experiment = make_experiment("exists", __file__)
+    context = RunContext()
+
+    with context.activate():
+        cache_activities(experiment)
+        assert lookup_activity("check-path") is experiment["method"][0]
+
+    assert lookup_activity("check-path") is None
+    assert lookup_activity("check-path", context) is experiment["method"][0]
+
+    clear_cache(context)
+    assert lookup_activity("check-path", context) is None
+
+
+def test_execute_activity_resolves_references_from_the_given_context():
+    experiment = make_experiment("exists", __file__)
+    context = RunContext()
+    context.index_activities(experiment)
+
+    run = execute_activity(
+        experiment, {"ref": "check-path"}, {}, {}, None, run_context=context
+    )
+    assert run["status"] == "succeeded"
+    assert run["output"] is True
+
+
+def test_settings_of_the_current_context_are_the_loaded_ones():
+    settings = {"runtime": {"hypothesis": {"strategy": "concurrent"}}}
+    with RunContext(settings=settings).activate():
+        assert get_loaded_settings() is settings
+
+    with RunContext().activate():
+        assert get_loaded_settings() is not settings
+
+
+def test_runners_with_their_own_context_do_not_interfere():
+    with_controls = deepcopy(experiments.ExperimentNoControls)
+    exists = make_experiment("exists", __file__)
+    missing = make_experiment("missing", "/does/not/exist")
+
+    # global controls of the first runner only
+    controlled = RunContext()
+    load_global_controls(DUMMY_CONTROL_SETTINGS, run_context=controlled)
+
+    journals = {}
+
+    def play(name, experiment, settings, run_context):
+        with Runner(Strategy.DEFAULT, run_context=run_context) as runner:
+            journals[name] = runner.run(experiment, settings)
+
+    threads = [
+        threading.Thread(
+            target=play,
+            args=("controlled", with_controls, DUMMY_CONTROL_SETTINGS, controlled),
+        ),
+        threading.Thread(target=play, args=("exists", exists, {}, RunContext())),
+        threading.Thread(target=play, args=("missing", missing, {}, RunContext())),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert with_controls["control-value"] == "hello there"
+    assert "control-value" not in exists
+    assert "control-value" not in missing
+    assert "before_activity_control" not in exists["method"][0]
+
+    assert journals["exists"]["rollbacks"][0]["output"] is True
+    assert journals["missing"]["rollbacks"][0]["output"] is False
+
+    # the runs cleaned up their own controls and left the process' alone
+    assert controlled.get_global_controls() == []
+    assert get_global_controls() == []
+    assert lookup_activity("check-path") is None
@@ -1,3 +1,4 @@
+import inspect
 import json
 import tempfile
 from copy import deepcopy
@@ -5,6 +6,7 @@ from unittest.mock import patch
 
 import pytest
 from fixtures import experiments
+from fixtures.controls import dummy
 
 from chaoslib.activity import execute_activity
 from chaoslib.control import (
@@ -18,7 +20,13 @@ from chaoslib.control import (
     initialize_global_controls,
     load_global_controls,
 )
-from chaoslib.control.python import validate_python_control
+from chaoslib.control.python import (
+    _level_mapping,
+    apply_python_control,
+    cleanup_control,
+    compile_control,
+    validate_python_control,
+)
 from chaoslib.exceptions import InterruptExecution, InvalidActivity
 from chaoslib.experiment import ensure_experiment_is_valid, run_experiment
 from chaoslib.loader import load_experiment
@@ -670,3 +678,38 @@ def test_running_in_order():
             assert exp["position"] == [1, 2, 3]
     finally:
         cleanup_global_controls()
+
+
+def test_control_functions_are_inspected_once_per_run():
+    exp = deepcopy(experiments.ExperimentWithControls)
+    exp["method"] = [deepcopy(exp["method"][0]) for _ in range(20)]
+
+    with patch(
+        "chaoslib.control.python.inspect.signature", wraps=inspect.signature
+    ) as sig:
+        journal = run_experiment(exp)
+
+    assert journal["status"] == "completed"
+    # configure_control and each implemented level, not each application
+    assert sig.call_count <= len(_level_mapping) + 1
+
+
+def test_compiled_control_picks_up_patched_functions():
+    exp = deepcopy(experiments.ExperimentWithControls)
+    control = exp["controls"][0]
+    activity = exp["method"][0]
+    compile_control(control)
+
+    try:
+        with patch.object(dummy, "before_activity_control") as before:
+            apply_python_control(
+                "activity-before", control, experiment=exp, context=activity
+            )
+        before.assert_called_once_with(context=activity)
+
+        apply_python_control(
+            "activity-before", control, experiment=exp, context=activity
+        )
+        assert activity["before_activity_control"] is True
+    finally:
+        cleanup_control(control)
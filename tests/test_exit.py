@@ -8,7 +8,7 @@ import pytest
 from fixtures import experiments
 
 from chaoslib.exit import exit_gracefully, exit_ungracefully
-from chaoslib.run import Runner
+from chaoslib.run import AsyncRunner, Runner
 from chaoslib.types import Strategy
 
 pytestmark = pytest.mark.skipif(os.getenv("CI") is not None, reason="Skip CI")
@@ -134,12 +134,34 @@ def test_do_not_wait_for_background_activity_on_ungraceful_exit():
     t = threading.Thread(target=_exit_soon)
 
     x = deepcopy(experiments.SimpleExperimentWithBackgroundActivity)
+    settings = {"runtime": {"cancellation": {"grace_period": 0.5}}}
+    with Runner(Strategy.DEFAULT) as runner:
+        t.start()
+        journal = runner.run(x, settings=settings)
+        assert journal["status"] == "interrupted"
+        # the background activity cannot be cancelled, it was waited for
+        # the grace period only and left running
+        assert journal["duration"] < 2.5
+        assert "end" not in journal["run"][0]
+
+
+def test_cancel_background_activity_on_ungraceful_exit():
+    def _exit_soon():
+        time.sleep(1.5)
+        exit_ungracefully()
+
+    t = threading.Thread(target=_exit_soon)
+
+    x = deepcopy(experiments.SimpleExperimentWithBackgroundActivity)
+    x["method"][0]["provider"]["func"] = "be_long_cancellable"
     with Runner(Strategy.DEFAULT) as runner:
         t.start()
         journal = runner.run(x)
         assert journal["status"] == "interrupted"
         assert journal["run"][0]["status"] == "failed"
-        assert "ExperimentExitedException" in journal["run"][0]["exception"][-1]
+        assert "ActivityCancelled" in journal["run"][0]["exception"][-1]
+        # the background activity stopped as soon as it was cancelled
+        assert journal["run"][0]["duration"] < 2.5
 
 
 def test_wait_for_background_activity_to_finish_on_graceful_exit():
@@ -155,3 +177,29 @@ def test_wait_for_background_activity_to_finish_on_graceful_exit():
         journal = runner.run(x)
         assert journal["status"] == "interrupted"
         assert journal["run"][0]["status"] == "succeeded"
+
+
+def test_async_runner_plays_rollbacks_on_graceful_exit_with_process_action():
+    x = deepcopy(experiments.ExperimentGracefulExitLongProcessCall)
+    x["method"][1]["provider"] = {"type": "process", "path": "sleep", "arguments": "5"}
+    with AsyncRunner(Strategy.DEFAULT) as runner:
+        journal = runner.run(
+            x, settings={"runtime": {"rollbacks": {"strategy": "always"}}}
+        )
+
+        assert journal["status"] == "interrupted"
+        assert len(journal["rollbacks"]) == 1
+        assert journal["duration"] < 4
+
+
+def test_async_runner_does_not_play_rollbacks_on_ungraceful_exit():
+    x = deepcopy(experiments.ExperimentUngracefulExitLongProcessCall)
+    x["method"][1]["provider"] = {"type": "process", "path": "sleep", "arguments": "5"}
+    with AsyncRunner(Strategy.DEFAULT) as runner:
+        journal = runner.run(
+            x, settings={"runtime": {"rollbacks": {"strategy": "always"}}}
+        )
+
+        assert journal["status"] == "interrupted"
+        assert len(journal["rollbacks"]) == 0
+        assert journal["duration"] < 4
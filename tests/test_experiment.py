@@ -2,16 +2,24 @@ import json
 import os
 import signal
 import tempfile
+import threading
 import types
+from copy import deepcopy
 from datetime import datetime
+from unittest.mock import patch
 
 import pytest
 import requests_mock
 import yaml
-from fixtures import experiments
+from fixtures import experiments, probes
 
 from chaoslib.activity import ensure_activity_is_valid, run_activities
-from chaoslib.exceptions import InterruptExecution, InvalidActivity, InvalidExperiment
+from chaoslib.exceptions import (
+    ExperimentValidationErrors,
+    InterruptExecution,
+    InvalidActivity,
+    InvalidExperiment,
+)
 from chaoslib.experiment import (
     ensure_experiment_is_valid,
     load_experiment,
@@ -561,3 +569,79 @@ def test_pauses_must_be_numbers_or_substitution_pattern():
                 },
             }
         )
+
+
+def test_experiment_with_dependency_graph_is_valid():
+    assert (
+        ensure_experiment_is_valid(experiments.ExperimentWithDependencyGraph) is None
+    )
+
+
+def test_experiment_dependencies_cannot_form_a_cycle():
+    with pytest.raises(InvalidExperiment) as exc:
+        ensure_experiment_is_valid(experiments.ExperimentWithDependencyCycle)
+    assert "form a cycle between: pause-a, pause-c" in str(exc.value)
+
+
+def test_experiment_dependencies_must_be_known_activities():
+    with pytest.raises(InvalidExperiment) as exc:
+        ensure_experiment_is_valid(experiments.ExperimentWithUnknownDependency)
+    assert "depends on unknown activity 'pause-z'" in str(exc.value)
+
+
+CONCURRENT_VALIDATION = {"runtime": {"validation": {"strategy": "concurrent"}}}
+
+
+def test_concurrent_validation_of_a_valid_experiment():
+    experiment = experiments.ExperimentWithVariousTolerances
+    assert ensure_experiment_is_valid(experiment, CONCURRENT_VALIDATION) is None
+
+
+def test_concurrent_validation_reports_all_errors_in_declaration_order():
+    experiment = deepcopy(experiments.ExperimentWithVariousTolerances)
+    probe = experiment["steady-state-hypothesis"]["probes"][0]
+    probe.pop("tolerance")
+    experiment["method"].append(probes.MissingFunctionProbe)
+    experiment["rollbacks"] = [probes.TooManyFuncArgsProbe]
+
+    for _ in range(3):
+        with pytest.raises(ExperimentValidationErrors) as exc:
+            ensure_experiment_is_valid(experiment, CONCURRENT_VALIDATION)
+
+        locations = [location for location, _ in exc.value.errors]
+        assert locations == [
+            "steady-state-hypothesis.probes[0] 'boolean-probe'",
+            "method[1] 'a name'",
+            "rollbacks[0] 'too-many-args-pause'",
+        ]
+        assert all(isinstance(e, InvalidActivity) for _, e in exc.value.errors)
+        report = str(exc.value)
+        assert report.startswith("3 errors found in the experiment:")
+        assert "  - method[1] 'a name': a Python activity must have a" in report
+
+
+def test_concurrent_validation_raises_a_single_error_as_is():
+    with pytest.raises(InvalidExperiment) as exc:
+        ensure_experiment_is_valid(
+            experiments.ExperimentWithDependencyCycle, CONCURRENT_VALIDATION
+        )
+    assert not isinstance(exc.value, ExperimentValidationErrors)
+    assert "form a cycle between: pause-a, pause-c" in str(exc.value)
+
+
+def test_concurrent_validation_runs_checks_on_a_pool():
+    experiment = deepcopy(experiments.ExperimentWithDependencyGraph)
+    barrier = threading.Barrier(len(experiment["method"]), timeout=5)
+    seen = []
+
+    def validate(activity):
+        # fails with a broken barrier unless all of them run together
+        barrier.wait()
+        seen.append(activity["name"])
+
+    with patch("chaoslib.experiment.ensure_method_activity_is_valid", validate):
+        ensure_experiment_is_valid(
+            experiment,
+            {"runtime": {"validation": {"strategy": "concurrent", "max_workers": 8}}},
+        )
+    assert sorted(seen) == sorted(a["name"] for a in experiment["method"])
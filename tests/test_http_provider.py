@@ -0,0 +1,111 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+import requests_mock
+
+from chaoslib.provider.http import (
+    close_http_pools,
+    get_http_pools_stats,
+    run_http_activity,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_pools() -> None:
+    close_http_pools()
+    try:
+        yield
+    finally:
+        close_http_pools()
+
+
+@pytest.fixture
+def server() -> ThreadingHTTPServer:
+    class KeepAliveRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        connections = 0
+
+        def setup(self):
+            KeepAliveRequestHandler.connections += 1
+            super().setup()
+
+        def do_GET(self):
+            body = b"hello"
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args, **kwargs):
+            pass
+
+    server = ThreadingHTTPServer(("localhost", 0), KeepAliveRequestHandler)
+    server.daemon_threads = True
+    t = Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def http_probe(url: str, verify_tls: bool = True) -> dict:
+    return {
+        "type": "probe",
+        "name": "call-me",
+        "provider": {"type": "http", "url": url, "verify_tls": verify_tls},
+    }
+
+
+def test_http_connections_are_kept_alive_between_calls(server):
+    url = "http://localhost:{}/".format(server.server_address[1])
+
+    for _ in range(3):
+        result = run_http_activity(http_probe(url), None, None)
+        assert result["status"] == 200
+        assert result["body"] == "hello"
+
+    assert server.RequestHandlerClass.connections == 1
+    assert get_http_pools_stats() == {"pools": 1, "created": 1, "reused": 2}
+
+
+def test_http_pools_are_keyed_by_host_and_tls_verification():
+    with requests_mock.mock() as m:
+        m.get("http://example.com", text="ok")
+        m.get("http://example.com/other", text="ok")
+        m.get("http://example.org", text="ok")
+
+        run_http_activity(http_probe("http://example.com"), None, None)
+        run_http_activity(http_probe("http://example.com/other"), None, None)
+        run_http_activity(http_probe("http://example.com", False), None, None)
+        run_http_activity(http_probe("http://example.org"), None, None)
+
+    assert get_http_pools_stats() == {"pools": 3, "created": 3, "reused": 1}
+
+
+def test_closing_http_pools_resets_them():
+    with requests_mock.mock() as m:
+        m.get("http://example.com", text="ok")
+        run_http_activity(http_probe("http://example.com"), None, None)
+
+    assert get_http_pools_stats()["pools"] == 1
+    close_http_pools()
+    assert get_http_pools_stats() == {"pools": 0, "created": 0, "reused": 0}
+
+
+def test_cookies_are_not_shared_between_calls():
+    with requests_mock.mock() as m:
+        m.get(
+            "http://example.com/login",
+            text="ok",
+            headers={"Set-Cookie": "session=secret"},
+        )
+        m.get("http://example.com/", text="ok")
+
+        run_http_activity(http_probe("http://example.com/login"), None, None)
+        run_http_activity(http_probe("http://example.com/"), None, None)
+
+        assert "Cookie" not in m.request_history[-1].headers
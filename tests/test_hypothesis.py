@@ -0,0 +1,131 @@
+import pytest
+
+from chaoslib.hypothesis import (
+    ContinuousHypothesisRetention,
+    FixedRateClock,
+    LatencyHistogram,
+)
+from chaoslib.types import Overrun
+
+
+def make_state(met: bool, duration: float = 0.1) -> dict:
+    return {
+        "steady_state_met": met,
+        "probes": [
+            {
+                "activity": {"name": "probe-a"},
+                "status": "succeeded",
+                "tolerance_met": met,
+                "duration": duration,
+                "output": "x" * 100,
+            }
+        ],
+    }
+
+
+def test_retention_keeps_everything_by_default():
+    retention = ContinuousHypothesisRetention()
+    during = []
+    for i in range(10):
+        retention.record(during, make_state(True))
+
+    assert len(during) == 10
+    assert retention.summary()["dropped"] == 0
+
+
+def test_retention_keeps_last_iterations_and_deviations():
+    retention = ContinuousHypothesisRetention(keep_last=3)
+    during = []
+    states = [make_state(i not in (2, 5)) for i in range(20)]
+    for state in states:
+        retention.record(during, state)
+
+    assert during == [states[2], states[5], states[17], states[18], states[19]]
+    assert during[0] is states[2]
+
+    summary = retention.summary()
+    assert summary["iterations"] == 20
+    assert summary["deviations"] == 2
+    assert summary["dropped"] == 15
+
+    probe = summary["probes"]["probe-a"]
+    assert probe["count"] == 20
+    assert probe["succeeded"] == 20
+    assert probe["failed"] == 0
+    assert probe["tolerance_met"] == 18
+    assert probe["pass_ratio"] == pytest.approx(0.9)
+
+
+def test_latency_percentiles_are_approximated_within_ten_percent():
+    histogram = LatencyHistogram()
+    for i in range(1, 1001):
+        histogram.add(i / 1000)
+
+    summary = histogram.summary()
+    assert summary["min"] == 0.001
+    assert summary["max"] == 1.0
+    assert summary["mean"] == pytest.approx(0.5005)
+    assert summary["p50"] == pytest.approx(0.5, rel=0.1)
+    assert summary["p90"] == pytest.approx(0.9, rel=0.1)
+    assert summary["p99"] == pytest.approx(0.99, rel=0.1)
+    assert len(histogram.buckets) < 100
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_fixed_rate_clock_ticks_on_period_whatever_the_iteration_time():
+    now = FakeClock()
+    clock = FixedRateClock(1.0, Overrun.SKIP, clock=now)
+
+    assert clock.wait_time() == 0
+    assert clock.tick() == {"index": 0, "offset": 0, "jitter": 0}
+
+    # the iteration took 0.3s, the next tick is due 0.7s later
+    now.now += 0.3
+    assert clock.wait_time() == pytest.approx(0.7)
+    now.now += 0.75
+    tick = clock.tick()
+    assert tick["index"] == 1
+    assert tick["offset"] == 1.0
+    assert tick["jitter"] == pytest.approx(0.05)
+
+
+def test_fixed_rate_clock_skips_ticks_missed_by_overruns():
+    now = FakeClock()
+    clock = FixedRateClock(1.0, Overrun.SKIP, clock=now)
+    clock.wait_time()
+    clock.tick()
+
+    # the iteration overran ticks 1 and 2
+    now.now += 2.5
+    assert clock.wait_time() == pytest.approx(0.5)
+    now.now += 0.5
+    assert clock.tick()["index"] == 3
+
+    summary = clock.summary()
+    assert summary["ticks"] == 2
+    assert summary["skipped"] == 2
+    assert summary["overrun"] == "skip"
+
+
+def test_fixed_rate_clock_queues_ticks_missed_by_overruns():
+    now = FakeClock()
+    clock = FixedRateClock(1.0, Overrun.QUEUE, clock=now)
+    clock.wait_time()
+    clock.tick()
+
+    now.now += 2.5
+    assert clock.wait_time() == 0
+    tick = clock.tick()
+    assert tick["index"] == 1
+    assert tick["jitter"] == pytest.approx(1.5)
+    assert clock.wait_time() == 0
+    assert clock.tick()["index"] == 2
+    assert clock.wait_time() == pytest.approx(0.5)
+    assert clock.summary()["skipped"] == 0
@@ -0,0 +1,156 @@
+import json
+from copy import deepcopy
+
+from fixtures import experiments
+
+from chaoslib import PayloadEncoder
+from chaoslib.journal import JsonLinesJournalSink, load_journal_stream
+from chaoslib.run import RunEventHandler, Runner, Schedule, Strategy
+
+
+def as_json(value):
+    return json.loads(json.dumps(value, cls=PayloadEncoder))
+
+
+def test_journal_can_be_rebuilt_from_its_stream(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    experiment = deepcopy(experiments.ExperimentWithRegularRollback)
+
+    with Runner(Strategy.DEFAULT) as runner:
+        runner.register_event_handler(JsonLinesJournalSink(path))
+        journal = runner.run(experiment, settings={})
+
+    rebuilt = load_journal_stream(path)
+    for key in ("status", "deviated", "steady_states", "run", "rollbacks"):
+        assert rebuilt[key] == as_json(journal[key])
+    assert rebuilt["start"] == journal["start"]
+    assert rebuilt["end"] == journal["end"]
+    assert len(rebuilt["run"]) == len(experiment["method"])
+    assert len(rebuilt["rollbacks"]) == len(experiment["rollbacks"])
+
+
+def test_journal_stream_keeps_full_iterations_when_summaries_only(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    experiment = deepcopy(experiments.SimpleExperiment)
+
+    with Runner(
+        Strategy.CONTINUOUS, Schedule(continuous_hypothesis_frequency=0.1)
+    ) as runner:
+        runner.register_event_handler(JsonLinesJournalSink(path, summaries_only=True))
+        journal = runner.run(experiment, settings={})
+
+    during = journal["steady_states"]["during"]
+    assert len(during) > 1
+    for state in during:
+        assert state["steady_state_met"] is True
+        for probe in state["probes"]:
+            assert "output" not in probe
+            assert probe["status"] == "succeeded"
+
+    rebuilt = load_journal_stream(path)
+    assert len(rebuilt["steady_states"]["during"]) == len(during)
+    for state in rebuilt["steady_states"]["during"]:
+        for probe in state["probes"]:
+            assert "output" in probe
+            assert "provider" in probe["activity"]
+    # probes of the continuous hypothesis are not mistaken for method runs
+    assert len(rebuilt["run"]) == len(experiment["method"])
+
+
+def test_journal_stream_rebuilds_runs_in_declaration_order(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    experiment = deepcopy(experiments.ExperimentWithDependencyGraph)
+    # pause-b completes, and is written, before pause-a
+    experiment["method"][1]["provider"]["arguments"]["howlong"] = 0.1
+    settings = {"runtime": {"method": {"strategy": "graph", "max_workers": 2}}}
+
+    with Runner(Strategy.DEFAULT) as runner:
+        runner.register_event_handler(JsonLinesJournalSink(path))
+        journal = runner.run(experiment, settings=settings)
+
+    with open(path) as f:
+        written = [json.loads(line) for line in f]
+    written = [r["run"]["activity"]["name"] for r in written if r["event"] == "run"]
+    assert written == ["pause-b", "pause-a", "pause-c"]
+
+    rebuilt = load_journal_stream(path)
+    names = [r["activity"]["name"] for r in rebuilt["run"]]
+    assert names == [r["activity"]["name"] for r in journal["run"]]
+    assert names == ["pause-a", "pause-b", "pause-c"]
+
+
+def test_journal_stream_summaries_do_not_alter_states_seen_by_handlers(tmp_path):
+    class ProbeOutputs(RunEventHandler):
+        def __init__(self):
+            self.outputs = []
+
+        def continuous_hypothesis_iteration(self, iteration_index, state):
+            self.outputs.extend("output" in p for p in state["probes"])
+
+    path = str(tmp_path / "journal.jsonl")
+    experiment = deepcopy(experiments.SimpleExperiment)
+    handler = ProbeOutputs()
+
+    with Runner(
+        Strategy.CONTINUOUS, Schedule(continuous_hypothesis_frequency=0.1)
+    ) as runner:
+        runner.register_event_handler(JsonLinesJournalSink(path, summaries_only=True))
+        runner.register_event_handler(handler)
+        runner.run(experiment, settings={})
+
+    assert handler.outputs
+    assert all(handler.outputs)
+
+
+def test_journal_stream_summarizes_iterations_as_soon_as_they_were_handled(
+    tmp_path,
+):
+    class PreviousOutputs(RunEventHandler):
+        def __init__(self):
+            self.outputs = []
+
+        def started(self, experiment, journal):
+            self.journal = journal
+
+        def continuous_hypothesis_iteration(self, iteration_index, state):
+            previous = self.journal["steady_states"]["during"][:-1]
+            self.outputs.extend(
+                "output" in p for s in previous if s for p in s["probes"]
+            )
+
+    path = str(tmp_path / "journal.jsonl")
+    experiment = deepcopy(experiments.SimpleExperiment)
+    handler = PreviousOutputs()
+
+    with Runner(
+        Strategy.CONTINUOUS, Schedule(continuous_hypothesis_frequency=0.1)
+    ) as runner:
+        runner.register_event_handler(JsonLinesJournalSink(path, summaries_only=True))
+        runner.register_event_handler(handler)
+        runner.run(experiment, settings={})
+
+    # the states of the iterations already handled are no longer kept whole
+    assert handler.outputs
+    assert not any(handler.outputs)
+
+
+def test_journal_stream_survives_a_truncated_record(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    experiment = deepcopy(experiments.SimpleExperiment)
+
+    with Runner(Strategy.DEFAULT) as runner:
+        runner.register_event_handler(JsonLinesJournalSink(path))
+        runner.run(experiment, settings={})
+
+    with open(path) as f:
+        lines = f.readlines()
+    # as if the process crashed while writing the first method run
+    run_index = next(i for i, line in enumerate(lines) if '"event": "run"' in line)
+    with open(path, "w") as f:
+        f.writelines(lines[:run_index])
+        f.write(lines[run_index][:20])
+
+    rebuilt = load_journal_stream(path)
+    assert rebuilt["steady_states"]["before"]["steady_state_met"] is True
+    assert rebuilt["run"] == []
+    assert "end" not in rebuilt
@@ -8,7 +8,11 @@ import requests_mock
 from fixtures import experiments
 
 from chaoslib.exceptions import InvalidExperiment, InvalidSource
-from chaoslib.loader import load_experiment, parse_experiment_from_file
+from chaoslib.loader import (
+    ExperimentCache,
+    load_experiment,
+    parse_experiment_from_file,
+)
 from chaoslib.types import Settings
 
 
@@ -165,3 +169,74 @@ def test_load_from_http_with_auth_from_env(settings: Settings, generic_experimen
                 pytest.fail(str(x))
     finally:
         os.environ.pop("CHAOSTOOLKIT_LOADER_AUTH_BEARER_TOKEN", None)
+
+
+def test_load_from_http_revalidates_cached_experiment(tmp_path):
+    settings = {"runtime": {"loader": {"cache": {"path": str(tmp_path)}}}}
+    url = "http://example.com/cached.json"
+    with requests_mock.mock() as m:
+        m.get(
+            url,
+            [
+                {
+                    "status_code": 200,
+                    "headers": {"Content-Type": "application/json", "ETag": '"v1"'},
+                    "json": experiments.Experiment,
+                },
+                {"status_code": 304},
+            ],
+        )
+        first = load_experiment(url, settings)
+        second = load_experiment(url, settings)
+
+        assert "If-None-Match" not in m.request_history[0].headers
+        assert m.request_history[1].headers["If-None-Match"] == '"v1"'
+
+    assert first == second == experiments.Experiment
+
+
+def test_load_from_http_cache_is_keyed_by_auth_identity(tmp_path):
+    settings = {
+        "runtime": {"loader": {"cache": {"path": str(tmp_path)}}},
+        "auths": {"example.com": {"type": "bearer", "value": "XYZ"}},
+    }
+    url = "http://example.com/cached.json"
+    with requests_mock.mock() as m:
+        m.get(
+            url,
+            status_code=200,
+            headers={
+                "Content-Type": "application/json",
+                "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+            },
+            json=experiments.Experiment,
+        )
+        load_experiment(url, settings)
+        settings["auths"]["example.com"]["value"] = "ABC"
+        load_experiment(url, settings)
+
+        assert "If-Modified-Since" not in m.request_history[1].headers
+
+    assert len([n for n in os.listdir(tmp_path) if n.endswith(".marshal")]) == 2
+
+
+def test_experiment_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = ExperimentCache(str(tmp_path), max_entries=2)
+    headers = {"ETag": '"v1"'}
+    for i, url in enumerate(["http://a", "http://b", "http://c"]):
+        key = cache.key(url)
+        assert cache.store(key, {"title": url}, headers)
+        os.utime(cache.entry_path(key, "marshal"), (i, i))
+        if i == 1:
+            # a is now the most recently used entry
+            cache.load(cache.key("http://a"))
+
+    assert cache.load(cache.key("http://b")) is None
+    assert cache.load(cache.key("http://a")) == {"title": "http://a"}
+    assert cache.load(cache.key("http://c")) == {"title": "http://c"}
+
+
+def test_experiment_cache_skips_responses_without_validators(tmp_path):
+    cache = ExperimentCache(str(tmp_path))
+    assert not cache.store(cache.key("http://a"), {"title": "a"}, {})
+    assert cache.lookup(cache.key("http://a")) is None
@@ -1,3 +1,6 @@
+import json
+import threading
+import time
 from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
@@ -10,11 +13,16 @@ from chaoslib.exceptions import ChaosException
 from chaoslib.notification import (
     DiscoverFlowEvent,
     InitFlowEvent,
+    NotificationDispatcher,
     RunFlowEvent,
     ValidateFlowEvent,
+    close_notification_dispatcher,
+    flush_notifications,
+    get_notification_stats,
     notify,
     notify_with_http,
 )
+from chaoslib.provider.http import get_http_adapter
 
 
 def test_no_settings_is_okay() -> None:
@@ -354,3 +362,168 @@ def test_notify_via_plugin_gracefully_handles_failure_in_invoked_func(
     logger.debug.assert_called_with(
         "failed calling notification plugin", exc_info=callee.InstanceOf(Exception)
     )
+
+
+@responses.activate
+def test_notify_in_background_does_not_wait_for_slow_channels() -> None:
+    url = "http://test-slow-url.com"
+    received = []
+
+    def slow_callback(request):
+        time.sleep(0.5)
+        received.append(json.loads(request.body))
+        return (200, {}, "")
+
+    responses.add_callback(responses.POST, url, callback=slow_callback)
+    settings = {
+        "runtime": {"notifications": {"strategy": "background"}},
+        "notifications": [{"type": "http", "url": url}],
+    }
+    try:
+        start = time.monotonic()
+        notify(settings, RunFlowEvent.RunStarted)
+        notify(settings, RunFlowEvent.RunCompleted)
+        assert time.monotonic() - start < 0.5
+
+        assert flush_notifications(timeout=5)
+        assert [r["name"] for r in received] == ["run-started", "run-completed"]
+
+        stats = get_notification_stats()
+        assert stats["submitted"] == 2
+        assert stats["sent"] == 2
+        assert stats["pending"] == 0
+    finally:
+        close_notification_dispatcher()
+
+
+@responses.activate
+def test_dispatcher_batches_events_into_a_single_post() -> None:
+    url = "http://test-batch-url.com"
+    responses.add(responses.POST, url)
+    dispatcher = NotificationDispatcher()
+    channel = {"type": "http", "url": url, "batch_size": 5, "batch_interval": 2}
+    try:
+        for i in range(5):
+            dispatcher.submit(channel, {"name": "event-{}".format(i)})
+        assert dispatcher.flush(timeout=5)
+    finally:
+        dispatcher.close()
+
+    assert len(responses.calls) == 1
+    body = json.loads(responses.calls[0].request.body)
+    assert [e["name"] for e in body] == ["event-{}".format(i) for i in range(5)]
+    assert dispatcher.get_stats()["batches"] == 1
+
+
+@responses.activate
+def test_dispatcher_keeps_the_connection_pool_of_http_activities() -> None:
+    url = "http://test-pool-url.com"
+    responses.add(responses.POST, url)
+    adapter = get_http_adapter(url)
+    dispatcher = NotificationDispatcher()
+    # the batch size read from a settings file may be a string
+    channel = {"type": "http", "url": url, "batch_size": "2", "batch_interval": 2}
+    try:
+        with patch.object(adapter, "close") as close:
+            dispatcher.submit(channel, {"name": "event-0"})
+            dispatcher.submit(channel, {"name": "event-1"})
+            assert dispatcher.flush(timeout=5)
+    finally:
+        dispatcher.close()
+
+    close.assert_not_called()
+    assert get_http_adapter(url) is adapter
+    body = json.loads(responses.calls[0].request.body)
+    assert [e["name"] for e in body] == ["event-0", "event-1"]
+    assert dispatcher.get_stats()["failed"] == 0
+
+
+@responses.activate
+def test_dispatcher_retries_server_errors() -> None:
+    url = "http://test-retry-url.com"
+    responses.add(responses.POST, url, status=503)
+    responses.add(responses.POST, url, status=200)
+    dispatcher = NotificationDispatcher(retries=2, retry_delay=0.01)
+    try:
+        dispatcher.submit({"type": "http", "url": url}, {"name": "run-failed"})
+        assert dispatcher.flush(timeout=5)
+    finally:
+        dispatcher.close()
+
+    stats = dispatcher.get_stats()
+    assert stats["retried"] == 1
+    assert stats["sent"] == 1
+    assert stats["failed"] == 0
+
+
+@responses.activate
+def test_dispatcher_counts_client_errors_as_failed_without_retrying() -> None:
+    url = "http://test-rejected-url.com"
+    responses.add(responses.POST, url, status=400)
+    dispatcher = NotificationDispatcher(retries=2, retry_delay=0.01)
+    try:
+        dispatcher.submit({"type": "http", "url": url}, {"name": "run-failed"})
+        assert dispatcher.flush(timeout=5)
+    finally:
+        dispatcher.close()
+
+    assert len(responses.calls) == 1
+    stats = dispatcher.get_stats()
+    assert stats["retried"] == 0
+    assert stats["sent"] == 0
+    assert stats["failed"] == 1
+
+
+@responses.activate
+def test_dispatcher_sends_the_event_as_it_was_submitted() -> None:
+    url = "http://test-snapshot-url.com"
+    responses.add(responses.POST, url)
+    dispatcher = NotificationDispatcher()
+    channel = {"type": "http", "url": url, "batch_size": 2, "batch_interval": 0.1}
+    journal = {"status": "running", "run": []}
+    try:
+        dispatcher.submit(channel, {"name": "run-started", "payload": journal})
+        # the runner keeps going once the event was raised
+        journal["status"] = "completed"
+        journal["run"].append({"status": "succeeded"})
+        assert dispatcher.flush(timeout=5)
+    finally:
+        dispatcher.close()
+
+    body = json.loads(responses.calls[0].request.body)
+    assert body == [
+        {"name": "run-started", "payload": {"status": "running", "run": []}}
+    ]
+
+
+@responses.activate
+def test_dispatcher_drops_events_when_the_queue_is_full() -> None:
+    url = "http://test-blocked-url.com"
+    unblock = threading.Event()
+
+    def blocked_callback(request):
+        unblock.wait(5)
+        return (200, {}, "")
+
+    responses.add_callback(responses.POST, url, callback=blocked_callback)
+    dispatcher = NotificationDispatcher(queue_size=1)
+    channel = {"type": "http", "url": url}
+    try:
+        assert dispatcher.submit(channel, {"name": "consumed"})
+        # wait for the event to be picked up by the channel's thread
+        deadline = time.monotonic() + 5
+        while dispatcher.channels and time.monotonic() < deadline:
+            if all(c.queue.empty() for c in dispatcher.channels.values()):
+                break
+            time.sleep(0.01)
+        assert dispatcher.submit(channel, {"name": "queued"})
+        assert not dispatcher.submit(channel, {"name": "dropped"})
+        unblock.set()
+        assert dispatcher.flush(timeout=5)
+    finally:
+        unblock.set()
+        dispatcher.close()
+
+    stats = dispatcher.get_stats()
+    assert stats["dropped"] == 1
+    assert stats["sent"] == 2
@@ -0,0 +1,71 @@
+import io
+import math
+
+import pytest
+import yaml
+from fixtures import experiments
+
+from chaoslib.parsers import (
+    HAS_ORJSON,
+    JSONDecodeError,
+    get_parser_backends,
+    parse_json,
+    parse_yaml,
+    use_parser_backends,
+)
+
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+
+@pytest.fixture
+def restore_backends():
+    backends = get_parser_backends()
+    try:
+        yield
+    finally:
+        use_parser_backends(backends["json"], backends["yaml"])
+
+
+def test_fast_and_pure_backends_parse_the_same_experiment(restore_backends):
+    content = json.dumps(experiments.Experiment)
+    default_json = parse_json(content)
+    fast_yaml = parse_yaml(content)
+
+    use_parser_backends(yaml_backend="yaml")
+    assert get_parser_backends()["yaml"] == "yaml"
+    assert parse_yaml(content) == fast_yaml == experiments.Experiment
+
+    if HAS_ORJSON:
+        use_parser_backends(json_backend="orjson")
+        assert parse_json(content) == default_json == experiments.Experiment
+
+
+def test_parse_json_from_bytes_and_files():
+    assert parse_json(b'{"a": [1, 2.5, null]}') == {"a": [1, 2.5, None]}
+    assert parse_json(io.StringIO('{"a": true}')) == {"a": True}
+
+
+@pytest.mark.skipif(not HAS_ORJSON, reason="orjson is not installed")
+def test_parse_json_falls_back_on_what_orjson_rejects(restore_backends):
+    use_parser_backends(json_backend="orjson")
+    assert math.isnan(parse_json('{"a": NaN}')["a"])
+    with pytest.raises(JSONDecodeError):
+        parse_json('{"a": ')
+
+
+def test_parse_json_errors_are_json_decode_errors():
+    with pytest.raises(JSONDecodeError):
+        parse_json('{"a": ')
+
+
+def test_parse_yaml_is_safe():
+    with pytest.raises(yaml.YAMLError):
+        parse_yaml("!!python/object/apply:os.system ['true']")
+
+
+def test_unknown_backends_are_rejected(restore_backends):
+    with pytest.raises(ValueError):
+        use_parser_backends(json_backend="nope")
@@ -1,15 +1,26 @@
 import json
+import os
 import socket
+import stat
 import sys
+from copy import deepcopy
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from threading import Thread
+from unittest.mock import patch
 
 import pytest
 import requests_mock
 from fixtures import config, experiments, probes
 
-from chaoslib.activity import ensure_activity_is_valid, run_activity
+from chaoslib.activity import (
+    clear_validation_cache,
+    ensure_activity_is_valid,
+    run_activity,
+)
 from chaoslib.exceptions import ActivityFailed, InvalidActivity
+from chaoslib.experiment import ensure_experiment_is_valid
+from chaoslib.provider.process import validate_process_activity
+from chaoslib.provider.python import validate_python_activity
 
 
 def test_empty_probe_is_invalid():
@@ -228,3 +239,101 @@ def test_run_http_probe_can_retry():
         run_activity(probe, config.EmptyConfig, experiments.Secrets)
     except ActivityFailed:
         pytest.fail("activity should not have failed")
+
+
+@pytest.fixture
+def validation_cache() -> None:
+    clear_validation_cache()
+    try:
+        yield
+    finally:
+        clear_validation_cache()
+
+
+def test_unchanged_activity_is_validated_once(validation_cache):
+    probe = deepcopy(probes.PythonModuleProbe)
+
+    with patch(
+        "chaoslib.activity.validate_python_activity",
+        wraps=validate_python_activity,
+    ) as validate:
+        for _ in range(3):
+            ensure_activity_is_valid(probe)
+            ensure_activity_is_valid(deepcopy(probe))
+    assert validate.call_count == 1
+
+
+def test_edited_activity_is_validated_again(validation_cache):
+    probe = deepcopy(probes.PythonModuleProbe)
+    ensure_activity_is_valid(probe)
+
+    probe["provider"]["arguments"]["path"] = "/tmp"
+    with patch(
+        "chaoslib.activity.validate_python_activity",
+        wraps=validate_python_activity,
+    ) as validate:
+        ensure_activity_is_valid(probe)
+    assert validate.call_count == 1
+
+    probe["provider"]["arguments"]["whatever"] = "not an argument"
+    with pytest.raises(InvalidActivity):
+        ensure_activity_is_valid(probe)
+
+
+def test_invalid_activity_is_always_reported(validation_cache):
+    for _ in range(2):
+        with pytest.raises(InvalidActivity):
+            ensure_activity_is_valid(probes.TooManyFuncArgsProbe)
+
+
+def test_process_activity_is_validated_again_when_executable_changes(
+    validation_cache, tmp_path
+):
+    script = tmp_path / "probe.sh"
+    script.write_text("#!/bin/sh\necho hello\n")
+    script.chmod(stat.S_IRWXU)
+
+    probe = {
+        "type": "probe",
+        "name": "run-script",
+        "provider": {"type": "process", "path": str(script)},
+    }
+    ensure_activity_is_valid(probe)
+
+    with patch(
+        "chaoslib.activity.validate_process_activity",
+        wraps=validate_process_activity,
+    ) as validate:
+        ensure_activity_is_valid(probe)
+        assert validate.call_count == 0
+
+        script.chmod(stat.S_IRUSR)
+        with pytest.raises(InvalidActivity):
+            ensure_activity_is_valid(probe)
+        assert validate.call_count == 1
+
+
+def test_revalidating_experiment_only_checks_changed_activities(
+    validation_cache,
+):
+    experiment = deepcopy(experiments.ExperimentWithVariousTolerances)
+    ensure_experiment_is_valid(experiment)
+
+    # the fixture probes share their provider, edit this one only
+    probe = experiment["steady-state-hypothesis"]["probes"][0]
+    probe["provider"] = dict(
+        probe["provider"], arguments={"path": os.path.dirname(__file__)}
+    )
+
+    with patch(
+        "chaoslib.activity.validate_python_activity",
+        wraps=validate_python_activity,
+    ) as validate_python, patch(
+        "chaoslib.activity.validate_process_activity",
+        wraps=validate_process_activity,
+    ) as validate_process:
+        ensure_experiment_is_valid(experiment)
+
+    assert validate_python.call_count == 1
+    assert validate_python.call_args[0][0] is probe
+    assert validate_process.call_count == 0
@@ -1,8 +1,31 @@
+import asyncio
 import os.path
 import stat
+import sys
+import time
 from unittest.mock import patch
 
-from chaoslib.provider.process import run_process_activity
+import pytest
+
+from chaoslib import (
+    DETECTION_SAMPLE_SIZE,
+    REDETECTION_INTERVAL,
+    clear_encoding_cache,
+    decode_bytes,
+)
+from chaoslib.context import RunContext
+from chaoslib.exceptions import ActivityFailed, InvalidActivity
+from chaoslib.hypothesis import within_tolerance
+from chaoslib.provider.process import (
+    OutputCapture,
+    run_process_activity,
+    run_process_activity_async,
+    search_spilled_output,
+    shutdown_persistent_processes,
+    validate_process_activity,
+)
+from chaoslib.run import AsyncRunner, Runner
+from chaoslib.types import Strategy
 
 settings_dir = os.path.join(os.path.dirname(__file__), "fixtures")
 
@@ -105,3 +128,402 @@ def test_process_non_exit_zero_warning(logger):
     assert (
         "This process returned a non-zero exit code." in logger.warning.call_args[0][0]
     )
+
+
+def test_process_activity_async():
+    activity = {
+        "type": "probe",
+        "name": "say-hello",
+        "provider": {"type": "process", "path": "echo", "arguments": "hello"},
+    }
+
+    result = asyncio.run(run_process_activity_async(activity, None, None))
+    assert result["status"] == 0
+    assert result["stdout"] == "hello\n"
+    assert result["stderr"] == ""
+
+
+def test_process_activity_async_is_killed_on_timeout():
+    activity = {
+        "type": "action",
+        "name": "sleep-too-long",
+        "provider": {
+            "type": "process",
+            "path": "sleep",
+            "arguments": ["5"],
+            "timeout": 0.2,
+        },
+    }
+
+    with pytest.raises(ActivityFailed) as x:
+        asyncio.run(run_process_activity_async(activity, None, None))
+    assert "took too long to complete" in str(x.value)
+
+
+def noisy_activity(size: int = 100000) -> dict:
+    script = (
+        "import sys; "
+        f"sys.stdout.write('a' * {size} + 'MARKER' + 'b' * {size}); "
+        "sys.stderr.write('oops')"
+    )
+    return {
+        "type": "probe",
+        "name": "noisy",
+        "provider": {
+            "type": "process",
+            "path": sys.executable,
+            "arguments": ["-c", script],
+        },
+    }
+
+
+@pytest.fixture
+def small_capture(tmp_path):
+    settings = {
+        "runtime": {
+            "process": {
+                "capture": {
+                    "head_bytes": 1024,
+                    "tail_bytes": 512,
+                    "spill_dir": str(tmp_path),
+                }
+            }
+        }
+    }
+    with RunContext(settings=settings).activate():
+        yield tmp_path
+
+
+def test_process_output_larger_than_limits_is_spilled(small_capture):
+    result = run_process_activity(noisy_activity(), None, None)
+
+    assert result["status"] == 0
+    assert result["stdout_size"] == 200006
+    assert os.path.dirname(result["stdout_file"]) == str(small_capture)
+    with open(result["stdout_file"], "rb") as f:
+        assert f.read() == b"a" * 100000 + b"MARKER" + b"b" * 100000
+
+    stdout = result["stdout"]
+    assert stdout.startswith("a" * 1024 + "\n[... 198470 bytes omitted")
+    assert stdout.endswith("...]\n" + "b" * 512)
+    assert result["stdout_file"] in stdout
+
+    # small enough to be kept as-is
+    assert result["stderr"] == "oops"
+    assert "stderr_file" not in result
+
+
+def test_process_output_is_spilled_from_the_event_loop(small_capture):
+    result = asyncio.run(run_process_activity_async(noisy_activity(), None, None))
+
+    assert result["stdout_size"] == 200006
+    assert os.path.getsize(result["stdout_file"]) == 200006
+    assert result["stderr"] == "oops"
+
+
+def test_tolerance_scans_the_spilled_output(small_capture):
+    result = run_process_activity(noisy_activity(), None, None)
+    assert "MARKER" not in result["stdout"]
+
+    tolerance = {"type": "regex", "target": "stdout", "pattern": "a+MARKERb"}
+    assert within_tolerance(tolerance, result) is True
+
+    tolerance["pattern"] = "MARKERa"
+    assert within_tolerance(tolerance, result) is False
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "latin-1"])
+def test_spilled_output_is_searched_as_decoded_text(tmp_path, encoding):
+    path = tmp_path / "stdout"
+    path.write_bytes(("x" * 50 + " café déjà-vu " + "y" * 50).encode(encoding))
+
+    with patch("chaoslib.provider.process.SEARCH_CHUNK_SIZE", 16), patch(
+        "chaoslib.provider.process.SEARCH_OVERLAP", 32
+    ), patch("chaoslib.provider.process.detect_encoding", return_value="latin-1"):
+        assert search_spilled_output(r"\bcaf\w déj\w-vu\b", str(path)) is True
+        assert search_spilled_output(r"(?u)caf.\s", str(path)) is True
+        assert search_spilled_output(r"^x{10}", str(path)) is True
+        assert search_spilled_output(r"^y", str(path)) is False
+        assert search_spilled_output(r"y{10}$", str(path)) is True
+        assert search_spilled_output(r"x{4}$", str(path)) is False
+        assert search_spilled_output(r"caf\w{2}", str(path)) is False
+
+
+@pytest.mark.parametrize("keep", [False, True])
+def test_spilled_outputs_are_removed_once_the_run_completed(tmp_path, keep):
+    settings = {
+        "runtime": {
+            "process": {
+                "capture": {
+                    "head_bytes": 1024,
+                    "tail_bytes": 512,
+                    "spill_dir": str(tmp_path),
+                    "keep": keep,
+                }
+            }
+        }
+    }
+    experiment = {
+        "title": "noisy",
+        "description": "spills its output",
+        "method": [noisy_activity()],
+    }
+
+    with Runner(Strategy.DEFAULT, run_context=RunContext()) as runner:
+        journal = runner.run(experiment, settings=settings)
+
+    path = journal["run"][0]["output"]["stdout_file"]
+    assert os.path.dirname(path) == str(tmp_path)
+    assert os.path.exists(path) is keep
+
+
+def test_output_capture_keeps_head_and_tail_only(tmp_path):
+    capture = OutputCapture(head_bytes=4, tail_bytes=3, spill_dir=str(tmp_path))
+    for chunk in (b"abc", b"defg", b"hijkl"):
+        capture.write(chunk)
+    capture.close()
+
+    assert capture.spilled
+    assert capture.size == 12
+    assert bytes(capture.head) == b"abcd"
+    assert bytes(capture.tail) == b"jkl"
+    with open(capture.path, "rb") as f:
+        assert f.read() == b"abcdefghijkl"
+
+    capture.discard()
+    assert not os.path.exists(capture.path)
+
+
+def test_process_activity_is_killed_on_timeout(small_capture):
+    activity = noisy_activity()
+    activity["provider"]["arguments"][1] += "; import time; time.sleep(5)"
+    activity["provider"]["timeout"] = 0.5
+
+    with pytest.raises(ActivityFailed) as x:
+        run_process_activity(activity, None, None)
+    assert "took too long to complete" in str(x.value)
+
+    # the output of a failed run is not kept around
+    assert os.listdir(small_capture) == []
+
+
+def test_process_children_holding_the_output_are_killed_on_timeout():
+    activity = {
+        "type": "probe",
+        "name": "grandchild",
+        "provider": {
+            "type": "process",
+            "path": "sh",
+            "arguments": "-c 'sleep 6; echo hi'",
+            "timeout": 1,
+        },
+    }
+
+    start = time.monotonic()
+    with pytest.raises(ActivityFailed):
+        run_process_activity(activity, None, None)
+    assert time.monotonic() - start < 3
+
+
+@pytest.fixture
+def encoding_cache():
+    clear_encoding_cache()
+    yield
+    clear_encoding_cache()
+
+
+def latin1_activity() -> dict:
+    script = (
+        "import sys; sys.stdout.buffer.write('caf\\xe9 cr\\xe8me'.encode('latin-1'))"
+    )
+    return {
+        "name": "latin1",
+        "type": "probe",
+        "provider": {
+            "type": "process",
+            "path": sys.executable,
+            "arguments": ["-c", script],
+        },
+    }
+
+
+def test_utf8_is_decoded_without_detection():
+    with patch("chaoslib.chardet.detect") as detect:
+        assert decode_bytes(b"plain ascii") == "plain ascii"
+        assert decode_bytes("caf\u00e9".encode("utf-8")) == "caf\u00e9"
+    detect.assert_not_called()
+
+
+def test_detection_only_looks_at_a_sample(encoding_cache):
+    data = b"a" * (4 * DETECTION_SAMPLE_SIZE) + "caf\u00e9".encode("latin-1")
+    detected = {"encoding": "latin-1", "confidence": 0.9}
+    with patch("chaoslib.chardet.detect", return_value=detected) as detect:
+        assert decode_bytes(data).endswith("caf\u00e9")
+
+    sample = detect.call_args[0][0]
+    assert len(sample) <= DETECTION_SAMPLE_SIZE
+    # the sample holds the bytes which are not UTF-8
+    assert sample.endswith(b"caf\xe9")
+
+
+def test_process_encoding_is_detected_once(encoding_cache):
+    detected = {"encoding": "latin-1", "confidence": 0.9}
+    with patch("chaoslib.chardet.detect", return_value=detected) as detect:
+        for _ in range(3):
+            result = run_process_activity(latin1_activity(), None, None)
+            assert result["stdout"] == "caf\u00e9 cr\u00e8me"
+    assert detect.call_count == 1
+
+
+def test_encoding_detected_without_confidence_is_not_remembered(encoding_cache):
+    detected = {"encoding": "windows-1252", "confidence": 0.6}
+    with patch("chaoslib.chardet.detect", return_value=detected) as detect:
+        for _ in range(3):
+            assert decode_bytes(b"caf\xe9", cache_key="latin1") == "caf\u00e9"
+    assert detect.call_count == 3
+
+
+def test_remembered_encoding_is_detected_again_now_and_then(encoding_cache):
+    detected = {"encoding": "latin-1", "confidence": 0.95}
+    with patch("chaoslib.chardet.detect", return_value=detected) as detect:
+        decode_bytes(b"\xe9t\xe9", cache_key="text")
+        for _ in range(REDETECTION_INTERVAL - 1):
+            assert decode_bytes(b"\xe9t\xe9", cache_key="text") == "\u00e9t\u00e9"
+        assert detect.call_count == 1
+
+        # the guess was wrong, the next detection replaces it
+        detect.return_value = {"encoding": "cp437", "confidence": 0.95}
+        assert decode_bytes(b"\x82t\x82", cache_key="text") == "\u00e9t\u00e9"
+        assert detect.call_count == 2
+        assert decode_bytes(b"\x82t\x82", cache_key="text") == "\u00e9t\u00e9"
+        assert detect.call_count == 2
+
+
+helper_script = os.path.join(settings_dir, "persistent_helper.py")
+
+
+def persistent_activity(**request) -> dict:
+    return {
+        "name": "helper",
+        "type": "probe",
+        "provider": {
+            "type": "process",
+            "path": sys.executable,
+            "arguments": [helper_script],
+            "persistent": True,
+            "request": request,
+            "timeout": 5,
+        },
+    }
+
+
+@pytest.fixture
+def helper_context():
+    context = RunContext()
+    with context.activate():
+        yield context
+    shutdown_persistent_processes(context)
+
+
+def served_by(result: dict) -> tuple:
+    pid, served = result["stdout"].split()
+    return int(pid), int(served)
+
+
+def pid_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+def test_persistent_process_is_started_once(helper_context):
+    results = [run_process_activity(persistent_activity(), None, None) for _ in "abc"]
+
+    assert [r["status"] for r in results] == [0, 0, 0]
+    pids, served = zip(*map(served_by, results))
+    assert len(set(pids)) == 1
+    assert served == (1, 2, 3)
+
+    shutdown_persistent_processes(helper_context)
+    assert not pid_exists(pids[0])
+
+
+def test_persistent_process_substitutes_its_request(helper_context):
+    activity = persistent_activity(status="${status}")
+    result = run_process_activity(activity, {"status": 2}, None)
+    assert result["status"] == 2
+
+
+def test_persistent_process_is_restarted_after_a_crash(helper_context):
+    pid, _ = served_by(run_process_activity(persistent_activity(), None, None))
+
+    with pytest.raises(ActivityFailed) as x:
+        run_process_activity(persistent_activity(crash=True), None, None)
+    assert "exited with code 3" in str(x.value)
+
+    restarted, served = served_by(
+        run_process_activity(persistent_activity(), None, None)
+    )
+    assert restarted != pid
+    assert served == 1
+
+
+def test_persistent_process_is_killed_on_timeout(helper_context):
+    activity = persistent_activity(sleep=5)
+    activity["provider"]["timeout"] = 0.5
+    pid, _ = served_by(run_process_activity(persistent_activity(), None, None))
+
+    with pytest.raises(ActivityFailed) as x:
+        run_process_activity(activity, None, None)
+    assert "took too long to complete" in str(x.value)
+    assert not pid_exists(pid)
+
+    restarted, _ = served_by(run_process_activity(persistent_activity(), None, None))
+    assert restarted != pid
+
+
+def test_persistent_process_from_the_event_loop(helper_context):
+    async def play():
+        return [
+            await run_process_activity_async(persistent_activity(), None, None)
+            for _ in "ab"
+        ]
+
+    first, second = map(served_by, asyncio.run(play()))
+    assert first[0] == second[0]
+    assert second[1] == 2
+
+
+@pytest.mark.parametrize("runner_class", [Runner, AsyncRunner])
+def test_persistent_processes_are_stopped_once_the_run_completed(runner_class):
+    tolerance = {"type": "regex", "target": "stdout", "pattern": "[0-9]+ [0-9]+"}
+    experiment = {
+        "title": "persistent",
+        "description": "probes a persistent process",
+        "steady-state-hypothesis": {
+            "title": "helper responds",
+            "probes": [dict(persistent_activity(), tolerance=tolerance)],
+        },
+        "method": [persistent_activity()],
+    }
+
+    with runner_class(Strategy.DEFAULT, run_context=RunContext()) as runner:
+        journal = runner.run(experiment, {})
+
+    assert journal["status"] == "completed"
+    before = served_by(journal["steady_states"]["before"]["probes"][0]["output"])
+    after = served_by(journal["steady_states"]["after"]["probes"][0]["output"])
+    method = served_by(journal["run"][0]["output"])
+    assert before[0] == method[0] == after[0]
+    assert (before[1], method[1], after[1]) == (1, 2, 3)
+    assert not pid_exists(before[0])
+
+
+def test_persistent_process_arguments_must_be_a_list():
+    activity = persistent_activity()
+    activity["provider"]["arguments"] = helper_script
+    with pytest.raises(InvalidActivity) as x:
+        validate_process_activity(activity)
+    assert "must have its arguments as a list" in str(x.value)
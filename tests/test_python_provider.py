@@ -0,0 +1,212 @@
+import asyncio
+import importlib
+import inspect
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+from fixtures import fakeext
+
+from chaoslib.context import RunContext
+from chaoslib.exceptions import ActivityFailed, InvalidActivity
+from chaoslib.provider.python import (
+    PythonWorkerPool,
+    clear_resolved_functions,
+    get_python_workers,
+    run_python_activity,
+    run_python_activity_async,
+    shutdown_python_workers,
+    validate_python_activity,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_resolved_functions() -> None:
+    clear_resolved_functions()
+    try:
+        yield
+    finally:
+        clear_resolved_functions()
+
+
+def echo_activity(message: str = "hello") -> dict:
+    return {
+        "type": "action",
+        "name": "echo",
+        "provider": {
+            "type": "python",
+            "module": "fixtures.fakeext",
+            "func": "echo_message",
+            "arguments": {"message": message},
+        },
+    }
+
+
+def test_function_is_resolved_once_for_validation_and_runs():
+    activity = echo_activity()
+
+    with patch(
+        "chaoslib.provider.python.inspect.signature", wraps=inspect.signature
+    ) as sig:
+        validate_python_activity(activity)
+        for _ in range(5):
+            assert run_python_activity(activity, None, None) == "hello"
+
+    assert sig.call_count == 1
+
+
+def test_activity_without_arguments_is_not_compiled():
+    activity = echo_activity()
+    activity["provider"]["func"] = "do_nothing"
+    del activity["provider"]["arguments"]
+
+    with patch(
+        "chaoslib.provider.python.get_compiled_substitution"
+    ) as get_compiled_substitution:
+        for _ in range(5):
+            run_python_activity(activity, {"message": "hello"}, None)
+    get_compiled_substitution.assert_not_called()
+
+
+def test_patched_function_is_resolved_again():
+    activity = echo_activity()
+    assert run_python_activity(activity, None, None) == "hello"
+
+    with patch.object(fakeext, "echo_message", lambda message: message.upper()):
+        assert run_python_activity(activity, None, None) == "HELLO"
+
+    assert run_python_activity(activity, None, None) == "hello"
+
+
+def test_reloaded_module_is_resolved_again():
+    activity = echo_activity()
+    run_python_activity(activity, None, None)
+    before = fakeext.echo_message
+
+    importlib.reload(fakeext)
+
+    with patch(
+        "chaoslib.provider.python.inspect.signature", wraps=inspect.signature
+    ) as sig:
+        assert run_python_activity(activity, None, None) == "hello"
+    assert sig.call_count == 1
+    assert fakeext.echo_message is not before
+
+
+def test_clearing_resolved_functions_of_a_module():
+    activity = echo_activity()
+    run_python_activity(activity, None, None)
+
+    clear_resolved_functions("fixtures.fakeext")
+
+    with patch(
+        "chaoslib.provider.python.inspect.signature", wraps=inspect.signature
+    ) as sig:
+        run_python_activity(activity, None, None)
+    assert sig.call_count == 1
+
+
+def test_validation_rejects_attributes_that_are_not_functions():
+    activity = echo_activity()
+    activity["provider"]["module"] = "os"
+    activity["provider"]["func"] = "sep"
+
+    with pytest.raises(InvalidActivity) as x:
+        validate_python_activity(activity)
+    assert "does not expose a function called 'sep'" in str(x.value)
+
+
+def isolated_activity(func: str, timeout: float = None, **arguments) -> dict:
+    activity = {
+        "type": "probe",
+        "name": func,
+        "provider": {
+            "type": "python",
+            "module": "fixtures.isolated",
+            "func": func,
+            "isolation": "process",
+            "arguments": arguments,
+        },
+    }
+    if timeout is not None:
+        activity["timeout"] = timeout
+    return activity
+
+
+@pytest.fixture
+def python_workers():
+    settings = {"runtime": {"python": {"max_workers": 1}}}
+    shutdown_python_workers()
+    with RunContext(settings=settings).activate():
+        yield
+    shutdown_python_workers()
+
+
+def test_isolated_activity_runs_in_a_warm_worker(python_workers):
+    first = run_python_activity(isolated_activity("whoami"), None, None)
+    second = run_python_activity(isolated_activity("whoami"), None, None)
+
+    assert first != os.getpid()
+    assert first == second
+    assert get_python_workers().size == 1
+
+
+def test_activities_are_isolated_from_the_settings(python_workers):
+    activity = isolated_activity("whoami")
+    del activity["provider"]["isolation"]
+    assert run_python_activity(activity, None, None) == os.getpid()
+
+    settings = {"runtime": {"python": {"isolation": "process"}}}
+    with RunContext(settings=settings).activate():
+        assert run_python_activity(activity, None, None) != os.getpid()
+
+
+def test_isolated_activity_worker_is_killed_on_timeout(python_workers):
+    worker = run_python_activity(isolated_activity("whoami"), None, None)
+
+    started = time.time()
+    with pytest.raises(ActivityFailed) as x:
+        run_python_activity(
+            isolated_activity("sleep_then_whoami", timeout=0.5, howlong=30),
+            None,
+            None,
+        )
+    assert "activity took too long to complete" in str(x.value)
+    assert time.time() - started < 10
+
+    # the next activity gets a new worker
+    replacement = run_python_activity(isolated_activity("whoami"), None, None)
+    assert replacement != worker
+    assert get_python_workers().size == 1
+
+
+def test_isolated_activity_failures_are_reported(python_workers):
+    with pytest.raises(ActivityFailed) as x:
+        run_python_activity(isolated_activity("boom"), None, None)
+    assert str(x.value) == "ValueError: boom"
+
+    with pytest.raises(ActivityFailed) as x:
+        run_python_activity(isolated_activity("unpicklable"), None, None)
+    assert "cannot be pickled" in str(x.value)
+
+    # the worker survived both
+    assert get_python_workers().size == 1
+
+
+def test_large_isolated_results_go_through_shared_memory():
+    pool = PythonWorkerPool(max_workers=1, shared_memory_threshold=1024)
+    try:
+        for size in (16, 4 * 1024 * 1024):
+            result = pool.run("fixtures.isolated", "large_output", {"size": size})
+            assert result == b"x" * size
+    finally:
+        pool.shutdown()
+
+
+def test_isolated_coroutine_functions_are_run_by_the_worker(python_workers):
+    activity = isolated_activity("whoami_async")
+    assert run_python_activity(activity, None, None) != os.getpid()
+
+    pid = asyncio.run(run_python_activity_async(activity, None, None))
+    assert pid != os.getpid()
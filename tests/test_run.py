@@ -1,10 +1,38 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
 from typing import NoReturn
+from unittest.mock import patch
 
+import pytest
 from fixtures import experiments, run_handlers
 
+from chaoslib.activity import (
+    build_activity_graph,
+    execute_activity,
+    run_activities_graph,
+    topological_order,
+)
+from chaoslib.cancellation import CancellationToken
+from chaoslib.context import RunContext, active_run
+from chaoslib.exceptions import InterruptExecution
 from chaoslib.experiment import run_experiment
-from chaoslib.run import EventHandlerRegistry, RunEventHandler, Schedule, Strategy
-from chaoslib.types import Experiment, Journal
+from chaoslib.hypothesis import (
+    run_steady_state_hypothesis,
+    run_steady_state_hypothesis_async,
+)
+from chaoslib.provider.http import close_http_pools, get_http_adapter
+from chaoslib.run import (
+    AsyncRunner,
+    EventHandlerRegistry,
+    RunEventHandler,
+    Runner,
+    Schedule,
+    Strategy,
+)
+from chaoslib.types import Experiment, Journal, Overrun, ScheduleMode
 
 
 def test_run_ssh_before_method_only():
@@ -288,3 +316,395 @@ def test_do_not_ruin_method_on_failing_before_ssh():
     assert journal["status"] == "completed"
     assert journal["deviated"] is False
     assert len(journal["run"]) == 0
+
+
+def test_run_method_as_graph_runs_independent_activities_concurrently():
+    experiment = deepcopy(experiments.ExperimentWithDependencyGraph)
+    journal = run_experiment(
+        experiment,
+        settings={"runtime": {"method": {"strategy": "graph", "max_workers": 2}}},
+    )
+    assert journal["status"] == "completed"
+
+    runs = journal["run"]
+    assert [r["activity"]["name"] for r in runs] == ["pause-a", "pause-b", "pause-c"]
+    assert all(r["status"] == "succeeded" for r in runs)
+
+    a, b, c = runs
+    # a and b overlap, c waited for both
+    assert b["start"] < a["end"]
+    assert c["start"] >= a["end"]
+    assert c["start"] >= b["end"]
+
+
+def test_run_method_as_graph_records_submitted_activities_when_stopped():
+    experiment = deepcopy(experiments.ExperimentWithDependencyGraph)
+    experiment["method"][0]["provider"]["arguments"]["howlong"] = 0.1
+    checks = []
+
+    def should_stop() -> bool:
+        checks.append(True)
+        # stop once pause-a completed, while pause-b still runs
+        return len(checks) > 1
+
+    runs = []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        run_activities_graph(
+            experiment, {}, {}, pool, runs=runs, should_stop=should_stop
+        )
+        # pause-b completed before its run was merged
+        assert [r["activity"]["name"] for r in runs] == ["pause-a", "pause-b"]
+        assert all(r.get("status") == "succeeded" for r in runs)
+
+
+def test_run_method_as_graph_records_running_activities_when_interrupted():
+    experiment = deepcopy(experiments.ExperimentWithDependencyGraph)
+    experiment["method"][1]["provider"]["arguments"]["howlong"] = 0.1
+
+    def interrupt_after_pause_b(**kwargs) -> None:
+        execute_activity(**kwargs)
+        if kwargs["activity"]["name"] == "pause-b":
+            raise InterruptExecution("interrupted by pause-b")
+
+    runs = []
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        with patch(
+            "chaoslib.activity.execute_activity", side_effect=interrupt_after_pause_b
+        ):
+            with pytest.raises(InterruptExecution):
+                run_activities_graph(experiment, {}, {}, pool, runs=runs)
+        # pause-a completed before the interruption was raised
+        assert [r["activity"]["name"] for r in runs] == ["pause-a", "pause-b"]
+        assert runs[0].get("status") == "succeeded"
+
+
+def test_validating_a_large_method_without_dependencies_is_linear():
+    method = [
+        {"type": "action", "name": f"a{index}", "provider": {"type": "python"}}
+        for index in range(20000)
+    ]
+    started = time.time()
+    graph = build_activity_graph(method)
+    assert time.time() - started < 1
+    assert all(not deps for deps in graph.values())
+
+    for index, activity in enumerate(method[1:]):
+        activity["depends_on"] = [f"a{index}"]
+    started = time.time()
+    graph = build_activity_graph(method)
+    assert time.time() - started < 1
+    assert topological_order(graph) == list(range(20000))
+
+
+def test_run_method_sequentially_by_default_even_with_dependencies():
+    experiment = deepcopy(experiments.ExperimentWithDependencyGraph)
+    journal = run_experiment(experiment)
+    assert journal["status"] == "completed"
+
+    a, b, c = journal["run"]
+    assert b["start"] >= a["end"]
+
+
+def test_async_runner_runs_experiment():
+    experiment = deepcopy(experiments.SimpleExperiment)
+    with AsyncRunner(Strategy.DEFAULT) as runner:
+        journal = runner.run(experiment, settings={})
+
+    assert journal["status"] == "completed"
+    assert journal["deviated"] is False
+    assert journal["steady_states"]["before"]["steady_state_met"] is True
+    assert journal["steady_states"]["after"]["steady_state_met"] is True
+    assert journal["run"][0]["status"] == "succeeded"
+    assert journal["run"][0]["output"]["stdout"] == "world\n"
+
+
+def test_async_runner_awaits_coroutine_activities_concurrently():
+    experiment = deepcopy(experiments.ExperimentWithCoroutineActivities)
+    with AsyncRunner(Strategy.DEFAULT) as runner:
+        journal = runner.run(
+            experiment, settings={"runtime": {"rollbacks": {"strategy": "always"}}}
+        )
+
+    assert journal["status"] == "completed"
+    assert len(journal["run"]) == 10
+    assert all(r["output"] == 0.5 for r in journal["run"])
+    assert len(journal["rollbacks"]) == 1
+    # the ten background activities did not run one after the other
+    assert journal["duration"] < 2.5
+
+
+def test_async_runner_runs_ssh_continuously():
+    handlers_called = []
+
+    class Handler(RunEventHandler):
+        def continuous_hypothesis_completed(
+            self, experiment: Experiment, journal: Journal, exception: Exception = None
+        ) -> None:
+            handlers_called.append("continuous_hypothesis_completed")
+
+    experiment = deepcopy(experiments.SimpleExperiment)
+    with AsyncRunner(
+        Strategy.CONTINUOUS, Schedule(continuous_hypothesis_frequency=0.1)
+    ) as runner:
+        runner.register_event_handler(Handler())
+        journal = runner.run(experiment, settings={})
+
+    assert journal["status"] == "completed"
+    assert journal["steady_states"]["before"] is not None
+    assert journal["steady_states"]["after"] is not None
+    assert len(journal["steady_states"]["during"]) > 1
+    assert handlers_called == ["continuous_hypothesis_completed"]
+
+
+def test_async_runner_runs_method_as_graph():
+    experiment = deepcopy(experiments.ExperimentWithDependencyGraph)
+    with AsyncRunner(Strategy.DEFAULT) as runner:
+        journal = runner.run(
+            experiment, settings={"runtime": {"method": {"strategy": "graph"}}}
+        )
+
+    assert journal["status"] == "completed"
+    a, b, c = journal["run"]
+    assert [a["activity"]["name"], b["activity"]["name"]] == ["pause-a", "pause-b"]
+    assert b["start"] < a["end"]
+    assert c["start"] >= a["end"]
+    assert c["start"] >= b["end"]
+
+
+def test_hypothesis_probes_may_run_concurrently():
+    experiment = deepcopy(experiments.ExperimentWithSlowHypothesisProbes)
+    settings = {"runtime": {"hypothesis": {"strategy": "concurrent"}}}
+
+    start = time.time()
+    state = run_steady_state_hypothesis(
+        experiment, {}, {}, None, EventHandlerRegistry(), settings=settings
+    )
+
+    assert time.time() - start < 1.5
+    assert state["steady_state_met"] is True
+    assert [p["activity"]["name"] for p in state["probes"]] == [
+        "sleep-0",
+        "sleep-1",
+        "sleep-2",
+        "sleep-3",
+    ]
+    assert all(p["tolerance_met"] for p in state["probes"])
+
+
+def test_concurrent_hypothesis_cancels_pending_probes_on_failure():
+    experiment = deepcopy(experiments.ExperimentWithFailingSlowHypothesisProbes)
+    settings = {"runtime": {"hypothesis": {"strategy": "concurrent", "max_workers": 2}}}
+
+    start = time.time()
+    state = run_steady_state_hypothesis(
+        experiment, {}, {}, None, EventHandlerRegistry(), settings=settings
+    )
+
+    assert time.time() - start < 1.5
+    assert state["steady_state_met"] is False
+    assert len(state["probes"]) == 1
+    assert state["probes"][0]["activity"]["name"] == "fail-fast"
+    assert state["probes"][0]["tolerance_met"] is False
+
+
+def test_concurrent_hypothesis_sends_no_events_for_abandoned_probes():
+    experiment = deepcopy(experiments.ExperimentWithFailingSlowHypothesisProbes)
+    probes = experiment["steady-state-hypothesis"]["probes"]
+    # a pending reference, cancelled without ever being looked up
+    probes[3] = {"ref": "sleep-never"}
+    settings = {"runtime": {"hypothesis": {"strategy": "concurrent", "max_workers": 2}}}
+    handler = run_handlers.FullRunEventHandler()
+    registry = EventHandlerRegistry()
+    registry.register(handler)
+
+    state = run_steady_state_hypothesis(
+        experiment, {}, {}, None, registry, settings=settings
+    )
+    assert state["steady_state_met"] is False
+    completed = handler.calls.count("activity_completed")
+
+    # let sleep-long complete in the background
+    time.sleep(2.5)
+    assert handler.calls.count("activity_completed") == completed
+
+
+def test_concurrent_hypothesis_cancels_abandoned_probes_and_reuses_its_pool():
+    experiment = deepcopy(experiments.ExperimentWithFailingSlowHypothesisProbes)
+    experiment["steady-state-hypothesis"]["probes"][0]["provider"]["arguments"] = ["10"]
+    settings = {"runtime": {"hypothesis": {"strategy": "concurrent", "max_workers": 2}}}
+    context = RunContext()
+    threads = set(threading.enumerate())
+
+    start = time.time()
+    with context.activate(), CancellationToken().activate():
+        # as the continuous hypothesis would, abandoned probes left running
+        # would soon hold every thread of the pool
+        for _ in range(3):
+            state = run_steady_state_hypothesis(
+                experiment, {}, {}, None, EventHandlerRegistry(), settings=settings
+            )
+            assert state["steady_state_met"] is False
+    context.shutdown_pools()
+    assert time.time() - start < 5
+
+    # the probes left running were cancelled, nothing outlives the run
+    deadline = time.time() + 2
+    while time.time() < deadline:
+        left = [t for t in threading.enumerate() if t not in threads]
+        if not left:
+            break
+        time.sleep(0.05)
+    assert left == []
+
+
+def test_concurrent_hypothesis_async_cancels_running_probes_on_failure():
+    experiment = deepcopy(experiments.ExperimentWithFailingSlowHypothesisProbes)
+    settings = {"runtime": {"hypothesis": {"strategy": "concurrent"}}}
+
+    start = time.time()
+    state = asyncio.run(
+        run_steady_state_hypothesis_async(
+            experiment, {}, {}, None, EventHandlerRegistry(), settings=settings
+        )
+    )
+
+    assert time.time() - start < 1.5
+    assert state["steady_state_met"] is False
+    assert "fail-fast" in [p["activity"]["name"] for p in state["probes"]]
+    assert "sleep-long" not in [p["activity"]["name"] for p in state["probes"]]
+
+
+def test_gate_hypothesis_bails_the_experiment_in_concurrent_mode():
+    experiment = deepcopy(experiments.ExperimentWithFailingSlowHypothesisProbes)
+    settings = {"runtime": {"hypothesis": {"strategy": "concurrent", "max_workers": 2}}}
+
+    with Runner(Strategy.BEFORE_METHOD) as runner:
+        journal = runner.run(experiment, settings=settings)
+
+    assert journal["status"] == "completed"
+    assert journal["steady_states"]["before"]["steady_state_met"] is False
+    assert journal["run"] == []
+
+
+def test_run_ssh_continuously_with_bounded_retention():
+    experiment = deepcopy(experiments.SimpleExperiment)
+    schedule = Schedule(continuous_hypothesis_frequency=0.05, keep_last_iterations=2)
+    with Runner(Strategy.CONTINUOUS, schedule) as runner:
+        journal = runner.run(experiment, settings={})
+
+    summary = journal["steady_states"]["during_summary"]
+    assert summary["iterations"] > 2
+    assert summary["deviations"] == 0
+    assert summary["dropped"] == summary["iterations"] - 2
+    assert len(journal["steady_states"]["during"]) == 2
+    probe = summary["probes"]["has-world"]
+    assert probe["count"] == summary["iterations"]
+    assert probe["pass_ratio"] == 1.0
+    assert probe["latency"]["p50"] is not None
+
+
+def make_slow_continuous_experiment() -> Experiment:
+    experiment = deepcopy(experiments.SimpleExperiment)
+    experiment["steady-state-hypothesis"]["probes"] = [
+        experiments.sleep_probe("sleep", 0.15)
+    ]
+    return experiment
+
+
+def test_run_ssh_at_fixed_rate_skips_overrun_ticks():
+    schedule = Schedule(
+        continuous_hypothesis_frequency=0.1,
+        mode=ScheduleMode.FIXED_RATE,
+        overrun=Overrun.SKIP,
+    )
+    with Runner(Strategy.CONTINUOUS, schedule) as runner:
+        journal = runner.run(make_slow_continuous_experiment(), settings={})
+
+    assert journal["status"] == "completed"
+    during = journal["steady_states"]["during"]
+    indices = [state["tick"]["index"] for state in during]
+    assert indices == sorted(indices)
+    # every probe overruns the following tick
+    assert all(b - a >= 2 for a, b in zip(indices, indices[1:]))
+
+    schedule_summary = journal["steady_states"]["during_schedule"]
+    assert schedule_summary["mode"] == "fixed-rate"
+    assert schedule_summary["ticks"] == len(during)
+    assert schedule_summary["skipped"] > 0
+    assert schedule_summary["jitter"]["max"] < 0.1
+
+
+def test_run_ssh_at_fixed_rate_runs_overrun_ticks_concurrently():
+    schedule = Schedule(
+        continuous_hypothesis_frequency=0.1,
+        mode=ScheduleMode.FIXED_RATE,
+        overrun=Overrun.CONCURRENT,
+    )
+    with Runner(Strategy.CONTINUOUS, schedule) as runner:
+        journal = runner.run(make_slow_continuous_experiment(), settings={})
+
+    assert journal["status"] == "completed"
+    during = journal["steady_states"]["during"]
+    indices = sorted(state["tick"]["index"] for state in during)
+    assert indices == list(range(len(during)))
+    assert len(during) >= 8
+    assert journal["steady_states"]["during_schedule"]["skipped"] == 0
+
+
+def test_run_ssh_at_fixed_rate_bounds_concurrent_iterations():
+    schedule = Schedule(
+        continuous_hypothesis_frequency=0.05,
+        mode=ScheduleMode.FIXED_RATE,
+        overrun=Overrun.CONCURRENT,
+        max_concurrent_iterations=2,
+    )
+    experiment = deepcopy(experiments.SimpleExperiment)
+    experiment["steady-state-hypothesis"]["probes"] = [
+        experiments.sleep_probe("sleep", 0.3)
+    ]
+    with Runner(Strategy.CONTINUOUS, schedule) as runner:
+        journal = runner.run(experiment, settings={})
+
+    assert journal["status"] == "completed"
+    during = journal["steady_states"]["during"]
+    starts = sorted(state["probes"][0]["start"] for state in during)
+    ends = sorted(state["probes"][0]["end"] for state in during)
+    # never more than two iterations running at once
+    assert all(start >= end for start, end in zip(starts[2:], ends))
+
+    schedule_summary = journal["steady_states"]["during_schedule"]
+    assert schedule_summary["skipped"] > 0
+    assert schedule_summary["ticks"] == len(during)
+
+
+def test_run_ssh_at_fixed_rate_from_async_runner():
+    schedule = Schedule(
+        continuous_hypothesis_frequency=0.1,
+        mode=ScheduleMode.FIXED_RATE,
+        overrun=Overrun.CONCURRENT,
+    )
+    with AsyncRunner(Strategy.CONTINUOUS, schedule) as runner:
+        journal = runner.run(make_slow_continuous_experiment(), settings={})
+
+    assert journal["status"] == "completed"
+    during = journal["steady_states"]["during"]
+    indices = sorted(state["tick"]["index"] for state in during)
+    assert indices == list(range(len(during)))
+    assert len(during) >= 8
+
+
+def test_runner_cleanup_keeps_the_resources_other_runs_still_use():
+    url = "http://test-shared-url.com"
+    adapter = get_http_adapter(url)
+    try:
+        # as if another runner was playing from another thread
+        with active_run():
+            with Runner(Strategy.DEFAULT):
+                pass
+            assert get_http_adapter(url) is adapter
+
+        with Runner(Strategy.DEFAULT):
+            pass
+        assert get_http_adapter(url) is not adapter
+    finally:
+        close_http_pools()
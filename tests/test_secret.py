@@ -1,12 +1,21 @@
 import os
+import pickle
+import time
 from unittest.mock import MagicMock, mock_open, patch
 
 import pytest
 from fixtures import config
-from hvac.exceptions import InvalidRequest
+from fixtures.fakevault import FakeVault
+from hvac.exceptions import InvalidPath, InvalidRequest
 
 from chaoslib.exceptions import InvalidExperiment
-from chaoslib.secret import create_vault_client, load_secrets
+from chaoslib.secret import (
+    SecretsCache,
+    clear_secrets_cache,
+    create_vault_client,
+    get_secrets_cache,
+    load_secrets,
+)
 
 
 @patch.dict(os.environ, {"KUBE_API_URL": "http://1.2.3.4"})
@@ -366,3 +375,169 @@ def test_override_vault_with_vars(hvac):
         {"myapp": {"token": "baz"}},
     )
     assert secrets["myapp"]["token"] == "baz"
+
+
+def test_vault_secrets_are_read_once_per_path_with_a_single_login():
+    paths = {
+        "app/db": {"login": "jane", "password": "shhh"},
+        "app/api": {"token": "abc"},
+        "app/tls": {"cert": "---", "key": "***"},
+    }
+    secrets_info = {"db": {}, "api": {}, "tls": {}}
+    for i in range(10):
+        secrets_info["db"][f"login-{i}"] = {
+            "type": "vault",
+            "path": "app/db",
+            "key": "login",
+        }
+        secrets_info["api"][f"token-{i}"] = {
+            "type": "vault",
+            "path": "app/api",
+            "key": "token",
+        }
+        secrets_info["tls"][f"bundle-{i}"] = {"type": "vault", "path": "app/tls"}
+
+    with FakeVault(paths, delay=0.2) as vault:
+        config = {
+            "vault_addr": vault.url,
+            "vault_role_id": "mighty_id",
+            "vault_role_secret": "secret_secret",
+        }
+        start = time.monotonic()
+        secrets = load_secrets(secrets_info, config)
+        duration = time.monotonic() - start
+
+    assert vault.requests[("POST", "/v1/auth/approle/login")] == 1
+    reads = {k: v for k, v in vault.requests.items() if k[0] == "GET"}
+    assert sorted(p for _, p in reads) == [
+        "/v1/secret/data/app/api",
+        "/v1/secret/data/app/db",
+        "/v1/secret/data/app/tls",
+    ]
+    assert set(reads.values()) == {1}
+    # the three paths were read concurrently
+    assert vault.max_in_flight > 1
+    assert duration < 0.6
+
+    assert secrets["db"]["login-3"] == "jane"
+    assert secrets["api"]["token-9"] == "abc"
+    assert secrets["tls"]["bundle-0"] == {"cert": "---", "key": "***"}
+    assert secrets["tls"]["bundle-0"] is not secrets["tls"]["bundle-1"]
+
+
+def test_vault_secret_missing_from_the_fake_server_fails_loading():
+    with FakeVault({"foo/stuff": {"a": "b"}}) as vault:
+        config = {"vault_addr": vault.url, "vault_token": "not_awesome_token"}
+        with pytest.raises(InvalidPath):
+            load_secrets(
+                {
+                    "k8s": {
+                        "a-secret": {"type": "vault", "path": "foo/stuff"},
+                        "b-secret": {"type": "vault", "path": "foo/nothing"},
+                    }
+                },
+                config,
+            )
+
+
+def test_cached_vault_secrets_skip_the_round_trips():
+    secrets_info = {
+        "db": {
+            "login": {"type": "vault", "path": "app/db", "key": "login"},
+            "all": {"type": "vault", "path": "app/db"},
+        }
+    }
+    cache = SecretsCache(ttl=60)
+    with FakeVault({"app/db": {"login": "jane", "password": "shhh"}}) as vault:
+        config = {
+            "vault_addr": vault.url,
+            "vault_role_id": "mighty_id",
+            "vault_role_secret": "secret_secret",
+        }
+        first = load_secrets(secrets_info, config, cache=cache)
+        requests = sum(vault.requests.values())
+        second = load_secrets(secrets_info, config, cache=cache)
+        assert sum(vault.requests.values()) == requests == 2
+
+        # another identity does not share the cached secrets
+        config["vault_role_id"] = "another_id"
+        load_secrets(secrets_info, config, cache=cache)
+        assert sum(vault.requests.values()) == 4
+
+    assert first == second
+    assert second["db"]["login"] == "jane"
+    second["db"]["all"]["password"] = "changed"
+    assert load_secrets(secrets_info, config, cache=cache)["db"]["all"] == {
+        "login": "jane",
+        "password": "shhh",
+    }
+    assert cache.stats["hits"] == 2
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_secrets_cache_expires_entries():
+    clock = FakeClock()
+    cache = SecretsCache(ttl=10, clock=clock)
+    cache.set("a", {"v": 1})
+
+    clock.now = 9.9
+    assert cache.get("a") == {"v": 1}
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.stats["misses"] == 1
+
+
+def test_secrets_cache_refreshes_entries_in_the_background_before_expiry():
+    clock = FakeClock()
+    cache = SecretsCache(ttl=10, refresh_ahead=0.5, clock=clock)
+    cache.set("a", {"v": 1})
+
+    clock.now = 4
+    assert cache.get("a", refresh=lambda: {"v": 2}) == {"v": 1}
+    clock.now = 6
+    assert cache.get("a", refresh=lambda: {"v": 2}) == {"v": 1}
+
+    deadline = time.monotonic() + 5
+    while not cache.stats["refreshes"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # the entry was refreshed at 6 so it lives until 16
+    clock.now = 15
+    assert cache.get("a") == {"v": 2}
+
+
+def test_secrets_cache_evicts_least_recently_used_entries():
+    cache = SecretsCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats["evictions"] == 1
+
+
+def test_secrets_cache_cannot_be_pickled():
+    cache = SecretsCache()
+    cache.set("a", {"password": "shhh"})
+    with pytest.raises(TypeError):
+        pickle.dumps(cache)
+
+
+def test_secrets_cache_is_only_enabled_via_settings():
+    try:
+        assert get_secrets_cache({}) is None
+        cache = get_secrets_cache({"runtime": {"secrets": {"cache": {"ttl": 5}}}})
+        assert cache.ttl == 5
+        assert get_secrets_cache({"runtime": {"secrets": {"cache": True}}}) is cache
+    finally:
+        clear_secrets_cache()
@@ -1,6 +1,6 @@
 from fixtures import config
 
-from chaoslib import substitute
+from chaoslib import compile_substitution, get_compiled_substitution, substitute
 from chaoslib.configuration import load_configuration
 
 
@@ -68,3 +68,84 @@ def test_always_return_to_string_when_pattern_is_not_alone():
     result = substitute("hello ${value}", configuration=config, secrets=None)
     assert isinstance(result, str)
     assert result == "hello 8"
+
+
+def test_compiled_substitution_can_be_rendered_many_times():
+    compiled = compile_substitution({"message": "hello ${name}", "count": "${count}"})
+
+    assert compiled.dynamic is True
+    assert compiled.render({"name": "Jane", "count": 1}, None) == {
+        "message": "hello Jane",
+        "count": 1,
+    }
+    assert compiled.render(None, {"ident": {"name": "Joe", "count": 2}}) == {
+        "message": "hello Joe",
+        "count": 2,
+    }
+
+
+def test_compiled_substitution_copies_static_subtrees():
+    labels = {"app": "demo", "tier": ["backend"]}
+    args = {"labels": labels, "ns": "${ns}", "spec": {"replicas": 3}}
+    compiled = compile_substitution(args)
+
+    new_args = compiled.render({"ns": "default"}, None)
+
+    assert new_args == {"labels": labels, "ns": "default", "spec": {"replicas": 3}}
+    assert new_args is not args
+    assert new_args["labels"] is not labels
+    assert new_args["labels"]["tier"] is not labels["tier"]
+    assert new_args["spec"] is not args["spec"]
+    assert args["ns"] == "${ns}"
+
+    # mutating the rendered payload leaves the experiment alone
+    new_args["spec"]["replicas"] = 5
+    assert args["spec"] == {"replicas": 3}
+
+
+def test_substitute_does_not_share_nested_containers():
+    d = {"a": {"b": [1]}, "c": "${name}"}
+
+    new_args = substitute(d, config.SomeConfig, None)
+
+    assert new_args["a"] is not d["a"]
+    assert new_args["a"]["b"] is not d["a"]["b"]
+
+
+def test_compiled_substitution_follows_payload_altered_after_compilation():
+    args = {"spec": {"replicas": 3, "ns": "default"}, "cmd": ["run"]}
+    compiled = get_compiled_substitution(args)
+    assert get_compiled_substitution(args) is compiled
+    assert compiled.render({"ns": "demo"}, None) == args
+
+    args["spec"]["ns"] = "${ns}"
+    args["cmd"].append("${ns}")
+
+    assert compiled.render({"ns": "demo"}, None) == {
+        "spec": {"replicas": 3, "ns": "demo"},
+        "cmd": ["run", "demo"],
+    }
+
+
+def test_compiled_substitution_without_placeholders_returns_a_copy():
+    args = {"message": "hello", "cost": "5"}
+    compiled = compile_substitution(args)
+    assert compiled.dynamic is False
+
+    new_args = compiled.render({"name": "Jane"}, None)
+    assert new_args == args
+    assert new_args is not args
+
+
+def test_substitute_flattens_nested_sequences():
+    args = {"cmd": ["run", ["--name", "${name}"], ("--verbose",)]}
+
+    new_args = substitute(args, config.SomeConfig, None)
+
+    assert new_args == {"cmd": ["run", "--name", "Jane", "--verbose"]}
+
+
+def test_substitute_keeps_escaped_and_invalid_placeholders():
+    new_args = substitute("$$ ${name} costs $5 ${unknown}", config.SomeConfig, None)
+
+    assert new_args == "$ Jane costs $5 ${unknown}"